@@ -1,6 +1,6 @@
 from flask import Flask
 from config import Config
-from app.database import db
+from app.database import db, upgrade_schema
 import app.models 
 from flask_login import LoginManager
 
@@ -23,9 +23,48 @@ def create_app(config_class=Config):
     
     register_blueprints(app)
     
-    # Create database tables
+    # Drop in-process caches whose data another process changed (throttled, usually a no-op)
+    from app.services.data.invalidation import InvalidationBus, WARMUP
+    app.before_request(InvalidationBus.poll)
+    
+    # Refill this worker's in-memory caches when scripts/warm_caches.py asks for it
+    def warm_on_request():
+        from app.services.business_logic.cache_warmup_service import CacheWarmupService
+        CacheWarmupService.start_background_warmup(app)
+    InvalidationBus.subscribe(WARMUP, warm_on_request)
+    
+    # Give every request a latency budget that upstream calls are cut off at; the batch API gets a larger one
+    from flask import g, request
+    from app.services.data.deadline import Deadline
+    
+    @app.before_request
+    def open_request_deadline():
+        setting = 'API_REQUEST_DEADLINE_MS' if request.blueprint == 'api' else 'REQUEST_DEADLINE_MS'
+        g.deadline_token = Deadline.start(app.config.get(setting, 0) / 1000)
+    
+    @app.teardown_request
+    def close_request_deadline(exc=None):
+        Deadline.end(g.pop('deadline_token', None))
+    
+    # Create database tables, and add the columns newer versions introduced to existing ones
     with app.app_context():
-        db.create_all()
+        for change in upgrade_schema():
+            print(f"Upgraded schema: {change}")
+    
+    # Optionally preload the catalog and price caches in the background
+    if app.config.get('WARM_CACHES_ON_BOOT'):
+        from app.services.business_logic.cache_warmup_service import CacheWarmupService
+        CacheWarmupService.start_background_warmup(app)
+    
+    # Delete expired prices in bulk from inside the app (usually run from cron instead)
+    if app.config.get('PRICE_CACHE_SWEEP_SECONDS'):
+        from app.services.data.pricing_api import PricingService
+        PricingService.start_expiry_sweeper(app, app.config['PRICE_CACHE_SWEEP_SECONDS'])
+    
+    # Keep the materialized vehicle prices fresh from inside the app (usually run from cron instead)
+    if app.config.get('PRICE_REFRESH_INTERVAL_SECONDS'):
+        from app.services.business_logic.price_refresh_service import PriceRefreshService
+        PriceRefreshService.start_background_refresh(app, app.config['PRICE_REFRESH_INTERVAL_SECONDS'])
     
     return app
 
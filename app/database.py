@@ -1,3 +1,60 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+# Cache tables whose layout changed incompatibly; their rows can simply be fetched again
+REBUILT_TABLES = ('price_cache', 'vin_patterns')
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current models (call in an app context)
+
+    db.create_all() only creates missing tables. This also adds missing
+    nullable columns to existing tables and rebuilds the cache tables in
+    REBUILT_TABLES when their columns differ. It is idempotent, and safe
+    when several workers start at once (a column another one just added is
+    skipped).
+
+    Returns:
+        List of the changes made, e.g. "vehicles.price"
+
+    Raises:
+        RuntimeError: If a table lacks a NOT NULL column that cannot be added
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing_columns]
+
+        if table.name in REBUILT_TABLES:
+            if missing or existing_columns - set(table.columns.keys()):
+                table.drop(db.engine, checkfirst=True)
+                changes.append(f"{table.name} (rebuilt)")
+            continue
+
+        for column in missing:
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} to existing rows; "
+                    f"recreate the database with --reset"
+                )
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            except Exception:
+                if column.name not in {c['name'] for c in inspect(db.engine).get_columns(table.name)}:
+                    raise
+                continue
+            changes.append(f"{table.name}.{column.name}")
+
+    # New tables, and the rebuilt ones with their constraints and indexes
+    db.create_all()
+    return changes
@@ -3,5 +3,7 @@ from app.models.user import User
 from app.models.vehicle import Vehicle
 from app.models.depreciation import DepreciationRate
 from app.models.tco_comparison import TCOComparison
+from app.models.catalog import CatalogEntry, CatalogIngestCheckpoint, CatalogSyncState
+from app.models.vin_pattern import VinPattern
 
 # Add any other models you want to expose at the app.models level
\ No newline at end of file
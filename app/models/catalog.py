@@ -0,0 +1,88 @@
+from app.database import db
+from datetime import datetime
+import json
+
+class CatalogEntry(db.Model):
+    """One EPA vehicle option (year/make/model/trim) in the local catalog"""
+    __tablename__ = 'catalog_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    make = db.Column(db.String(100), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    
+    # EPA vehicle id from vehicle/menu/options and the option description
+    epa_id = db.Column(db.String(20), nullable=False)
+    option_text = db.Column(db.String(255), nullable=True)
+    
+    # Raw EPA fuelType, e.g. "Regular Gasoline" or "Electricity"
+    fuel_type = db.Column(db.String(50), nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Serves every step of the cascade: year -> make -> model
+        db.Index('ix_catalog_year_make_model', 'year', 'make', 'model'),
+        db.UniqueConstraint('epa_id', name='uq_catalog_epa_id'),
+    )
+    
+    def __repr__(self):
+        return f'<CatalogEntry {self.year} {self.make} {self.model} ({self.epa_id})>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'year': self.year,
+            'make': self.make,
+            'model': self.model,
+            'epa_id': self.epa_id,
+            'option_text': self.option_text,
+            'fuel_type': self.fuel_type
+        }
+
+
+class CatalogIngestCheckpoint(db.Model):
+    """Marks a (year, make) whose models and options were fully ingested"""
+    __tablename__ = 'catalog_ingest_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    make = db.Column(db.String(100), nullable=False)
+    option_count = db.Column(db.Integer, nullable=False, default=0)
+    vehicle_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('year', 'make', name='uq_catalog_checkpoint_year_make'),
+    )
+    
+    def __repr__(self):
+        return f'<CatalogIngestCheckpoint {self.year} {self.make}>'
+
+
+class CatalogSyncState(db.Model):
+    """Validators and content hash of the last seen response for one EPA menu endpoint"""
+    __tablename__ = 'catalog_sync_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint = db.Column(db.String(255), unique=True, nullable=False)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)  # sha256 of the response body
+    menu_values = db.Column(db.Text, nullable=True)  # JSON list of the menu values
+    checked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CatalogSyncState {self.endpoint}>'
+    
+    def get_menu_values(self):
+        """Return the stored menu values as a list"""
+        try:
+            return json.loads(self.menu_values) if self.menu_values else []
+        except ValueError:
+            return []
+    
+    def set_menu_values(self, values):
+        """Store the menu values as JSON"""
+        self.menu_values = json.dumps(values or [])
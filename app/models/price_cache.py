@@ -2,12 +2,26 @@ from app.database import db
 from datetime import datetime
 
 class PriceCache(db.Model):
+    """Market price of one vehicle as last fetched from a pricing source"""
     __tablename__ = 'price_cache'
-    
+
     id = db.Column(db.Integer, primary_key=True)
-    cache_key = db.Column(db.String(255), unique=True, nullable=False)
+
+    # Normalized (stripped, lower-case) lookup key; trim is '' when no trim was asked for
+    make = db.Column(db.String(100), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    trim = db.Column(db.String(100), nullable=False, default='')
+
     price = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    
+    source = db.Column(db.String(50), nullable=False, default='marketcheck')
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('make', 'model', 'year', 'trim', name='uq_price_cache_vehicle'),
+        # Serves the expiry sweeper's range scan
+        db.Index('ix_price_cache_fetched_at', 'fetched_at'),
+    )
+
     def __repr__(self):
-        return f'<PriceCache {self.cache_key}>'
+        return f'<PriceCache {self.year} {self.make} {self.model} {self.trim}>'
@@ -11,7 +11,21 @@ class Vehicle(db.Model):
     type = db.Column(db.String(50), nullable=False)
     fuel_type = db.Column(db.String(50), nullable=True)
     
+    # EPA fuel economy, averaged over the model's options (see scripts/populate_database.py --bulk-file)
+    mpg_city = db.Column(db.Float, nullable=True)
+    mpg_highway = db.Column(db.Float, nullable=True)
+    mpg_combined = db.Column(db.Float, nullable=True)
+    kwh_per_100mi = db.Column(db.Float, nullable=True)
+    vehicle_class = db.Column(db.String(100), nullable=True)  # EPA VClass, e.g. "Small Sport Utility Vehicle 4WD"
+    
+    # Purchase price materialized by the price refresh job (see PriceRefreshService)
+    price = db.Column(db.Float, nullable=True)
+    price_source = db.Column(db.String(20), nullable=True)  # 'market' (MarketCheck) or 'estimate'
+    price_as_of = db.Column(db.DateTime, nullable=True)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set when the model disappears from the EPA catalog; rows are kept for saved comparisons
+    retired_at = db.Column(db.DateTime, nullable=True)
 
     def __repr__(self):
         return f'<Vehicle {self.year} {self.make} {self.model}>'
@@ -23,5 +37,13 @@ class Vehicle(db.Model):
             'model': self.model,
             'year': self.year,
             'type': self.type,
-            'fuel_type': self.fuel_type
+            'fuel_type': self.fuel_type,
+            'mpg_city': self.mpg_city,
+            'mpg_highway': self.mpg_highway,
+            'mpg_combined': self.mpg_combined,
+            'kwh_per_100mi': self.kwh_per_100mi,
+            'vehicle_class': self.vehicle_class,
+            'price': self.price,
+            'price_source': self.price_source,
+            'price_as_of': self.price_as_of.isoformat() if self.price_as_of else None
         }
\ No newline at end of file
@@ -0,0 +1,39 @@
+from app.database import db
+from datetime import datetime
+import json
+
+class VinPattern(db.Model):
+    """
+    Decoded vehicle attributes shared by every VIN with the same pattern
+
+    The pattern is the WMI and VDS (positions 1-8) plus the model year
+    character (position 10); for small manufacturers (WMI ending in 9)
+    positions 12-14 are added since they complete the manufacturer code.
+    The check digit and serial number never change the decoded vehicle.
+    """
+    __tablename__ = 'vin_patterns'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pattern = db.Column(db.String(12), unique=True, nullable=False)
+    make = db.Column(db.String(100), nullable=True)
+    model = db.Column(db.String(100), nullable=True)
+    model_year = db.Column(db.Integer, nullable=True)
+    trim = db.Column(db.String(100), nullable=True)
+    body_class = db.Column(db.String(100), nullable=True)
+    fuel_type = db.Column(db.String(100), nullable=True)
+    values = db.Column(db.Text, nullable=True)  # JSON object of every non-empty decoded variable
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<VinPattern {self.pattern} {self.model_year} {self.make} {self.model}>'
+    
+    def get_values(self):
+        """Return the stored decoded variables as a dict"""
+        try:
+            return json.loads(self.values) if self.values else {}
+        except ValueError:
+            return {}
+    
+    def set_values(self, values):
+        """Store the decoded variables as JSON"""
+        self.values = json.dumps(values or {})
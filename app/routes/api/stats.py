@@ -0,0 +1,18 @@
+from flask import jsonify
+from app.routes.api import api_bp
+from app.services.data.http_client import UpstreamClient
+from app.services.data.circuit_breaker import CircuitBreaker
+from app.services.data.cache import TTLCache
+from app.services.data.pricing_api import PricingService
+
+
+@api_bp.route('/upstream-stats')
+def upstream_stats():
+    """Per-host upstream request and connection pool statistics, plus the circuit breakers"""
+    return jsonify({'pools': UpstreamClient.pool_stats(), 'circuit_breakers': CircuitBreaker.all_stats()})
+
+
+@api_bp.route('/cache-stats')
+def cache_stats():
+    """Hit, miss and eviction counters for every in-process cache, plus every price cache tier"""
+    return jsonify({'caches': TTLCache.all_stats(), 'price_tiers': PricingService.cache_stats()})
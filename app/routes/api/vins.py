@@ -0,0 +1,35 @@
+from flask import jsonify, request
+from app.routes.api import api_bp
+from app.services.data.vin_decoder import VinDecoderService
+
+# Upper bound on VINs per request (a large fleet paste)
+MAX_VINS_PER_REQUEST = 1000
+
+
+@api_bp.route('/decode-vins', methods=['POST'])
+def decode_vins():
+    """
+    Decode a batch of VINs
+    
+    Accepts JSON {"vins": [...]} or a form field "vins" with one VIN per
+    line (commas and semicolons also separate VINs).
+    """
+    payload = request.get_json(silent=True) or {}
+    vins = payload.get('vins')
+    if vins is None:
+        text = request.form.get('vins', '')
+        vins = [vin for vin in text.replace(',', '\n').replace(';', '\n').splitlines() if vin.strip()]
+    
+    if not isinstance(vins, list) or not vins:
+        return jsonify({'error': 'Provide a list of VINs'}), 400
+    if len(vins) > MAX_VINS_PER_REQUEST:
+        return jsonify({'error': f'At most {MAX_VINS_PER_REQUEST} VINs per request'}), 400
+    
+    results = VinDecoderService.decode_many(str(vin) for vin in vins)
+    
+    sources = {}
+    for vehicle in results.values():
+        source = vehicle['source'] if vehicle else 'failed'
+        sources[source] = sources.get(source, 0) + 1
+    
+    return jsonify({'results': results, 'sources': sources})
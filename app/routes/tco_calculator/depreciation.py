@@ -1,6 +1,8 @@
 from flask import Blueprint, request, render_template
 from app.models import Vehicle, TCOComparison
 from app.services.business_logic.depreciation_service import DepreciationService
+from app.services.business_logic.price_refresh_service import PriceRefreshService
+from app.services.data.pricing_api import PricingService
 from app.services.visualization.depreciation_visual import ChartService
 from app.services.business_logic.comparison_storage_service import ComparisonStorageService
 from app.database import db
@@ -52,11 +54,23 @@ def compare_multiple_vehicles():
         if len(vehicles) < 1:
             return "<div class='alert alert-danger'>No valid vehicles found</div>"
         
-        for vehicle in vehicles:
+        # Materialized prices come with the rows; missing or expired ones are priced in one batch
+        prices = [PriceRefreshService.current_price(vehicle) for vehicle in vehicle_objects]
+        unpriced = [index for index, price in enumerate(prices) if price is None]
+        if unpriced:
+            looked_up = PricingService.get_vehicle_prices(
+                [(vehicle_objects[index].make, vehicle_objects[index].model, vehicle_objects[index].year)
+                 for index in unpriced]
+            )
+            for index, price in zip(unpriced, looked_up):
+                prices[index] = price
+        
+        for vehicle_obj, price in zip(vehicle_objects, prices):
             depreciation = DepreciationService.calculate_depreciation(
-                vehicle,
+                vehicle_obj,
                 years=years,
-                annual_mileage=annual_mileage
+                annual_mileage=annual_mileage,
+                initial_price=price
             )
             vehicle_data.append(depreciation)
         
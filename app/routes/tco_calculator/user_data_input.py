@@ -1,10 +1,24 @@
-from flask import Blueprint, render_template, request, session, jsonify
+import hashlib
+import os
+from flask import Blueprint, render_template, request, session, jsonify, make_response, g
 from app.models import Vehicle, TCOComparison
 from app.database import db
 from app.services.data.vehicle_api import EPAFuelEconomyService
+from app.services.data.async_api import AsyncEPAFuelEconomyService, run_sync
+from app.services.business_logic.vehicle_search_index import VehicleSearchIndex
+from app.services.data.cache import TTLCache
+from app.services.data.invalidation import CATALOG
 
 user_data_input_bp = Blueprint('user_data_input', __name__, url_prefix='/user-data-input')
 
+# Rendered <option> lists depend only on (year), (year, make) or (year, make, model)
+FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 3600))
+_fragment_cache = TTLCache('vehicle_selection_fragments', maxsize=20000, ttl=FRAGMENT_CACHE_TTL,
+                           max_bytes=32 * 1024 * 1024, invalidate_on=CATALOG)
+
+# Browsers and proxies may reuse catalog responses this long before revalidating with If-None-Match
+CATALOG_HTTP_MAX_AGE = int(os.environ.get('CATALOG_HTTP_MAX_AGE', 300))
+
 
 @user_data_input_bp.route('/')
 def landing():
@@ -20,11 +34,10 @@ def get_makes():
     year = request.args.get('year')
     
     if year and year.isdigit():
-        makes = EPAFuelEconomyService.get_makes(int(year))
-    else:
-        makes = []
+        year = int(year)
+        return _catalog_response(('makes', year), lambda: _makes_fragment(year))
     
-    return render_template('partials/vehicle_selection/makes.html', makes=makes)
+    return render_template('partials/vehicle_selection/makes.html', makes=[])
 
 
 @user_data_input_bp.route('/models')
@@ -34,11 +47,10 @@ def get_models():
     make = request.args.get('make')
     
     if year and year.isdigit() and make:
-        models = EPAFuelEconomyService.get_models(make, int(year))
-    else:
-        models = []
+        year = int(year)
+        return _catalog_response(('models', year, make), lambda: _models_fragment(make, year))
     
-    return render_template('partials/vehicle_selection/models.html', models=models)
+    return render_template('partials/vehicle_selection/models.html', models=[])
 
 
 @user_data_input_bp.route('/fuel-types')
@@ -48,17 +60,72 @@ def get_fuel_types():
     model = request.args.get('model')
     year = request.args.get('year')
     
+    if all([make, model, year]) and year.isdigit():
+        year = int(year)
+        return _catalog_response(('fuel_types', year, make, model), lambda: _fuel_types_fragment(make, model, year))
+    
+    return render_template('partials/vehicle_selection/fuel_types.html',
+                           fuel_types=EPAFuelEconomyService.default_fuel_types())
 
-    if not all([make, model, year]):
-        fuel_types = EPAFuelEconomyService.default_fuel_types()
-    else:
-        try:
-            year = int(year)
-            fuel_types = EPAFuelEconomyService.get_fuel_types(make, model, year)
-        except (ValueError, TypeError) as e:
-            fuel_types = EPAFuelEconomyService.default_fuel_types()
+
+@user_data_input_bp.route('/cascade')
+def cascade():
+    """
+    Get the makes, models and fuel types options for one selection in a single response
     
-    return render_template('partials/vehicle_selection/fuel_types.html', fuel_types=fuel_types)
+    Returns JSON with the rendered <option> lists for every level the
+    selection reaches (makes for a year, models for a year and make, fuel
+    types for a year, make and model).
+    """
+    year = request.args.get('year')
+    make = request.args.get('make')
+    model = request.args.get('model')
+    
+    if not (year and year.isdigit()):
+        return jsonify({'makes': '', 'models': '', 'fuel_types': ''})
+    year = int(year)
+    
+    def render():
+        keys = [_fragment_key('makes', year)]
+        if make:
+            keys.append(_fragment_key('models', year, make))
+        if make and model:
+            keys.append(_fragment_key('fuel_types', year, make, model))
+        
+        # On any miss, load every level concurrently instead of one after another
+        data = {'makes': None, 'models': None, 'fuel_types': None}
+        if any(_fragment_cache.get(key) is None for key in keys):
+            data = run_sync(AsyncEPAFuelEconomyService.get_cascade(year, make, model))
+        
+        fragments = {'makes': _makes_fragment(year, data['makes']), 'models': '', 'fuel_types': ''}
+        if make:
+            fragments['models'] = _models_fragment(make, year, data['models'])
+        if make and model:
+            fragments['fuel_types'] = _fuel_types_fragment(make, model, year, data['fuel_types'])
+        return jsonify(fragments)
+    
+    return _catalog_response(('cascade', year, make, model), render)
+
+
+@user_data_input_bp.route('/typeahead')
+def typeahead():
+    """Match free text like "rav4 hy" against the whole catalog"""
+    query = request.args.get('q', '').strip()
+    
+    results = []
+    if len(query) >= 2:
+        results = [
+            {
+                'year': year,
+                'make': make,
+                'model': model,
+                'fuel_type': fuel_type,
+                'fuel_type_label': EPAFuelEconomyService.fuel_type_display_name(fuel_type)
+            }
+            for year, make, model, fuel_type in VehicleSearchIndex.get().search(query, limit=15)
+        ]
+    
+    return render_template('partials/vehicle_selection/typeahead.html', results=results, query=query)
 
 
 @user_data_input_bp.route('/add-vehicle', methods=['POST'])
@@ -101,18 +168,18 @@ def prefill(vehicle_id):
     """Pre-fill the TCO calculator with a specific vehicle"""
     vehicle = Vehicle.query.get_or_404(vehicle_id)
 
-    years = EPAFuelEconomyService.get_years()
     selected_year = vehicle.year
-
-    makes = EPAFuelEconomyService.get_makes(selected_year)
     selected_make = vehicle.make
-
-    models = EPAFuelEconomyService.get_models(selected_year, selected_make)
     selected_model = vehicle.model
-    
-    fuel_types = EPAFuelEconomyService.get_fuel_types(selected_year, selected_make, selected_model)
     selected_fuel_type = vehicle.fuel_type
     
+    # Load every dropdown level concurrently instead of one lookup after another
+    cascade = run_sync(AsyncEPAFuelEconomyService.get_cascade(selected_year, selected_make, selected_model))
+    years = cascade['years']
+    makes = cascade['makes']
+    models = cascade['models']
+    fuel_types = cascade['fuel_types']
+    
     return render_template(
         'pages/tco_calculator.html',
         years=years,
@@ -146,17 +213,11 @@ def recreate(comparison_id):
     """Recreate a previous TCO comparison"""
     comparison = TCOComparison.query.get_or_404(comparison_id)
 
-    years = EPAFuelEconomyService.get_years()
-    
     selected_year1 = comparison.vehicle1_year
     selected_make1 = comparison.vehicle1_make
     selected_model1 = comparison.vehicle1_model
     selected_fuel_type1 = comparison.vehicle1_fuel_type
     
-    makes1 = EPAFuelEconomyService.get_makes(selected_year1)
-    models1 = EPAFuelEconomyService.get_models(selected_year1, selected_make1)
-    fuel_types1 = EPAFuelEconomyService.get_fuel_types(selected_year1, selected_make1, selected_model1)
-    
     show_comparison = comparison.is_comparison
     selected_year2 = None
     selected_make2 = None
@@ -166,15 +227,26 @@ def recreate(comparison_id):
     models2 = None
     fuel_types2 = None
     
+    selections = [(selected_year1, selected_make1, selected_model1)]
     if show_comparison:
         selected_year2 = comparison.vehicle2_year
         selected_make2 = comparison.vehicle2_make
         selected_model2 = comparison.vehicle2_model
         selected_fuel_type2 = comparison.vehicle2_fuel_type
-        
-        makes2 = EPAFuelEconomyService.get_makes(selected_year2)
-        models2 = EPAFuelEconomyService.get_models(selected_year2, selected_make2)
-        fuel_types2 = EPAFuelEconomyService.get_fuel_types(selected_year2, selected_make2, selected_model2)
+        selections.append((selected_year2, selected_make2, selected_model2))
+    
+    # Load both vehicles' dropdown levels concurrently
+    cascades = run_sync(AsyncEPAFuelEconomyService.get_cascades(selections))
+    
+    years = cascades[0]['years']
+    makes1 = cascades[0]['makes']
+    models1 = cascades[0]['models']
+    fuel_types1 = cascades[0]['fuel_types']
+    
+    if show_comparison:
+        makes2 = cascades[1]['makes']
+        models2 = cascades[1]['models']
+        fuel_types2 = cascades[1]['fuel_types']
     
     annual_mileage = comparison.annual_mileage
     ownership_years = comparison.ownership_years
@@ -205,5 +277,84 @@ def recreate(comparison_id):
     )
 
 
+def _makes_fragment(year, makes=None):
+    """Rendered makes <option> list for a year (cached)"""
+    return _cached_fragment(
+        _fragment_key('makes', year), 'partials/vehicle_selection/makes.html', 'makes',
+        lambda: makes if makes is not None else EPAFuelEconomyService.get_makes(year)
+    )
+
+
+def _models_fragment(make, year, models=None):
+    """Rendered models <option> list for a year and make (cached)"""
+    return _cached_fragment(
+        _fragment_key('models', year, make), 'partials/vehicle_selection/models.html', 'models',
+        lambda: models if models is not None else EPAFuelEconomyService.get_models(make, year)
+    )
+
 
+def _fuel_types_fragment(make, model, year, fuel_types=None):
+    """Rendered fuel types <option> list for a year, make and model (cached)"""
+    return _cached_fragment(
+        _fragment_key('fuel_types', year, make, model), 'partials/vehicle_selection/fuel_types.html', 'fuel_types',
+        lambda: fuel_types if fuel_types is not None else EPAFuelEconomyService.get_fuel_types(make, model, year),
+        fallback=EPAFuelEconomyService.default_fuel_types,
+        degraded=lambda items: not items or EPAFuelEconomyService.is_default_fuel_types(items)
+    )
 
+
+def _cached_fragment(key, template, name, load, fallback=list, degraded=lambda items: not items):
+    """
+    Render a vehicle-selection partial through the fragment cache
+    
+    Degraded results (empty, or the default fuel types, after a failed
+    upstream call) are rendered but not cached, so the next request tries
+    again. Callers waiting on such a load render fallback() instead. Either
+    way the request is marked degraded so _catalog_response does not let
+    browsers keep the response.
+    """
+    rendered = {}
+    
+    def render():
+        items = load()
+        html = render_template(template, **{name: items})
+        if degraded(items):
+            rendered['html'] = html
+            return None
+        return html
+    
+    html = _fragment_cache.get_or_load(key, render)
+    if html is None:
+        g.catalog_degraded = True
+        html = rendered.get('html') or render_template(template, **{name: fallback()})
+    return html
+
+
+def _fragment_key(*parts):
+    """Fragment cache key; includes the catalog version so a catalog update never serves old options"""
+    return (EPAFuelEconomyService.catalog_version(),) + parts
+
+
+def _catalog_response(key, render):
+    """
+    Serve a catalog-derived response with an ETag and Cache-Control
+    
+    The ETag is derived from the catalog version and the request's
+    parameters. A request whose If-None-Match already holds it gets an
+    empty 304 without calling the services or rendering a template.
+    Degraded responses (empty or fallback options after a failed upstream
+    call) get no ETag and Cache-Control: no-store, so browsers ask again.
+    """
+    etag = hashlib.sha1(repr((EPAFuelEconomyService.catalog_version(),) + key).encode()).hexdigest()
+    
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render())
+        if g.pop('catalog_degraded', False):
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={CATALOG_HTTP_MAX_AGE}'
+    return response
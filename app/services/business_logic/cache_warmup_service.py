@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, desc
+from app.models import Vehicle, TCOComparison
+from app.database import db
+from app.services.data.vehicle_api import EPAFuelEconomyService
+from app.services.data.pricing_api import PricingService
+
+class CacheWarmupService:
+    # Held while a background warm-up runs, so repeated requests do not stack up
+    _background_lock = threading.Lock()
+
+    @staticmethod
+    def hot_vehicles(limit=50):
+        """
+        Get the vehicles that appear in the most saved comparisons
+
+        Args:
+            limit: Maximum number of vehicles to return
+
+        Returns:
+            List of dicts with year, make, model and type
+        """
+        rows = db.session.query(
+            Vehicle,
+            func.count(TCOComparison.id).label('analysis_count')
+        ).join(
+            TCOComparison,
+            ((TCOComparison.vehicle1_id == Vehicle.id) | (TCOComparison.vehicle2_id == Vehicle.id))
+        ).group_by(Vehicle.id).order_by(desc('analysis_count')).limit(limit).all()
+
+        return [CacheWarmupService._target(vehicle.year, vehicle.make, vehicle.model, vehicle.type)
+                for vehicle, _ in rows]
+
+    @staticmethod
+    def configured_vehicles(spec):
+        """
+        Parse a WARMUP_VEHICLES setting ("2024|Toyota|RAV4;2024|Honda|Civic")
+
+        The vehicle type is taken from the vehicles table when the vehicle exists.
+        """
+        targets = []
+        for item in (spec or '').split(';'):
+            parts = [part.strip() for part in item.split('|')]
+            if len(parts) != 3 or not parts[0].isdigit():
+                continue
+            year, make, model = int(parts[0]), parts[1], parts[2]
+            vehicle = Vehicle.query.filter_by(year=year, make=make, model=model).first()
+            targets.append(CacheWarmupService._target(year, make, model, vehicle.type if vehicle else None))
+        return targets
+
+    @staticmethod
+    def warm(app, targets, concurrency=4, on_progress: Optional[Callable[[int, int], None]] = None):
+        """
+        Preload the catalog menus and prices for a list of vehicles
+
+        Args:
+            app: Flask app (each task runs in its own app context)
+            targets: List of dicts with year, make, model and type
+            concurrency: Maximum lookups in flight
+            on_progress: Called with (done, total) after each lookup
+
+        Returns:
+            Dictionary with task/failure counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        tasks = CacheWarmupService._build_tasks(targets)
+        failed = 0
+
+        def run(task):
+            with app.app_context():
+                task[0](*task[1:])
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = [executor.submit(run, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                if future.exception() is not None:
+                    failed += 1
+                    print(f"Error warming cache: {future.exception()}")
+                if on_progress:
+                    on_progress(done, len(tasks))
+
+        return {
+            'vehicles': len(targets),
+            'tasks': len(tasks),
+            'failed': failed,
+            'elapsed_seconds': round(time.perf_counter() - started, 2)
+        }
+
+    @staticmethod
+    def warm_from_config(app):
+        """Warm the hottest and configured vehicles using the app's WARMUP_* settings"""
+        with app.app_context():
+            targets = CacheWarmupService.hot_vehicles(app.config.get('WARMUP_VEHICLE_LIMIT', 50))
+            targets += CacheWarmupService.configured_vehicles(app.config.get('WARMUP_VEHICLES'))
+
+        summary = CacheWarmupService.warm(app, targets, concurrency=app.config.get('WARMUP_CONCURRENCY', 4))
+        print(f"Cache warm-up finished: {summary['tasks']} lookups for {summary['vehicles']} vehicles "
+              f"in {summary['elapsed_seconds']}s ({summary['failed']} failed)")
+        return summary
+
+    @staticmethod
+    def start_background_warmup(app):
+        """
+        Run warm_from_config on a daemon thread so app start-up is not delayed
+
+        Returns:
+            The thread, or None if a background warm-up is already running
+        """
+        if not CacheWarmupService._background_lock.acquire(blocking=False):
+            return None
+
+        def run():
+            try:
+                CacheWarmupService.warm_from_config(app)
+            except Exception as e:
+                print(f"Error warming caches: {str(e)}")
+            finally:
+                CacheWarmupService._background_lock.release()
+
+        thread = threading.Thread(target=run, name='cache-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _build_tasks(targets) -> List[tuple]:
+        """One (function, *args) tuple per distinct lookup, broadest menus first"""
+        tasks = [(EPAFuelEconomyService.get_years,)]
+        seen = set()
+
+        def add(task):
+            if task not in seen:
+                seen.add(task)
+                tasks.append(task)
+
+        for target in targets:
+            add((EPAFuelEconomyService.get_makes, target['year']))
+        for target in targets:
+            add((EPAFuelEconomyService.get_models, target['make'], target['year']))
+        for target in targets:
+            add((EPAFuelEconomyService.get_fuel_types, target['make'], target['model'], target['year']))
+            # Same arguments as DepreciationService.calculate_depreciation
+            add((PricingService.get_vehicle_price, target['make'], target['model'], target['year']))
+
+        return tasks
+
+    @staticmethod
+    def _target(year, make, model, vehicle_type) -> Dict:
+        return {'year': year, 'make': make, 'model': model, 'type': vehicle_type}
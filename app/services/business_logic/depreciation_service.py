@@ -1,7 +1,9 @@
 from app.models.depreciation import DepreciationRate
 from app.models import Vehicle
 from app.services.data.pricing_api import PricingService
+from app.services.business_logic.price_refresh_service import PriceRefreshService
 from app.services.data.vehicle_api import EPAFuelEconomyService
+from app.services.business_logic.vehicle_type_classifier import VehicleTypeClassifier
 from app.database import db
 import math
 from datetime import datetime
@@ -23,17 +25,7 @@ class DepreciationService:
             Vehicle object
         """
         if not vehicle_type:
-            model_lower = model.lower()
-            if any(term in model_lower for term in ['truck', 'pickup']):
-                vehicle_type = 'Truck'
-            elif any(term in model_lower for term in ['suv', 'crossover', '4wd', 'awd']):
-                vehicle_type = 'SUV'
-            elif any(term in model_lower for term in ['van', 'minivan']):
-                vehicle_type = 'Van'
-            elif any(term in model_lower for term in ['coupe', 'convertible', 'roadster']):
-                vehicle_type = 'Sports Car'
-            else:
-                vehicle_type = 'Sedan'
+            vehicle_type = VehicleTypeClassifier.type_for(make, model, year)
         
         vehicle = Vehicle.query.filter_by(
             make=make,
@@ -58,7 +50,7 @@ class DepreciationService:
         return vehicle
     
     @staticmethod
-    def calculate_depreciation(vehicle, years=5, annual_mileage=12000):
+    def calculate_depreciation(vehicle, years=5, annual_mileage=12000, initial_price=None):
         """
         Calculate depreciation for a vehicle
         
@@ -66,6 +58,8 @@ class DepreciationService:
             vehicle: Vehicle object or dict with make, model, year, type
             years: Number of years to calculate (default 5)
             annual_mileage: Annual mileage (default 12000)
+            initial_price: Purchase price, if already looked up (e.g. with
+                PricingService.get_vehicle_prices for a whole comparison)
             
         Returns:
             Dictionary with depreciation data
@@ -79,12 +73,15 @@ class DepreciationService:
                 vehicle.get('type')
             )
         
-        initial_price = PricingService.get_vehicle_price(
-            vehicle.make, 
-            vehicle.model, 
-            vehicle.year, 
-            vehicle.type
-        )
+        if initial_price is None:
+            # Materialized by PriceRefreshService; vehicles it has not priced (recently) are looked up
+            initial_price = PriceRefreshService.current_price(vehicle)
+        if initial_price is None:
+            initial_price = PricingService.get_vehicle_price(
+                vehicle.make, 
+                vehicle.model, 
+                vehicle.year
+            )
         
         base_depreciation_rates = {
             'year_1': 0.19,
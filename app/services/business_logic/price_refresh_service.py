@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func, update, union_all
+from app.models import Vehicle, TCOComparison
+from app.database import db
+from app.services.data.invalidation import PRICES, InvalidationBus
+from app.services.data.pricing_api import PricingService
+
+class PriceRefreshService:
+    """
+    Keeps the materialized Vehicle.price / price_source / price_as_of columns fresh
+
+    Comparisons read the price straight from the Vehicle row; this job is
+    the only place that resolves prices for them in bulk.
+    """
+
+    @staticmethod
+    def current_price(vehicle: Vehicle) -> Optional[float]:
+        """
+        Get the vehicle's materialized price, or None if it has none yet
+
+        A price older than PricingService.CACHE_EXPIRY_DAYS counts as none
+        too, so callers look it up again when the refresh job is not running.
+        """
+        if vehicle.price is None or vehicle.price_as_of is None:
+            return None
+        if vehicle.price_as_of < datetime.now() - timedelta(days=PricingService.CACHE_EXPIRY_DAYS):
+            return None
+        return vehicle.price
+
+    @staticmethod
+    def due_vehicles(max_age_days=1, limit=1000) -> List[Vehicle]:
+        """
+        Get the vehicles whose price is missing or older than max_age_days
+
+        Recently analyzed vehicles come first (by their latest saved
+        comparison), then never-analyzed ones with the oldest prices.
+        Retired vehicles are skipped.
+        """
+        analyzed = union_all(
+            db.session.query(TCOComparison.vehicle1_id.label('vehicle_id'),
+                             TCOComparison.created_at.label('created_at')),
+            db.session.query(TCOComparison.vehicle2_id.label('vehicle_id'),
+                             TCOComparison.created_at.label('created_at')).filter(
+                TCOComparison.vehicle2_id.isnot(None)
+            )
+        ).subquery()
+        last_analyzed = db.session.query(
+            analyzed.c.vehicle_id,
+            func.max(analyzed.c.created_at).label('last_analyzed_at')
+        ).group_by(analyzed.c.vehicle_id).subquery()
+
+        cutoff = datetime.now() - timedelta(days=max_age_days)
+        return db.session.query(Vehicle).outerjoin(
+            last_analyzed, last_analyzed.c.vehicle_id == Vehicle.id
+        ).filter(
+            Vehicle.retired_at.is_(None),
+            (Vehicle.price_as_of.is_(None)) | (Vehicle.price_as_of < cutoff)
+        ).order_by(
+            last_analyzed.c.last_analyzed_at.is_(None),
+            last_analyzed.c.last_analyzed_at.desc(),
+            Vehicle.price_as_of.isnot(None),
+            Vehicle.price_as_of
+        ).limit(limit).all()
+
+    @staticmethod
+    def refresh(vehicles: List[Vehicle], concurrency=4, batch_size=100,
+                on_batch: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Resolve and store the prices of the given vehicles
+
+        Each batch is priced with one PricingService.get_vehicle_quotes call
+        (at most `concurrency` MarketCheck calls in flight) and written with
+        one executemany update.
+
+        Args:
+            vehicles: Vehicles to refresh, in priority order
+            concurrency: Maximum MarketCheck calls in flight
+            batch_size: Vehicles priced and written per batch
+            on_batch: Called with the number of vehicles refreshed so far
+
+        Returns:
+            Dictionary with market/estimate counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        counts = {'vehicles': 0, 'market': 0, 'estimate': 0}
+
+        rows = [(vehicle.id, vehicle.make, vehicle.model, vehicle.year) for vehicle in vehicles]
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            quotes = PricingService.get_vehicle_quotes([row[1:] for row in batch], workers=concurrency)
+
+            now = datetime.now()
+            db.session.execute(update(Vehicle), [
+                {'id': row[0], 'price': price, 'price_source': source, 'price_as_of': now}
+                for row, (price, source) in zip(batch, quotes)
+            ])
+            db.session.commit()
+
+            counts['vehicles'] += len(batch)
+            for _, source in quotes:
+                counts[source] += 1
+            if on_batch:
+                on_batch(counts['vehicles'])
+
+        # Other workers drop the prices they still hold in memory and read the new ones
+        if counts['vehicles']:
+            InvalidationBus.publish(PRICES)
+
+        counts['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+        return counts
+
+    @staticmethod
+    def refresh_due(app, max_age_days=1, limit=1000, concurrency=4) -> Dict:
+        """Refresh the prices that are due, in the given app's context"""
+        with app.app_context():
+            return PriceRefreshService.refresh(
+                PriceRefreshService.due_vehicles(max_age_days, limit), concurrency=concurrency
+            )
+
+    @staticmethod
+    def start_background_refresh(app, interval):
+        """Run refresh_due with the app's PRICE_REFRESH_* settings every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                try:
+                    summary = PriceRefreshService.refresh_due(
+                        app,
+                        max_age_days=app.config.get('PRICE_REFRESH_MAX_AGE_DAYS', 1),
+                        limit=app.config.get('PRICE_REFRESH_LIMIT', 1000),
+                        concurrency=app.config.get('PRICE_REFRESH_CONCURRENCY', 4)
+                    )
+                    if summary['vehicles']:
+                        print(f"Price refresh finished: {summary['vehicles']} vehicles "
+                              f"({summary['market']} market, {summary['estimate']} estimated) "
+                              f"in {summary['elapsed_seconds']}s")
+                except Exception as e:
+                    print(f"Error refreshing vehicle prices: {str(e)}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name='price-refresh', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,156 @@
+import heapq
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry
+from app.services.data.invalidation import CATALOG, InvalidationBus
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+class VehicleSearchIndex:
+    """
+    Compact in-memory prefix index over (year, make, model, fuel type) entries
+
+    Every entry is split into lower-case word tokens. The index keeps a
+    sorted vocabulary of distinct tokens and, per token, an array of entry
+    ids. A query token matches every vocabulary token it is a prefix of
+    (one bisect to find the range). The most selective query token gives
+    the candidate entries and the other tokens narrow them down, so
+    "rav4 hy" finds the RAV4 Hybrid entries of every year without scanning
+    the catalog.
+    """
+    REBUILD_AFTER_SECONDS = 3600
+
+    _shared: Optional['VehicleSearchIndex'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, entries: Iterable[Tuple[int, str, str, Optional[str]]]):
+        """
+        Args:
+            entries: (year, make, model, fuel_type) tuples; entries without a fuel
+                type are left out, since a vehicle cannot be added without one
+        """
+        # Entry ids follow display order, so the smallest matching ids are the best results
+        self.entries: List[Tuple[int, str, str, str]] = sorted(
+            {(int(year), sys.intern(make), sys.intern(model), sys.intern(fuel_type))
+             for year, make, model, fuel_type in entries if fuel_type},
+            key=lambda entry: (-entry[0], entry[1], entry[2], entry[3])
+        )
+
+        entry_tokens = [
+            set(VehicleSearchIndex.tokenize(f"{year} {make} {model} {fuel_type}"))
+            for year, make, model, fuel_type in self.entries
+        ]
+        self.vocabulary: List[str] = sorted(set().union(*entry_tokens))
+        positions = {token: position for position, token in enumerate(self.vocabulary)}
+
+        # token position -> entry ids, and entry id -> token positions (flattened)
+        self.postings: List[array] = [array('I') for _ in self.vocabulary]
+        self.token_offsets = array('I', [0])
+        self.token_positions = array('I')
+        for entry_id, tokens in enumerate(entry_tokens):
+            for token in tokens:
+                self.postings[positions[token]].append(entry_id)
+                self.token_positions.append(positions[token])
+            self.token_offsets.append(len(self.token_positions))
+
+        self.built_at = time.monotonic()
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, str, str, str]]:
+        """
+        Find entries matching every word of the query as a prefix
+
+        Returns:
+            Up to `limit` (year, make, model, fuel_type) tuples, newest year first
+        """
+        tokens = VehicleSearchIndex.tokenize(query)
+        if not tokens:
+            return []
+
+        # Start from the most selective token
+        ranges = sorted((self._token_range(token) for token in set(tokens)), key=lambda r: r[2])
+        start, end, count = ranges[0]
+        if not count:
+            return []
+
+        candidates = set()
+        for position in range(start, end):
+            candidates.update(self.postings[position])
+
+        for start, end, count in ranges[1:]:
+            if count <= 50 * len(candidates):
+                # Building the other set and intersecting runs in C and wins unless it is much larger
+                other = set()
+                for position in range(start, end):
+                    other.update(self.postings[position])
+                candidates = candidates & other
+            else:
+                candidates = {entry_id for entry_id in candidates if self._has_token_in(entry_id, start, end)}
+            if not candidates:
+                return []
+
+        return [self.entries[entry_id] for entry_id in heapq.nsmallest(limit, candidates)]
+
+    def _has_token_in(self, entry_id: int, start: int, end: int) -> bool:
+        """Whether the entry has a token whose vocabulary position is in [start, end)"""
+        positions = self.token_positions
+        for offset in range(self.token_offsets[entry_id], self.token_offsets[entry_id + 1]):
+            if start <= positions[offset] < end:
+                return True
+        return False
+
+    def _token_range(self, token: str) -> Tuple[int, int, int]:
+        """Vocabulary positions [start, end) of tokens starting with `token`, plus their posting count"""
+        start = bisect_left(self.vocabulary, token)
+        end = bisect_left(self.vocabulary, token + '\uffff', lo=start)
+        return start, end, sum(len(self.postings[position]) for position in range(start, end))
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Lower-case alphanumeric words ("RAV4 Hybrid AWD" -> ["rav4", "hybrid", "awd"])"""
+        return _TOKEN_PATTERN.findall(text.lower())
+
+    @staticmethod
+    def load_entries() -> List[Tuple[int, str, str, Optional[str]]]:
+        """Distinct (year, make, model, fuel_type) rows from the catalog, or the vehicles table if it is empty"""
+        rows = db.session.query(
+            CatalogEntry.year, CatalogEntry.make, CatalogEntry.model, CatalogEntry.fuel_type
+        ).distinct().all()
+        if not rows:
+            rows = db.session.query(
+                Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.fuel_type
+            ).filter(Vehicle.retired_at.is_(None)).distinct().all()
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def get() -> 'VehicleSearchIndex':
+        """The process-wide index, built on first use and rebuilt every REBUILD_AFTER_SECONDS"""
+        index = VehicleSearchIndex._shared
+        if index is not None and time.monotonic() - index.built_at < VehicleSearchIndex.REBUILD_AFTER_SECONDS:
+            return index
+
+        with VehicleSearchIndex._shared_lock:
+            index = VehicleSearchIndex._shared
+            if index is None or time.monotonic() - index.built_at >= VehicleSearchIndex.REBUILD_AFTER_SECONDS:
+                index = VehicleSearchIndex(VehicleSearchIndex.load_entries())
+                VehicleSearchIndex._shared = index
+            return index
+
+    @staticmethod
+    def invalidate():
+        """Drop the process-wide index so the next get() rebuilds it"""
+        with VehicleSearchIndex._shared_lock:
+            VehicleSearchIndex._shared = None
+
+
+InvalidationBus.subscribe(CATALOG, VehicleSearchIndex.invalidate)
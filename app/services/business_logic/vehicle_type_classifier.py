@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import update
+from app.database import db
+from app.models import Vehicle
+from app.services.data.catalog_snapshot import CatalogSnapshot
+
+# (vehicle type, model name fragments), highest priority first; the first type with a matching fragment wins.
+# Drivetrain tokens (AWD, 4WD) are left out: EPA appends them to sedans and wagons too
+DEFAULT_RULES: List[Tuple[str, List[str]]] = [
+    ('Truck', ['truck', 'pickup', 'silverado', 'f-150', 'ram', 'ranger', 'tacoma', 'tundra', 'colorado']),
+    ('SUV', ['suv', 'crossover', 'explorer', 'escape', 'expedition', 'tahoe', 'suburban', 'equinox']),
+    ('Van', ['van', 'caravan', 'sienna', 'odyssey', 'pacifica']),
+    ('Coupe', ['coupe', 'mustang', 'camaro', 'challenger', 'corvette']),
+    ('Convertible', ['convertible', 'cabriolet', 'spyder', 'spider', 'roadster']),
+    ('Hatchback', ['hatchback', 'golf', 'civic hatch', 'fit', 'yaris']),
+    ('Wagon', ['wagon', 'estate', 'touring', 'outback']),
+]
+DEFAULT_TYPE = 'Sedan'
+
+
+class VehicleTypeClassifier:
+    """
+    Vehicle type from a model name, in one pass over the name
+
+    The rule table is compiled into a single regex of zero-width
+    lookaheads, one named group per type with its fragments as
+    alternatives. Scanning the name once yields, at every position, the
+    highest-priority fragment starting there, so the best match is the
+    lowest-ranked group seen (and a rank 0 match stops the scan).
+
+    The rules can be replaced with a JSON file named by
+    VEHICLE_TYPE_RULES_FILE: {"default": "Sedan", "rules": [["Truck",
+    ["pickup", ...]], ...]}.
+    """
+    RULES_FILE = os.environ.get('VEHICLE_TYPE_RULES_FILE')
+
+    _shared: Optional['VehicleTypeClassifier'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]] = DEFAULT_RULES, default: str = DEFAULT_TYPE):
+        self.default = default
+        self.types = [vehicle_type for vehicle_type, _ in rules]
+
+        groups = []
+        for rank, (_, fragments) in enumerate(rules):
+            # Longer fragments first, so "civic hatch" is preferred over a shorter fragment at the same position
+            alternatives = '|'.join(re.escape(fragment.lower()) for fragment in sorted(fragments, key=len, reverse=True))
+            if alternatives:
+                groups.append(f'(?P<r{rank}>{alternatives})')
+        self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
+        self._memo: Dict[str, str] = {}
+
+    def classify(self, model: str) -> str:
+        """Vehicle type for a model name (the default type if no rule matches)"""
+        model_lower = (model or '').lower()
+        vehicle_type = self._memo.get(model_lower)
+        if vehicle_type is not None:
+            return vehicle_type
+
+        best = None
+        if self._pattern is not None:
+            for match in self._pattern.finditer(model_lower):
+                rank = int(match.lastgroup[1:])
+                if best is None or rank < best:
+                    best = rank
+                    if rank == 0:
+                        break
+
+        vehicle_type = self.types[best] if best is not None else self.default
+        if len(self._memo) < 100000:
+            self._memo[model_lower] = vehicle_type
+        return vehicle_type
+
+    def classify_many(self, models: Iterable[str]) -> Dict[str, str]:
+        """Classify each distinct model name once"""
+        return {model: self.classify(model) for model in set(models)}
+
+    @staticmethod
+    def get() -> 'VehicleTypeClassifier':
+        """The process-wide classifier, built from RULES_FILE or the default rules"""
+        if VehicleTypeClassifier._shared is None:
+            with VehicleTypeClassifier._shared_lock:
+                if VehicleTypeClassifier._shared is None:
+                    VehicleTypeClassifier._shared = VehicleTypeClassifier.from_file(VehicleTypeClassifier.RULES_FILE)
+        return VehicleTypeClassifier._shared
+
+    @staticmethod
+    def from_file(path: Optional[str]) -> 'VehicleTypeClassifier':
+        """Build a classifier from a rules JSON file, or the default rules if there is none"""
+        if not path:
+            return VehicleTypeClassifier()
+        try:
+            with open(path) as f:
+                config = json.load(f)
+            return VehicleTypeClassifier(
+                [(vehicle_type, list(fragments)) for vehicle_type, fragments in config['rules']],
+                config.get('default', DEFAULT_TYPE)
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading vehicle type rules from {path}: {str(e)}")
+            return VehicleTypeClassifier()
+
+    @staticmethod
+    def classify_model(model: str) -> str:
+        """Classify with the process-wide classifier"""
+        return VehicleTypeClassifier.get().classify(model)
+
+    @staticmethod
+    def type_for(make: str, model: str, year: int) -> str:
+        """
+        Vehicle type of a catalog vehicle
+
+        Reads the type stored at ingest (or by reclassify_all) from the
+        catalog snapshot or the vehicles table, and only classifies the name
+        for vehicles the catalog does not know.
+        """
+        snapshot = CatalogSnapshot.get()
+        vehicle_type = snapshot.get_vehicle_type(make, model, year) if snapshot else None
+        if not vehicle_type:
+            try:
+                row = db.session.query(Vehicle.type).filter_by(make=make, model=model, year=year).first()
+                vehicle_type = row.type if row else None
+            except Exception as e:
+                print(f"Error reading vehicle type: {str(e)}")
+        return vehicle_type or VehicleTypeClassifier.classify_model(model)
+
+    @staticmethod
+    def reclassify_all(batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Recompute and store the type of every Vehicle row with the current rules
+
+        Each distinct model name is classified once and only changed rows are
+        written, with executemany updates.
+
+        Returns:
+            Dictionary with the number of vehicles checked and updated
+        """
+        classifier = VehicleTypeClassifier.get()
+        rows = db.session.query(Vehicle.id, Vehicle.model, Vehicle.type).all()
+        types = classifier.classify_many(row.model for row in rows)
+
+        updates = [{'id': row.id, 'type': types[row.model]} for row in rows if row.type != types[row.model]]
+        for start in range(0, len(updates), batch_size):
+            db.session.execute(update(Vehicle), updates[start:start + batch_size])
+        db.session.commit()
+        return {'vehicles': len(rows), 'updated': len(updates)}
@@ -0,0 +1,151 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from flask import current_app, has_app_context
+from app.services.data.vehicle_api import EPAFuelEconomyService, NHTSAService
+from app.services.data.pricing_api import PricingService
+
+# Upper bound on upstream calls in flight for one gather_limited() call
+DEFAULT_CONCURRENCY = 8
+
+
+async def _to_thread(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking service call on the default executor
+
+    The call gets its own Flask app context (and therefore its own
+    SQLAlchemy session) so concurrent lookups never share a session.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def call():
+        if app is None:
+            return func(*args, **kwargs)
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    return await asyncio.to_thread(call)
+
+
+async def gather_limited(awaitables: Iterable[Awaitable], limit: int = DEFAULT_CONCURRENCY) -> List[Any]:
+    """asyncio.gather with at most `limit` awaitables running at once; results keep input order"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+
+def run_sync(coroutine: Awaitable) -> Any:
+    """
+    Run a coroutine to completion from synchronous code (e.g. a Flask view)
+
+    Raises:
+        RuntimeError: If called from a thread that already runs an event loop;
+            await the coroutine directly there instead
+    """
+    return asyncio.run(coroutine)
+
+
+class AsyncEPAFuelEconomyService:
+    """Awaitable counterpart of EPAFuelEconomyService"""
+
+    @staticmethod
+    async def get_years() -> List[Tuple[int, int]]:
+        return await _to_thread(EPAFuelEconomyService.get_years)
+
+    @staticmethod
+    async def get_makes(year: Optional[int] = None) -> List[Tuple[str, str]]:
+        return await _to_thread(EPAFuelEconomyService.get_makes, year)
+
+    @staticmethod
+    async def get_models(make: str, year: int) -> List[Tuple[str, str]]:
+        return await _to_thread(EPAFuelEconomyService.get_models, make, year)
+
+    @staticmethod
+    async def get_fuel_types(make: str, model: str, year: int) -> List[Tuple[str, str]]:
+        return await _to_thread(EPAFuelEconomyService.get_fuel_types, make, model, year)
+
+    @staticmethod
+    async def get_vehicle_details(vehicle_id: str) -> Optional[Dict]:
+        return await _to_thread(EPAFuelEconomyService.get_vehicle_details, vehicle_id)
+
+    @staticmethod
+    async def get_cascade(year: Optional[int] = None, make: Optional[str] = None,
+                          model: Optional[str] = None) -> Dict[str, List]:
+        """
+        Load every dropdown level for one selection concurrently
+
+        Returns:
+            Dictionary with years, makes, models and fuel_types; levels that
+            the selection does not reach are empty lists
+        """
+        lookups = {'years': AsyncEPAFuelEconomyService.get_years()}
+        if year:
+            lookups['makes'] = AsyncEPAFuelEconomyService.get_makes(year)
+        if year and make:
+            lookups['models'] = AsyncEPAFuelEconomyService.get_models(make, year)
+        if year and make and model:
+            lookups['fuel_types'] = AsyncEPAFuelEconomyService.get_fuel_types(make, model, year)
+
+        results = await asyncio.gather(*lookups.values())
+        cascade = {'years': [], 'makes': [], 'models': [], 'fuel_types': []}
+        cascade.update(zip(lookups.keys(), results))
+        return cascade
+
+    @staticmethod
+    async def get_cascades(selections: Iterable[Tuple]) -> List[Dict[str, List]]:
+        """get_cascade for several (year, make, model) selections at once"""
+        return await asyncio.gather(*(AsyncEPAFuelEconomyService.get_cascade(*selection) for selection in selections))
+
+
+class AsyncNHTSAService:
+    """Awaitable counterpart of NHTSAService"""
+
+    @staticmethod
+    async def get_makes() -> List[Dict]:
+        return await _to_thread(NHTSAService.get_makes)
+
+    @staticmethod
+    async def get_vehicle_types(make: str) -> List[Dict]:
+        return await _to_thread(NHTSAService.get_vehicle_types, make)
+
+    @staticmethod
+    async def get_models(make: str, year: int, vehicle_type: str) -> List[Dict]:
+        return await _to_thread(NHTSAService.get_models, make, year, vehicle_type)
+
+    @staticmethod
+    async def get_vin_variables() -> List[Dict]:
+        return await _to_thread(NHTSAService.get_vin_variables)
+
+    @staticmethod
+    async def decode_vin(vin: str) -> List[Dict]:
+        return await _to_thread(NHTSAService.decode_vin, vin)
+
+    @staticmethod
+    async def decode_vins(vins: Iterable[str], limit: int = DEFAULT_CONCURRENCY) -> List[List[Dict]]:
+        """Decode several VINs concurrently; results keep input order"""
+        return await gather_limited((AsyncNHTSAService.decode_vin(vin) for vin in vins), limit)
+
+
+class AsyncPricingService:
+    """Awaitable counterpart of PricingService"""
+
+    @staticmethod
+    async def get_vehicle_price(make: str, model: str, year: int, trim: Optional[str] = None) -> float:
+        return await _to_thread(PricingService.get_vehicle_price, make, model, year, trim)
+
+    @staticmethod
+    async def get_vehicle_prices(vehicles: Iterable[Tuple], limit: int = DEFAULT_CONCURRENCY) -> List[float]:
+        """
+        Price several vehicles with one PricingService.get_vehicle_prices batch
+
+        Args:
+            vehicles: Iterable of (make, model, year) or (make, model, year, trim) tuples
+            limit: Maximum MarketCheck calls in flight
+
+        Returns:
+            List of prices in input order
+        """
+        return await _to_thread(PricingService.get_vehicle_prices, list(vehicles), limit)
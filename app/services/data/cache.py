@@ -0,0 +1,193 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.services.data.invalidation import InvalidationBus
+
+_MISSING = object()
+
+
+class _Flight:
+    """A load in progress that other callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe TTL + LRU cache with single-flight loading
+
+    Entries expire after their TTL and the least recently used entries are
+    evicted once the cache holds more than maxsize entries or more than
+    max_bytes of (estimated) memory. get_or_load() makes sure concurrent
+    misses for the same key trigger one load, not one per caller.
+
+    Every cache registers itself by name so all_stats() can report the hit,
+    miss and eviction counters of the whole process. A cache created with
+    invalidate_on is cleared whenever that InvalidationBus channel is
+    published, by this or any other process.
+    """
+    _registry: Dict[str, 'TTLCache'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600, max_bytes: Optional[int] = None,
+                 invalidate_on: Optional[str] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'loads': 0, 'load_errors': 0,
+                          'coalesced': 0, 'evictions': 0, 'expirations': 0}
+
+        with TTLCache._registry_lock:
+            TTLCache._registry[name] = self
+        if invalidate_on:
+            InvalidationBus.subscribe(invalidate_on, self.clear)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting least recently used entries if over budget"""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    cache_none: bool = False) -> Any:
+        """
+        Return the cached value for key, calling loader() once on a miss
+
+        Callers that miss while another caller is already loading the same
+        key wait for that load and share its result (or its exception).
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable producing the value
+            ttl: Override the cache's default TTL for this entry
+            cache_none: Also cache a None result (default False, so failed
+                upstream calls are retried on the next request)
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._counters['loads'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            if flight.value is not None or cache_none:
+                self.set(key, flight.value, ttl)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._counters['load_errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def delete(self, key: Hashable):
+        """Remove a single entry"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters plus current size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    @staticmethod
+    def all_stats() -> Dict[str, Dict]:
+        """Stats for every cache created in this process, keyed by name"""
+        with TTLCache._registry_lock:
+            caches = list(TTLCache._registry.values())
+        return {cache.name: cache.stats() for cache in caches}
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Find a live entry (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters['misses'] += 1
+            return _MISSING
+
+        value, expires_at, size = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._bytes -= size
+            self._counters['expirations'] += 1
+            self._counters['misses'] += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self._counters['hits'] += 1
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]):
+        """Insert or replace an entry and enforce the size limits (caller holds the lock)"""
+        old = self._entries.pop(key, None)
+        if old:
+            self._bytes -= old[2]
+
+        size = estimate_size(key) + estimate_size(value)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.maxsize or
+                                 (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._counters['evictions'] += 1
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate memory footprint of a JSON-like value in bytes"""
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
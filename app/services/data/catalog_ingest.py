@@ -0,0 +1,260 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import insert
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry, CatalogIngestCheckpoint
+from app.services.data.http_client import UpstreamClient
+from app.services.data.rate_limiter import TokenBucket
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+class IncompleteBatchError(Exception):
+    """A (year, make) batch came back empty or partial because upstream calls failed"""
+
+
+class CatalogIngestPipeline:
+    """
+    Parallel, rate-limited, resumable EPA catalog ingestion
+
+    Worker threads (producers) fetch the models and options of one
+    (year, make) at a time from the EPA API, throttled by a shared token
+    bucket. The calling thread (consumer) takes finished (year, make)
+    batches off a bounded queue and writes each one with bulk inserts in a
+    single transaction together with its checkpoint row, so a rerun skips
+    everything that was already committed.
+    """
+
+    def __init__(self, classify: Callable[[str], str], makes_filter: Optional[Set[str]] = None,
+                 workers: int = 4, rate: float = 8.0, queue_size: int = 16):
+        """
+        Args:
+            classify: Maps a model name to a vehicle type
+            makes_filter: Upper-case makes to ingest (None for all)
+            workers: Number of (year, make) batches fetched in parallel
+            rate: Upstream requests per second across all workers
+            queue_size: Fetched batches allowed to wait for the writer
+        """
+        self.classify = classify
+        self.makes_filter = makes_filter
+        self.workers = workers
+        self.rate = rate
+        self.queue_size = queue_size
+
+    def run(self, years: Iterable[int], on_batch: Optional[Callable[[Dict], None]] = None,
+            pending: Optional[Dict] = None) -> Dict:
+        """
+        Ingest every pending (year, make) for the given years
+
+        Args:
+            years: Model years to ingest
+            on_batch: Called with each batch result after it is written
+                (or failed), e.g. to advance a progress bar
+            pending: Result of pending_batches(years) if already computed
+
+        Returns:
+            Dictionary with batch, option and vehicle totals and elapsed seconds
+        """
+        started = time.perf_counter()
+        UpstreamClient.set_rate_limiter(EPAFuelEconomyService.BASE_URL, TokenBucket(self.rate))
+        totals = {'batches': 0, 'skipped': 0, 'failed': 0, 'options': 0, 'vehicles': 0}
+
+        try:
+            if pending is None:
+                pending = self.pending_batches(years)
+            totals['skipped'] = pending['skipped']
+            work = pending['work']
+            totals['pending'] = len(work)
+
+            results = queue.Queue(maxsize=self.queue_size)
+            stop = threading.Event()
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            try:
+                for year, make in work:
+                    executor.submit(self._produce, year, make, results, stop)
+
+                # Consume on this thread: it owns the app context and the DB session
+                for _ in range(len(work)):
+                    batch = results.get()
+                    if batch['error'] is None:
+                        try:
+                            counts = self._write_batch(batch)
+                            totals['batches'] += 1
+                            totals['options'] += counts['options']
+                            totals['vehicles'] += counts['vehicles']
+                        except Exception as e:
+                            db.session.rollback()
+                            batch['error'] = e
+                    if batch['error'] is not None:
+                        totals['failed'] += 1
+                        print(f"Error ingesting {batch['make']} {batch['year']}: {batch['error']}")
+                    if on_batch:
+                        on_batch(batch)
+            except BaseException:
+                # e.g. Ctrl+C: let blocked producers exit; committed batches stay checkpointed
+                stop.set()
+                raise
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            UpstreamClient.set_rate_limiter(EPAFuelEconomyService.BASE_URL, None)
+
+        totals['elapsed_seconds'] = round(time.perf_counter() - started, 1)
+        return totals
+
+    def pending_batches(self, years: Iterable[int]) -> Dict:
+        """
+        List the (year, make) pairs that still need ingesting
+
+        Returns:
+            Dictionary with 'work' (list of (year, make)) and 'skipped'
+            (number of pairs already checkpointed)
+        """
+        done = {(row.year, row.make) for row in
+                db.session.query(CatalogIngestCheckpoint.year, CatalogIngestCheckpoint.make).all()}
+
+        work = []
+        skipped = 0
+        for year in years:
+            makes = [make for make, _ in EPAFuelEconomyService.fetch_makes(year)]
+            if self.makes_filter is not None:
+                makes = [make for make in makes if make.upper() in self.makes_filter]
+            for make in makes:
+                if (year, make) in done:
+                    skipped += 1
+                else:
+                    work.append((year, make))
+
+        return {'work': work, 'skipped': skipped}
+
+    def _produce(self, year: int, make: str, results: "queue.Queue", stop: threading.Event):
+        """Fetch one (year, make) batch on a worker thread and hand it to the writer"""
+        batch = {'year': year, 'make': make, 'models': {}, 'error': None}
+        try:
+            # The fetch_* methods return nothing when a call fails; such a batch must
+            # not replace the catalog or be checkpointed, so it is retried next run
+            models = EPAFuelEconomyService.fetch_models(make, year)
+            if not models:
+                raise IncompleteBatchError("no models returned")
+            for model, _ in models:
+                if stop.is_set():
+                    return
+                options = EPAFuelEconomyService.fetch_catalog_options(make, model, year)
+                if not CatalogIngestPipeline.is_complete(options):
+                    raise IncompleteBatchError(f"options or vehicle details missing for {model}")
+                batch['models'][model] = options
+        except Exception as e:
+            batch['error'] = e
+
+        # The queue is bounded, so wait for the writer to catch up (unless stopping)
+        while not stop.is_set():
+            try:
+                results.put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _write_batch(self, batch: Dict) -> Dict:
+        """Bulk insert one (year, make) batch and its checkpoint in one transaction"""
+        year = batch['year']
+        make = batch['make']
+        now = datetime.utcnow()
+
+        rows = CatalogIngestPipeline.build_rows(year, make, batch['models'], self.classify, now)
+
+        db.session.execute(
+            CatalogEntry.__table__.delete().where(CatalogEntry.year == year, CatalogEntry.make == make)
+        )
+        CatalogIngestPipeline.insert_rows(rows)
+
+        db.session.add(CatalogIngestCheckpoint(
+            year=year,
+            make=make,
+            option_count=len(rows['catalog']),
+            vehicle_count=len(rows['vehicles']),
+            completed_at=now
+        ))
+        db.session.commit()
+
+        return {'options': len(rows['catalog']), 'vehicles': len(rows['vehicles'])}
+
+    @staticmethod
+    def is_complete(options: List[Dict]) -> bool:
+        """
+        Whether fetch_catalog_options returned a model's full options
+
+        Failed calls come back as no options, or as options without a fuel
+        type (the vehicle detail call failed); such models must not be stored.
+        """
+        return bool(options) and all(option.get('fuel_type') for option in options)
+
+    @staticmethod
+    def build_rows(year: int, make: str, models: Dict[str, List[Dict]], classify: Callable[[str], str],
+                   now: datetime) -> Dict[str, List[Dict]]:
+        """
+        Turn fetched options into catalog and vehicle rows for bulk insert
+
+        Args:
+            year: Model year
+            make: Vehicle make
+            models: Dictionary of model -> options from fetch_catalog_options
+            classify: Maps a model name to a vehicle type
+            now: Timestamp for the new rows
+
+        Returns:
+            Dictionary with 'catalog' and 'vehicles' row lists; vehicles that
+            already exist for the year/make are left out
+        """
+        existing_vehicles = {
+            (row.model, row.fuel_type) for row in
+            db.session.query(Vehicle.model, Vehicle.fuel_type).filter_by(year=year, make=make).all()
+        }
+
+        catalog_rows = []
+        vehicle_rows = []
+        for model, options in models.items():
+            vehicle_type = classify(model)
+            for option in options:
+                catalog_rows.append({
+                    'year': year,
+                    'make': make,
+                    'model': model,
+                    'epa_id': str(option['epa_id']),
+                    'option_text': option.get('option_text'),
+                    'fuel_type': option.get('fuel_type'),
+                    'updated_at': now
+                })
+
+            fuel_types = sorted({option['fuel_type'] for option in options if option.get('fuel_type')}) or ['Gasoline']
+            for fuel_type in fuel_types:
+                if (model, fuel_type) not in existing_vehicles:
+                    vehicle_rows.append({
+                        'make': make,
+                        'model': model,
+                        'year': year,
+                        'type': vehicle_type,
+                        'fuel_type': fuel_type,
+                        'created_at': now
+                    })
+
+        return {'catalog': catalog_rows, 'vehicles': vehicle_rows}
+
+    @staticmethod
+    def insert_rows(rows: Dict[str, List[Dict]]):
+        """Bulk insert rows from build_rows (executemany, no ORM objects)"""
+        if rows['catalog']:
+            db.session.execute(insert(CatalogEntry), rows['catalog'])
+        if rows['vehicles']:
+            db.session.execute(insert(Vehicle), rows['vehicles'])
+
+    @staticmethod
+    def reset_checkpoints(years: Optional[List[int]] = None):
+        """Forget checkpoints (for some years, or all) so they are ingested again"""
+        query = CatalogIngestCheckpoint.query
+        if years:
+            query = query.filter(CatalogIngestCheckpoint.year.in_(years))
+        query.delete(synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,307 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry
+from app.services.data.invalidation import CATALOG, InvalidationBus
+
+MAGIC = b'TCOSNAP1'
+ALIGN = 64
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                            'instance', 'catalog_snapshot.bin')
+
+
+class StringTable:
+    """Sorted strings stored as one UTF-8 blob plus end offsets, read straight from the mapped file"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def index(self, value: str) -> int:
+        """Position of value (binary search over the sorted table), or -1"""
+        position = bisect_left(self, value)
+        if position < len(self) and self[position] == value:
+            return position
+        return -1
+
+    def take(self, ids: Iterable[int]) -> List[str]:
+        return [self[int(index)] for index in ids]
+
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped columnar copy of the catalog
+
+    One row per (year, make, model, fuel type), sorted in that order, with
+    each column stored as a NumPy array of ids into sorted string tables.
+    Every gunicorn worker maps the same file, so the page cache holds one
+    copy however many workers there are. A lookup is a couple of
+    searchsorted calls on the year/make/model columns instead of a query
+    or a walk over Python dicts.
+
+    Written by scripts/populate_database.py after every catalog change
+    (write() replaces the file atomically); workers pick up a new file
+    within RELOAD_CHECK_SECONDS.
+
+    File layout: MAGIC, an 8-byte little-endian header length, a JSON
+    header describing each array (dtype, shape, offset), then the arrays,
+    each aligned to ALIGN bytes.
+    """
+    PATH = os.environ.get('CATALOG_SNAPSHOT_PATH', DEFAULT_PATH)
+    RELOAD_CHECK_SECONDS = int(os.environ.get('CATALOG_SNAPSHOT_RELOAD_SECONDS', 30))
+
+    _shared: Optional['CatalogSnapshot'] = None
+    _shared_mtime: Optional[float] = None
+    _checked_at = 0.0
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        if self._map[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+
+        header_length = int(self._map[len(MAGIC):len(MAGIC) + 8].view('<u8')[0])
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(self._map[header_start:header_start + header_length].tobytes())
+        self.version = self.header['version']
+
+        arrays = {}
+        for name, spec in self.header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+            start = spec['offset']
+            arrays[name] = self._map[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+        self.year = arrays['year']
+        self.make = arrays['make']
+        self.model = arrays['model']
+        self.fuel_type = arrays['fuel_type']
+        self.vehicle_type = arrays['vehicle_type']
+        self.make_base_price = arrays['make_base_price']
+        self.model_price_factor = arrays['model_price_factor']
+        self.makes = StringTable(arrays['makes_blob'], arrays['makes_offsets'])
+        self.models = StringTable(arrays['models_blob'], arrays['models_offsets'])
+        self.fuel_types = StringTable(arrays['fuel_types_blob'], arrays['fuel_types_offsets'])
+        self.vehicle_types = StringTable(arrays['vehicle_types_blob'], arrays['vehicle_types_offsets'])
+
+    def __len__(self):
+        return len(self.year)
+
+    def get_years(self) -> List[int]:
+        """All model years, newest first"""
+        return [int(year) for year in np.unique(self.year)[::-1]]
+
+    def get_makes(self, year: int) -> Optional[List[str]]:
+        """Makes of a year in alphabetical order, or None if the year is not in the snapshot"""
+        start, end = self._range(self.year, year, 0, len(self.year))
+        if start == end:
+            return None
+        return self.makes.take(CatalogSnapshot._distinct(self.make[start:end]))
+
+    def get_models(self, make: str, year: int) -> Optional[List[str]]:
+        """Models of a year and make in alphabetical order, or None"""
+        start, end = self._make_range(make, year)
+        if start == end:
+            return None
+        return self.models.take(CatalogSnapshot._distinct(self.model[start:end]))
+
+    def get_fuel_types(self, make: str, model: str, year: int) -> Optional[List[str]]:
+        """Raw EPA fuel types of a year, make and model, or None"""
+        start, end = self._model_range(make, model, year)
+        fuel_types = [fuel_type for fuel_type in self.fuel_types.take(CatalogSnapshot._distinct(self.fuel_type[start:end]))
+                      if fuel_type]
+        return fuel_types or None
+
+    def get_vehicle_type(self, make: str, model: str, year: int) -> Optional[str]:
+        """Stored vehicle type of a year, make and model, or None"""
+        start, end = self._model_range(make, model, year)
+        if start == end:
+            return None
+        return self.vehicle_types[int(self.vehicle_type[start])] or None
+
+    def _make_range(self, make: str, year: int) -> Tuple[int, int]:
+        make_id = self.makes.index(make)
+        if make_id < 0:
+            return 0, 0
+        start, end = self._range(self.year, year, 0, len(self.year))
+        return self._range(self.make, make_id, start, end)
+
+    def _model_range(self, make: str, model: str, year: int) -> Tuple[int, int]:
+        model_id = self.models.index(model)
+        if model_id < 0:
+            return 0, 0
+        start, end = self._make_range(make, year)
+        return self._range(self.model, model_id, start, end)
+
+    @staticmethod
+    def _range(column: np.ndarray, value: int, start: int, end: int) -> Tuple[int, int]:
+        """Rows [start, end) of a sorted slice of column that equal value"""
+        if start == end:
+            return start, end
+        window = column[start:end]
+        return (start + int(np.searchsorted(window, value, 'left')),
+                start + int(np.searchsorted(window, value, 'right')))
+
+    @staticmethod
+    def _distinct(ids: np.ndarray) -> np.ndarray:
+        """Distinct values of a sorted id array"""
+        if len(ids) == 0:
+            return ids
+        keep = np.empty(len(ids), dtype=bool)
+        keep[0] = True
+        np.not_equal(ids[1:], ids[:-1], out=keep[1:])
+        return ids[keep]
+
+    @staticmethod
+    def get() -> Optional['CatalogSnapshot']:
+        """
+        The process-wide snapshot, or None if no snapshot file exists
+
+        The file's mtime is checked at most every RELOAD_CHECK_SECONDS and a
+        replaced file is mapped again.
+        """
+        now = time.monotonic()
+        if now - CatalogSnapshot._checked_at < CatalogSnapshot.RELOAD_CHECK_SECONDS:
+            return CatalogSnapshot._shared
+
+        with CatalogSnapshot._shared_lock:
+            if now - CatalogSnapshot._checked_at < CatalogSnapshot.RELOAD_CHECK_SECONDS:
+                return CatalogSnapshot._shared
+            try:
+                mtime = os.path.getmtime(CatalogSnapshot.PATH)
+            except OSError:
+                mtime = None
+
+            if mtime is None:
+                CatalogSnapshot._shared = None
+            elif mtime != CatalogSnapshot._shared_mtime:
+                try:
+                    CatalogSnapshot._shared = CatalogSnapshot(CatalogSnapshot.PATH)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Error loading catalog snapshot: {str(e)}")
+                    CatalogSnapshot._shared = None
+            CatalogSnapshot._shared_mtime = mtime
+            CatalogSnapshot._checked_at = now
+            return CatalogSnapshot._shared
+
+    @staticmethod
+    def invalidate():
+        """Check the snapshot file again on the next get()"""
+        with CatalogSnapshot._shared_lock:
+            CatalogSnapshot._checked_at = 0.0
+            CatalogSnapshot._shared_mtime = None
+
+    @staticmethod
+    def write(path: Optional[str] = None) -> int:
+        """
+        Write a snapshot of the current catalog (falls back to the vehicles table if the catalog is empty)
+
+        Returns:
+            int: Number of rows written
+        """
+        from app.services.data.pricing_api import PricingService
+
+        rows = db.session.query(
+            CatalogEntry.year, CatalogEntry.make, CatalogEntry.model, CatalogEntry.fuel_type
+        ).distinct().all()
+        if not rows:
+            rows = db.session.query(
+                Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.fuel_type
+            ).filter(Vehicle.retired_at.is_(None)).distinct().all()
+
+        vehicle_types = {
+            (row.year, row.make, row.model): row.type for row in
+            db.session.query(Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.type).filter(
+                Vehicle.retired_at.is_(None)
+            ).all()
+        }
+
+        return CatalogSnapshot.write_rows(
+            path or CatalogSnapshot.PATH,
+            [(year, make, model, fuel_type, vehicle_types.get((year, make, model)))
+             for year, make, model, fuel_type in rows],
+            base_price=PricingService.base_price,
+            price_factor=PricingService.model_price_factor
+        )
+
+    @staticmethod
+    def write_rows(path: str, rows: List[Tuple], base_price: Callable[[str], float],
+                   price_factor: Callable[[str], float]) -> int:
+        """
+        Write a snapshot file from (year, make, model, fuel_type, vehicle_type) rows
+
+        The file is written next to `path` and renamed over it, so workers
+        that still map the old file keep a consistent copy.
+        """
+        rows = sorted({(int(year), make, model, fuel_type or '', vehicle_type or '')
+                       for year, make, model, fuel_type, vehicle_type in rows})
+
+        tables = {name: sorted({row[position] for row in rows})
+                  for position, name in ((1, 'makes'), (2, 'models'), (3, 'fuel_types'), (4, 'vehicle_types'))}
+        ids = {name: {value: index for index, value in enumerate(values)} for name, values in tables.items()}
+
+        arrays = {
+            'year': np.array([row[0] for row in rows], dtype=np.int16),
+            'make': np.array([ids['makes'][row[1]] for row in rows], dtype=np.int32),
+            'model': np.array([ids['models'][row[2]] for row in rows], dtype=np.int32),
+            'fuel_type': np.array([ids['fuel_types'][row[3]] for row in rows], dtype=np.int16),
+            'vehicle_type': np.array([ids['vehicle_types'][row[4]] for row in rows], dtype=np.int8),
+            'make_base_price': np.array([base_price(make) for make in tables['makes']], dtype=np.float64),
+            'model_price_factor': np.array([price_factor(model) for model in tables['models']], dtype=np.float64)
+        }
+        # Rows are sorted by (year, make, model, fuel type) and the tables alphabetically, so ids sort the same way
+        for name, values in tables.items():
+            encoded = [value.encode('utf-8') for value in values]
+            arrays[f'{name}_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            arrays[f'{name}_offsets'] = np.concatenate(
+                [[0], np.cumsum([len(value) for value in encoded], dtype=np.int64)]
+            ).astype(np.int64)
+
+        specs = {}
+        offset = 0
+        for name, array in arrays.items():
+            specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += -(-array.nbytes // ALIGN) * ALIGN
+
+        # The header holds the absolute offsets, so grow the space reserved for it until it fits
+        version = f"{len(rows)}-{int(time.time() * 1000)}"
+        data_start = 0
+        while True:
+            placed = {name: dict(spec, offset=spec['offset'] + data_start) for name, spec in specs.items()}
+            header = json.dumps({'version': version, 'arrays': placed}).encode()
+            needed = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+            if needed <= data_start:
+                break
+            data_start = needed
+        specs = placed
+        header = header.ljust(data_start - len(MAGIC) - 8)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.array([len(header)], dtype='<u8').tobytes())
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(specs[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(max(f.tell(), data_start + offset))
+        os.replace(temp_path, path)
+        return len(rows)
+
+
+# A catalog change published by another process re-checks the snapshot file right away
+InvalidationBus.subscribe(CATALOG, CatalogSnapshot.invalidate)
@@ -0,0 +1,119 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import func
+from app.database import db
+from app.models.catalog import CatalogEntry
+
+class CatalogStore:
+    """
+    Local, indexed copy of the EPA year/make/model/option catalog.
+
+    Filled by scripts/populate_database.py. Every reader returns None when the
+    catalog has no rows for the lookup (or the database is unavailable) so the
+    caller can fall back to the EPA API.
+    """
+
+    @staticmethod
+    def get_years() -> Optional[List[int]]:
+        """Get all catalog model years, newest first"""
+        try:
+            rows = db.session.query(CatalogEntry.year).distinct().order_by(CatalogEntry.year.desc()).all()
+            return [row[0] for row in rows] or None
+        except Exception as e:
+            print(f"Error reading catalog years: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_makes(year: int) -> Optional[List[str]]:
+        """Get all catalog makes for a year"""
+        try:
+            rows = db.session.query(CatalogEntry.make).filter(
+                CatalogEntry.year == year
+            ).distinct().order_by(CatalogEntry.make).all()
+            return [row[0] for row in rows] or None
+        except Exception as e:
+            print(f"Error reading catalog makes: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_models(make: str, year: int) -> Optional[List[str]]:
+        """Get all catalog models for a make and year"""
+        try:
+            rows = db.session.query(CatalogEntry.model).filter(
+                CatalogEntry.year == year,
+                CatalogEntry.make == make
+            ).distinct().order_by(CatalogEntry.model).all()
+            return [row[0] for row in rows] or None
+        except Exception as e:
+            print(f"Error reading catalog models: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_fuel_types(make: str, model: str, year: int) -> Optional[List[str]]:
+        """Get the raw EPA fuel types offered for a make/model/year"""
+        try:
+            rows = db.session.query(CatalogEntry.fuel_type).filter(
+                CatalogEntry.year == year,
+                CatalogEntry.make == make,
+                CatalogEntry.model == model,
+                CatalogEntry.fuel_type.isnot(None)
+            ).distinct().all()
+            return [row[0] for row in rows] or None
+        except Exception as e:
+            print(f"Error reading catalog fuel types: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_version() -> Optional[str]:
+        """Get an identifier that changes whenever catalog rows are added, replaced or removed"""
+        try:
+            count, latest = db.session.query(func.count(CatalogEntry.id), func.max(CatalogEntry.updated_at)).one()
+            if not count:
+                return None
+            return f"{count}-{latest.isoformat() if latest else ''}"
+        except Exception as e:
+            print(f"Error reading catalog version: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_options(make: str, model: str, year: int) -> Optional[List[Dict]]:
+        """Get the EPA option ids (with text and fuel type) for a make/model/year"""
+        try:
+            entries = CatalogEntry.query.filter_by(year=year, make=make, model=model).order_by(CatalogEntry.epa_id).all()
+            return [entry.to_dict() for entry in entries] or None
+        except Exception as e:
+            print(f"Error reading catalog options: {str(e)}")
+            return None
+
+    @staticmethod
+    def store_options(make: str, model: str, year: int, options: List[Dict], commit: bool = True) -> int:
+        """
+        Replace the catalog options for a make/model/year
+
+        Args:
+            make: Vehicle make
+            model: Vehicle model
+            year: Model year
+            options: List of dicts with epa_id, option_text and fuel_type
+            commit: Commit the session when done (default True)
+
+        Returns:
+            int: Number of options stored
+        """
+        CatalogEntry.query.filter_by(year=year, make=make, model=model).delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        for option in options:
+            db.session.add(CatalogEntry(
+                year=year,
+                make=make,
+                model=model,
+                epa_id=str(option['epa_id']),
+                option_text=option.get('option_text'),
+                fuel_type=option.get('fuel_type'),
+                updated_at=now
+            ))
+
+        if commit:
+            db.session.commit()
+        return len(options)
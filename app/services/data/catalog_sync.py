@@ -0,0 +1,266 @@
+import hashlib
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import requests
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry, CatalogSyncState
+from app.services.data.catalog_ingest import CatalogIngestPipeline
+from app.services.data.catalog_store import CatalogStore
+from app.services.data.http_client import UpstreamClient
+from app.services.data.invalidation import CATALOG, InvalidationBus
+from app.services.data.rate_limiter import TokenBucket
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+class CatalogSyncService:
+    """
+    Incremental catalog refresh
+
+    Instead of dropping and re-downloading everything, each EPA menu
+    (makes per year, models per make/year) is requested conditionally with
+    the stored ETag/Last-Modified validators and compared against the
+    stored content hash; unchanged menus are answered from the stored menu
+    values. The menus are diffed against the catalog: only new models are
+    fetched and inserted, and models that disappeared are removed from the
+    catalog and their Vehicle rows retired. A failed request or an empty
+    menu never retires anything, and a model whose options or details could
+    not be fetched is left for the next run.
+    """
+
+    def __init__(self, classify: Callable[[str], str], makes_filter: Optional[Set[str]] = None,
+                 rate: float = 8.0, deep: bool = False):
+        """
+        Args:
+            classify: Maps a model name to a vehicle type
+            makes_filter: Upper-case makes to sync (None for all)
+            rate: Upstream requests per second
+            deep: Also re-check the options menu of every existing model
+                (finds new trims/fuel types, costs one request per model)
+        """
+        self.classify = classify
+        self.makes_filter = makes_filter
+        self.rate = rate
+        self.deep = deep
+        self.counts = {}
+
+    def sync(self, years: Iterable[int], on_make: Optional[Callable[[int, str], None]] = None) -> Dict:
+        """
+        Bring the catalog for the given years up to date
+
+        Args:
+            years: Model years to sync
+            on_make: Called with (year, make) after each make is processed
+
+        Returns:
+            Dictionary with request, change and retirement counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        self.counts = {'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0, 'failed': 0,
+                       'models_added': 0, 'models_retired': 0, 'options_updated': 0, 'vehicles_added': 0}
+        UpstreamClient.set_rate_limiter(EPAFuelEconomyService.BASE_URL, TokenBucket(self.rate))
+
+        try:
+            for year in years:
+                self._sync_year(year, on_make)
+        finally:
+            UpstreamClient.set_rate_limiter(EPAFuelEconomyService.BASE_URL, None)
+            # Clears the menu caches of every worker, not just this process
+            InvalidationBus.publish(CATALOG)
+
+        self.counts['elapsed_seconds'] = round(time.perf_counter() - started, 1)
+        return self.counts
+
+    def _sync_year(self, year: int, on_make: Optional[Callable[[int, str], None]]):
+        """Sync the makes of one year, then the models of each make"""
+        menu = self._check_menu(f"vehicle/menu/make?year={year}")
+        if menu is None:
+            return
+
+        upstream_makes = menu['values']
+        if self.makes_filter is not None:
+            upstream_makes = [make for make in upstream_makes if make.upper() in self.makes_filter]
+
+        # The diff is local and cheap, so it also runs for unchanged menus;
+        # that way a model whose fetch failed last time is picked up again
+        removed_makes = set(CatalogStore.get_makes(year) or []) - set(upstream_makes)
+        for make in removed_makes:
+            self._retire_models(year, make, CatalogStore.get_models(make, year) or [])
+        db.session.commit()
+
+        for make in upstream_makes:
+            try:
+                self._sync_make(year, make)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.counts['failed'] += 1
+                print(f"Error syncing {make} {year}: {e}")
+            if on_make:
+                on_make(year, make)
+
+    def _sync_make(self, year: int, make: str):
+        """Diff the models menu of one (year, make) against the catalog"""
+        menu = self._check_menu(f"vehicle/menu/model?year={year}&make={make}")
+        if menu is None:
+            return
+
+        existing_models = set(CatalogStore.get_models(make, year) or [])
+        upstream_models = set(menu['values'])
+
+        models_to_fetch = upstream_models - existing_models
+        self._retire_models(year, make, existing_models - upstream_models)
+        # A changed options menu's new state is only saved once the model was refetched
+        pending_states = {}
+        if self.deep:
+            for model in upstream_models & existing_models:
+                options_menu = self._check_menu(f"vehicle/menu/options?year={year}&make={make}&model={model}",
+                                                save=False)
+                if options_menu is None:
+                    continue
+                if options_menu['changed']:
+                    models_to_fetch.add(model)
+                    pending_states[model] = options_menu['save']
+                else:
+                    options_menu['save']()
+
+        if not models_to_fetch:
+            return
+
+        fetched = {}
+        for model in sorted(models_to_fetch):
+            options = EPAFuelEconomyService.fetch_catalog_options(make, model, year)
+            self.counts['requests'] += 1 + len(options)
+            # Empty or partial results are failed fetches; leave the model for the next run
+            if CatalogIngestPipeline.is_complete(options):
+                fetched[model] = options
+                if model in pending_states:
+                    pending_states[model]()
+
+        if not fetched:
+            return
+
+        now = datetime.utcnow()
+        db.session.execute(
+            CatalogEntry.__table__.delete().where(
+                CatalogEntry.year == year,
+                CatalogEntry.make == make,
+                CatalogEntry.model.in_(list(fetched))
+            )
+        )
+        rows = CatalogIngestPipeline.build_rows(year, make, fetched, self.classify, now)
+        CatalogIngestPipeline.insert_rows(rows)
+
+        # Models that come back after being retired are live again
+        Vehicle.query.filter(
+            Vehicle.year == year,
+            Vehicle.make == make,
+            Vehicle.model.in_(list(fetched)),
+            Vehicle.retired_at.isnot(None)
+        ).update({'retired_at': None}, synchronize_session=False)
+
+        new_models = set(fetched) - existing_models
+        self.counts['models_added'] += len(new_models)
+        self.counts['options_updated'] += len(fetched) - len(new_models)
+        self.counts['vehicles_added'] += len(rows['vehicles'])
+
+    def _retire_models(self, year: int, make: str, models: Iterable[str]):
+        """Remove models from the catalog and mark their Vehicle rows retired"""
+        models = list(models)
+        if not models:
+            return
+
+        db.session.execute(
+            CatalogEntry.__table__.delete().where(
+                CatalogEntry.year == year,
+                CatalogEntry.make == make,
+                CatalogEntry.model.in_(models)
+            )
+        )
+        Vehicle.query.filter(
+            Vehicle.year == year,
+            Vehicle.make == make,
+            Vehicle.model.in_(models),
+            Vehicle.retired_at.is_(None)
+        ).update({'retired_at': datetime.utcnow()}, synchronize_session=False)
+        self.counts['models_retired'] += len(models)
+
+    def _check_menu(self, endpoint: str, save: bool = True) -> Optional[Dict]:
+        """
+        Conditionally fetch a menu and compare it with the stored state
+
+        The updated CatalogSyncState is added to the session but not
+        committed, so it is only saved together with the catalog changes
+        it describes. An empty menu is treated like a failed request, so
+        it never retires a make's models.
+
+        Args:
+            endpoint: Menu endpoint below the EPA base URL
+            save: Update the CatalogSyncState right away; with False the
+                caller runs the returned 'save' once the menu's changes
+                are stored
+
+        Returns:
+            Dictionary with 'changed' (bool), 'values' (menu values) and
+            'save' (callable), or None if the request failed
+        """
+        state = CatalogSyncState.query.filter_by(endpoint=endpoint).first()
+        headers = {'Accept': 'application/json'}
+        if state and state.etag:
+            headers['If-None-Match'] = state.etag
+        if state and state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+        self.counts['requests'] += 1
+        try:
+            response = UpstreamClient.get(f"{EPAFuelEconomyService.BASE_URL}/{endpoint}", headers=headers)
+        except requests.RequestException as e:
+            print(f"Error checking {endpoint}: {e}")
+            self.counts['failed'] += 1
+            return None
+
+        now = datetime.utcnow()
+        if response.status_code == 304 and state:
+            def save_not_modified():
+                state.checked_at = now
+            if save:
+                save_not_modified()
+            self.counts['not_modified'] += 1
+            return {'changed': False, 'values': state.get_menu_values(), 'save': save_not_modified}
+
+        if response.status_code != 200:
+            self.counts['failed'] += 1
+            return None
+
+        try:
+            data = response.json()
+        except ValueError:
+            self.counts['failed'] += 1
+            return None
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        values = EPAFuelEconomyService.parse_menu_values(data) if data else []
+        if not values:
+            print(f"Empty menu from {endpoint}; treating it as a failed request")
+            self.counts['failed'] += 1
+            return None
+
+        changed = state is None or state.content_hash != content_hash
+
+        def save_menu():
+            menu_state = state
+            if menu_state is None:
+                menu_state = CatalogSyncState(endpoint=endpoint)
+                db.session.add(menu_state)
+            menu_state.etag = response.headers.get('ETag')
+            menu_state.last_modified = response.headers.get('Last-Modified')
+            menu_state.checked_at = now
+            if changed:
+                menu_state.content_hash = content_hash
+                menu_state.set_menu_values(values)
+                menu_state.changed_at = now
+
+        if save:
+            save_menu()
+        self.counts['changed' if changed else 'unchanged'] += 1
+        return {'changed': changed, 'values': values, 'save': save_menu}
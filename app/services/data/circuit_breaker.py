@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with failure-rate and slow-call-rate thresholds
+
+    Closed: calls go through and their outcomes fill a sliding window of
+    the last window_size calls. Once the window holds min_calls outcomes
+    and either the failure rate or the rate of calls slower than
+    slow_call_seconds reaches its threshold, the breaker opens.
+
+    Open: allow() returns False, so callers fall back right away, until
+    open_seconds have passed. Then it is half-open: a single probe call is
+    let through; a fast success closes the breaker (with an empty window),
+    a failure or slow call opens it again.
+
+    Every breaker registers itself by name so all_stats() can report them.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    _registry: Dict[str, 'CircuitBreaker'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, failure_rate: float = 0.5, slow_call_rate: float = 0.5,
+                 slow_call_seconds: float = 2.0, window_size: int = 20, min_calls: int = 10,
+                 open_seconds: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+
+        self._window = deque(maxlen=window_size)  # (failed, slow) per call
+        self._state = CircuitBreaker.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+        with CircuitBreaker._registry_lock:
+            CircuitBreaker._registry[name] = self
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; every allowed call must be followed by record()"""
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitBreaker.CLOSED:
+                return True
+            if state == CircuitBreaker.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def record(self, elapsed: float, failed: bool = False):
+        """Report the outcome and duration (seconds) of an allowed call"""
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['failures'] += failed
+            self._counters['slow_calls'] += slow
+
+            if self._current_state() == CircuitBreaker.HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self._state = CircuitBreaker.CLOSED
+                    self._window.clear()
+                return
+
+            self._window.append((failed, slow))
+            if self._state == CircuitBreaker.CLOSED and len(self._window) >= self.min_calls:
+                failure_rate, slow_rate = self._rates()
+                if failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate:
+                    self._open()
+
+    def cancel(self):
+        """Release an allowed call that was abandoned without an outcome (e.g. the caller's deadline ran out)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """Close the breaker and forget the window (counters are kept)"""
+        with self._lock:
+            self._state = CircuitBreaker.CLOSED
+            self._probe_in_flight = False
+            self._window.clear()
+
+    def stats(self) -> Dict:
+        """State, counters and the failure/slow-call rates of the current window"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['state'] = self._current_state()
+            stats['failure_rate'], stats['slow_call_rate'] = (round(rate, 3) for rate in self._rates())
+            stats['window_calls'] = len(self._window)
+        return stats
+
+    @staticmethod
+    def all_stats() -> Dict[str, Dict]:
+        """Stats for every breaker created in this process, keyed by name"""
+        with CircuitBreaker._registry_lock:
+            breakers = list(CircuitBreaker._registry.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+    def _current_state(self) -> str:
+        """State, moving open to half-open once open_seconds passed (caller holds the lock)"""
+        if self._state == CircuitBreaker.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = CircuitBreaker.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _open(self):
+        self._state = CircuitBreaker.OPEN
+        self._opened_at = time.monotonic()
+        self._counters['opened'] += 1
+
+    def _rates(self):
+        if not self._window:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, slow in self._window if slow)
+        return failures / len(self._window), slow / len(self._window)
@@ -0,0 +1,91 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import requests
+
+# monotonic() time by which the current request must be done, or None for no budget
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    The request's latency budget ran out before (or during) an upstream call
+
+    A requests.Timeout, so every service that already falls back on
+    timeouts (estimated prices, default fuel types, cached menus) degrades
+    the same way.
+    """
+
+
+class Deadline:
+    """
+    Request-scoped latency budget
+
+    Every request gets REQUEST_DEADLINE_MS (API_REQUEST_DEADLINE_MS under
+    /api, see create_app), and code can tighten it with
+    `with Deadline.budget(0.2):`; UpstreamClient then caps every call's timeout at the remaining budget and raises
+    DeadlineExceeded once it is spent. The deadline lives in a context
+    variable, so it follows the request into asyncio.to_thread calls;
+    thread pools need their tasks wrapped with Deadline.propagate().
+    """
+
+    @staticmethod
+    @contextmanager
+    def budget(seconds: Optional[float]):
+        """Limit the enclosed calls to `seconds` (None or 0: no limit); nested budgets only tighten"""
+        token = Deadline.start(seconds)
+        try:
+            yield
+        finally:
+            Deadline.end(token)
+
+    @staticmethod
+    def start(seconds: Optional[float]) -> Optional[contextvars.Token]:
+        """
+        Open a budget of `seconds` until end(token) is called
+
+        For hooks that cannot wrap the work in budget() (before_request /
+        teardown_request). Returns None, and changes nothing, without a limit.
+        """
+        if not seconds:
+            return None
+        deadline = time.monotonic() + seconds
+        current = _deadline.get()
+        return _deadline.set(deadline if current is None else min(current, deadline))
+
+    @staticmethod
+    def end(token: Optional[contextvars.Token]):
+        """Close a budget opened by start()"""
+        if token is not None:
+            _deadline.reset(token)
+
+    @staticmethod
+    def remaining() -> Optional[float]:
+        """Seconds left in the current budget (never negative), or None without a budget"""
+        deadline = _deadline.get()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    @staticmethod
+    def expired() -> bool:
+        """Whether a budget is active and spent"""
+        remaining = Deadline.remaining()
+        return remaining is not None and remaining <= 0
+
+    @staticmethod
+    def check(what: str = 'upstream call'):
+        """Raise DeadlineExceeded if the budget is spent"""
+        if Deadline.expired():
+            raise DeadlineExceeded(f"Request deadline exceeded before {what}")
+
+    @staticmethod
+    def propagate(func: Callable) -> Callable:
+        """Wrap func so it runs with the caller's deadline (e.g. on a ThreadPoolExecutor)"""
+        context = contextvars.copy_context()
+
+        def run(*args, **kwargs):
+            return context.copy().run(func, *args, **kwargs)
+        return run
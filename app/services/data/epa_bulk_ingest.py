@@ -0,0 +1,197 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set
+import pandas as pd
+from sqlalchemy import insert, update
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry
+
+# Columns of the EPA bulk file (vehicles.csv from fueleconomy.gov/feg/download.shtml) that are read
+BULK_COLUMNS = {
+    'id': 'Int64',
+    'year': 'Int64',
+    'make': 'string',
+    'model': 'string',
+    'fuelType': 'string',
+    'VClass': 'string',
+    'trany': 'string',
+    'cylinders': 'float64',
+    'displ': 'float64',
+    'city08': 'float64',
+    'highway08': 'float64',
+    'comb08': 'float64',
+    'combE': 'float64'
+}
+
+VEHICLE_KEYS = ['year', 'make', 'model', 'fuel_type']
+
+# Per-option measurements averaged into each Vehicle row
+ECONOMY_COLUMNS = {
+    'city08': 'mpg_city',
+    'highway08': 'mpg_highway',
+    'comb08': 'mpg_combined',
+    'combE': 'kwh_per_100mi'
+}
+
+
+class EPABulkIngest:
+    """
+    Offline catalog build from the EPA bulk vehicles file
+
+    The CSV is streamed in chunks of `chunksize` rows and parsed with
+    vectorized pandas operations. Every chunk upserts its catalog options
+    (one row per EPA id) straight away; the fuel economy figures are
+    accumulated per (year, make, model, fuel type) as running sums, so
+    memory grows with the number of distinct vehicles, not with the file.
+    The Vehicle rows are upserted in bulk at the end.
+    """
+
+    def __init__(self, classify: Callable[[str], str], makes_filter: Optional[Set[str]] = None,
+                 min_year: Optional[int] = None, chunksize: int = 20000):
+        """
+        Args:
+            classify: Maps a model name to a vehicle type
+            makes_filter: Upper-case makes to ingest (None for all)
+            min_year: Oldest model year to ingest (None for all)
+            chunksize: CSV rows parsed at a time
+        """
+        self.classify = classify
+        self.makes_filter = makes_filter
+        self.min_year = min_year
+        self.chunksize = chunksize
+
+    def run(self, path: str, on_chunk: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Ingest a downloaded vehicles.csv (plain or .zip/.gz compressed)
+
+        Args:
+            path: Path to the bulk file
+            on_chunk: Called with the number of CSV rows after each chunk
+
+        Returns:
+            Dictionary with row, option and vehicle counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        totals = {'rows': 0, 'rows_used': 0, 'options': 0, 'vehicles_added': 0, 'vehicles_updated': 0}
+        sums = None
+
+        reader = pd.read_csv(path, usecols=list(BULK_COLUMNS), dtype=BULK_COLUMNS,
+                             chunksize=self.chunksize, low_memory=True)
+        for chunk in reader:
+            totals['rows'] += len(chunk)
+            chunk = self._prepare(chunk)
+            totals['rows_used'] += len(chunk)
+
+            if len(chunk):
+                totals['options'] += self._upsert_catalog(chunk, now)
+                db.session.commit()
+                sums = EPABulkIngest._accumulate(sums, chunk)
+
+            if on_chunk:
+                on_chunk(totals['rows'])
+
+        if sums is not None:
+            counts = self._upsert_vehicles(EPABulkIngest._averages(sums), now)
+            db.session.commit()
+            totals['vehicles_added'] = counts['added']
+            totals['vehicles_updated'] = counts['updated']
+
+        totals['elapsed_seconds'] = round(time.perf_counter() - started, 1)
+        return totals
+
+    def _prepare(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Filter a raw chunk and normalize its columns (all vectorized)"""
+        chunk = chunk.dropna(subset=['id', 'year', 'make', 'model'])
+        chunk = chunk.assign(make=chunk['make'].str.strip(), model=chunk['model'].str.strip())
+
+        mask = pd.Series(True, index=chunk.index)
+        if self.min_year is not None:
+            mask &= chunk['year'] >= self.min_year
+        if self.makes_filter is not None:
+            mask &= chunk['make'].str.upper().isin(self.makes_filter)
+        chunk = chunk[mask]
+
+        # EPA writes 0 for "not applicable" (e.g. kWh/100mi of a gasoline car)
+        economy = chunk[list(ECONOMY_COLUMNS)].where(chunk[list(ECONOMY_COLUMNS)] > 0)
+
+        # Same shape as the REST options menu text, e.g. "Auto (S8), 4 cyl, 2.5 L"
+        option_text = chunk['trany'].fillna('').str.strip()
+        has_engine = chunk['cylinders'].notna() & chunk['displ'].notna()
+        engine = (', ' + chunk['cylinders'].fillna(0).astype(int).astype(str) + ' cyl, '
+                  + chunk['displ'].fillna(0).round(1).astype(str) + ' L')
+        option_text = option_text.where(~has_engine, option_text + engine).str.lstrip(', ')
+
+        return pd.DataFrame({
+            'epa_id': chunk['id'].astype(str),
+            'year': chunk['year'].astype(int),
+            'make': chunk['make'],
+            'model': chunk['model'],
+            'fuel_type': chunk['fuelType'].fillna('Gasoline').str.strip(),
+            'vehicle_class': chunk['VClass'].str.strip(),
+            'option_text': option_text.str.slice(0, 255)
+        }, index=chunk.index).join(economy.rename(columns=ECONOMY_COLUMNS))
+
+    def _upsert_catalog(self, chunk: pd.DataFrame, now: datetime) -> int:
+        """Replace the catalog options of the chunk's EPA ids with executemany inserts"""
+        epa_ids = chunk['epa_id'].tolist()
+        for start in range(0, len(epa_ids), 1000):
+            db.session.execute(
+                CatalogEntry.__table__.delete().where(CatalogEntry.epa_id.in_(epa_ids[start:start + 1000]))
+            )
+
+        rows = chunk[['year', 'make', 'model', 'epa_id', 'option_text', 'fuel_type']].astype(object)
+        rows = rows.where(rows.notna(), None).assign(updated_at=now).to_dict('records')
+        db.session.execute(insert(CatalogEntry), rows)
+        return len(rows)
+
+    @staticmethod
+    def _accumulate(sums: Optional[pd.DataFrame], chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add a chunk's per-vehicle sums and counts to the running totals"""
+        columns = list(ECONOMY_COLUMNS.values())
+        grouped = chunk.groupby(VEHICLE_KEYS, sort=False)
+        partial = grouped[columns].sum(min_count=1).join(
+            grouped[columns].count().add_suffix('_count')
+        ).join(grouped['vehicle_class'].first())
+
+        if sums is None:
+            return partial
+        combined = pd.concat([sums, partial])
+        numeric = combined.drop(columns='vehicle_class').groupby(level=VEHICLE_KEYS, sort=False).sum(min_count=1)
+        return numeric.join(combined['vehicle_class'].groupby(level=VEHICLE_KEYS, sort=False).first())
+
+    @staticmethod
+    def _averages(sums: pd.DataFrame) -> pd.DataFrame:
+        """Turn running sums into per-vehicle averages (NaN where nothing was measured)"""
+        averages = pd.DataFrame(index=sums.index)
+        for column in ECONOMY_COLUMNS.values():
+            averages[column] = (sums[column] / sums[f'{column}_count'].where(sums[f'{column}_count'] > 0)).round(1)
+        averages['vehicle_class'] = sums['vehicle_class']
+        return averages.reset_index()
+
+    def _upsert_vehicles(self, vehicles: pd.DataFrame, now: datetime) -> Dict[str, int]:
+        """Update the fuel economy of existing Vehicle rows and insert the missing ones, in bulk"""
+        existing = {
+            (row.year, row.make, row.model, row.fuel_type): row.id for row in
+            db.session.query(Vehicle.id, Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.fuel_type).filter(
+                Vehicle.year.in_(vehicles['year'].unique().tolist())
+            ).all()
+        }
+
+        records = vehicles.astype(object).where(vehicles.notna(), None).to_dict('records')
+        updates = []
+        inserts = []
+        for record in records:
+            vehicle_id = existing.get(tuple(record[key] for key in VEHICLE_KEYS))
+            if vehicle_id is not None:
+                updates.append(dict(record, id=vehicle_id))
+            else:
+                inserts.append(dict(record, type=self.classify(record['model']), created_at=now))
+
+        for start in range(0, len(updates), 5000):
+            db.session.execute(update(Vehicle), updates[start:start + 5000])
+        for start in range(0, len(inserts), 5000):
+            db.session.execute(insert(Vehicle), inserts[start:start + 5000])
+
+        return {'added': len(inserts), 'updated': len(updates)}
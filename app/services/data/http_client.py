@@ -0,0 +1,237 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from app.services.data.rate_limiter import TokenBucket
+from app.services.data.deadline import Deadline, DeadlineExceeded
+
+class UpstreamClient:
+    """
+    Shared HTTP client for every upstream API (EPA, NHTSA, MarketCheck)
+
+    Keeps one pooled requests.Session per host so TCP and TLS sessions are
+    reused between lookups, applies connect/read timeouts to every call
+    (capped at the request's remaining Deadline budget) and retries
+    idempotent requests with jittered exponential backoff.
+    """
+    CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+    READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+    # Floor for timeouts clipped to a nearly spent Deadline budget (requests rejects 0)
+    MIN_TIMEOUT = 0.01
+    MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', 2))
+    BACKOFF_BASE = float(os.environ.get('UPSTREAM_BACKOFF_BASE', 0.2))  # seconds
+    BACKOFF_MAX = 2.0  # seconds
+    POOL_MAXSIZE = int(os.environ.get('UPSTREAM_POOL_MAXSIZE', 10))
+
+    # Only these methods are safe to repeat after a failure
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    _sessions: Dict[str, requests.Session] = {}
+    _stats: Dict[str, Dict] = {}
+    _rate_limiters: Dict[str, TokenBucket] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout=None) -> requests.Response:
+        """Send a GET request (retried on connection errors and 429/5xx responses)"""
+        return UpstreamClient.request('GET', url, params=params, headers=headers, timeout=timeout)
+
+    @staticmethod
+    def post(url: str, data=None, json=None, headers: Optional[Dict] = None,
+             timeout=None) -> requests.Response:
+        """Send a POST request (never retried)"""
+        return UpstreamClient.request('POST', url, data=data, json=json, headers=headers, timeout=timeout)
+
+    @staticmethod
+    def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session for the URL's host
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: (connect, read) tuple or a single number of seconds;
+                defaults to CONNECT_TIMEOUT/READ_TIMEOUT
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            requests.Response: The final response (possibly a retried 5xx)
+
+        Raises:
+            DeadlineExceeded: When the request's latency budget runs out
+            requests.RequestException: When the last attempt fails
+        """
+        method = method.upper()
+        host = UpstreamClient._host_key(url)
+        session = UpstreamClient._get_session(host)
+        if timeout is None:
+            timeout = (UpstreamClient.CONNECT_TIMEOUT, UpstreamClient.READ_TIMEOUT)
+
+        attempts = 1 + (UpstreamClient.MAX_RETRIES if method in UpstreamClient.IDEMPOTENT_METHODS else 0)
+
+        rate_limiter = UpstreamClient._rate_limiters.get(host)
+
+        for attempt in range(attempts):
+            is_last_attempt = attempt == attempts - 1
+            if rate_limiter:
+                rate_limiter.acquire()
+            Deadline.check(f"{method} {host}")
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=UpstreamClient._within_deadline(timeout),
+                                           **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                UpstreamClient._record(host, time.perf_counter() - started, error=True, retried=not is_last_attempt)
+                if Deadline.expired():
+                    raise DeadlineExceeded(f"Request deadline exceeded during {method} {host}") from e
+                if is_last_attempt:
+                    raise
+                retry_response, error = None, e
+            else:
+                retry = response.status_code in UpstreamClient.RETRY_STATUSES and not is_last_attempt
+                UpstreamClient._record(host, time.perf_counter() - started,
+                                       error=response.status_code >= 500, retried=retry)
+                if not retry:
+                    return response
+                retry_response, error = response, None
+
+            delay = UpstreamClient._backoff(attempt)
+            remaining = Deadline.remaining()
+            if remaining is not None and remaining <= delay:
+                # No budget left for another attempt: hand back what we have
+                if retry_response is not None:
+                    return retry_response
+                raise DeadlineExceeded(f"Request deadline exceeded retrying {method} {host}") from error
+            if retry_response is not None:
+                retry_response.close()
+            time.sleep(delay)
+
+    @staticmethod
+    def set_rate_limiter(base_url: str, rate_limiter: Optional[TokenBucket]):
+        """
+        Throttle every request to a host (e.g. during catalog ingestion)
+
+        Args:
+            base_url: Any URL on the host, e.g. EPAFuelEconomyService.BASE_URL
+            rate_limiter: TokenBucket to draw from, or None to remove the limit
+        """
+        host = UpstreamClient._host_key(base_url)
+        with UpstreamClient._lock:
+            if rate_limiter is None:
+                UpstreamClient._rate_limiters.pop(host, None)
+            else:
+                UpstreamClient._rate_limiters[host] = rate_limiter
+
+    @staticmethod
+    def pool_stats() -> Dict[str, Dict]:
+        """
+        Per-host request and connection pool statistics
+
+        Returns:
+            Dictionary keyed by scheme://host with request/error/retry counts,
+            average latency and how many requests reused a pooled connection
+        """
+        with UpstreamClient._lock:
+            hosts = list(UpstreamClient._sessions.items())
+            stats = {host: dict(values) for host, values in UpstreamClient._stats.items()}
+
+        for host, session in hosts:
+            host_stats = stats.setdefault(host, UpstreamClient._empty_stats())
+            connections_opened = 0
+            pooled_requests = 0
+            try:
+                pools = session.get_adapter(f"{host}/").poolmanager.pools
+                for key in pools.keys():
+                    pool = pools[key]
+                    connections_opened += pool.num_connections
+                    pooled_requests += pool.num_requests
+            except Exception:
+                pass
+            host_stats['connections_opened'] = connections_opened
+            host_stats['connections_reused'] = max(0, pooled_requests - connections_opened)
+
+        for host_stats in stats.values():
+            requests_made = host_stats['requests']
+            host_stats['avg_latency_ms'] = round(host_stats.pop('total_time') * 1000 / requests_made, 1) if requests_made else 0.0
+
+        return stats
+
+    @staticmethod
+    def close():
+        """Close every pooled session (e.g. before forking workers)"""
+        with UpstreamClient._lock:
+            for session in UpstreamClient._sessions.values():
+                session.close()
+            UpstreamClient._sessions.clear()
+
+    @staticmethod
+    def _get_session(host: str) -> requests.Session:
+        """Get (or create) the pooled session for a host"""
+        session = UpstreamClient._sessions.get(host)
+        if session:
+            return session
+
+        with UpstreamClient._lock:
+            session = UpstreamClient._sessions.get(host)
+            if not session:
+                session = requests.Session()
+                # Retries are handled in request() so they stay limited to idempotent methods
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UpstreamClient.POOL_MAXSIZE, max_retries=0)
+                session.mount(f"{host}/", adapter)
+                UpstreamClient._sessions[host] = session
+                UpstreamClient._stats.setdefault(host, UpstreamClient._empty_stats())
+            return session
+
+    @staticmethod
+    def _record(host: str, elapsed: float, error: bool = False, retried: bool = False):
+        """Update the counters for a host"""
+        with UpstreamClient._lock:
+            host_stats = UpstreamClient._stats.setdefault(host, UpstreamClient._empty_stats())
+            host_stats['requests'] += 1
+            host_stats['total_time'] += elapsed
+            if error:
+                host_stats['errors'] += 1
+            if retried:
+                host_stats['retries'] += 1
+
+    @staticmethod
+    def _within_deadline(timeout):
+        """
+        Cap a (connect, read) or single timeout at the request's remaining latency budget
+
+        Raises:
+            DeadlineExceeded: If the budget ran out since the last check (requests
+                rejects a zero timeout with ValueError)
+        """
+        remaining = Deadline.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before the upstream call")
+        remaining = max(remaining, UpstreamClient.MIN_TIMEOUT)
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        ceiling = min(UpstreamClient.BACKOFF_MAX, UpstreamClient.BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        """scheme://host[:port] for a URL"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'requests': 0, 'errors': 0, 'retries': 0, 'total_time': 0.0}
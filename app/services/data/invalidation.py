@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+# Channels, one per kind of shared data that in-process caches copy
+CATALOG = 'catalog'
+PRICES = 'prices'
+# Not data: asks every web worker to refill its in-memory caches (see scripts/warm_caches.py)
+WARMUP = 'warmup'
+
+
+class InvalidationBus:
+    """
+    Cross-process cache invalidation through generation counters
+
+    Each channel has a generation counter kept as a file in DIRECTORY: a
+    publish appends one byte (an atomic O_APPEND write, so concurrent
+    publishers never lose an increment) and the generation is the file
+    size. Every process polls the counters of the channels it subscribed
+    to, at most every CHECK_SECONDS (the web app polls before each request),
+    and runs the channel's callbacks when a generation moved. A catalog sync
+    or price refresh in one process thus clears the caches of every worker
+    on the host within seconds.
+    """
+    DIRECTORY = os.environ.get('CACHE_INVALIDATION_DIR', os.path.join(tempfile.gettempdir(), 'tco-invalidation'))
+    CHECK_SECONDS = float(os.environ.get('CACHE_INVALIDATION_CHECK_SECONDS', 2))
+
+    _subscribers: Dict[str, List[Callable[[], None]]] = {}
+    _seen: Dict[str, int] = {}
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def subscribe(channel: str, callback: Callable[[], None]):
+        """Run callback (in this process) whenever channel is published by any process"""
+        with InvalidationBus._lock:
+            InvalidationBus._subscribers.setdefault(channel, []).append(callback)
+            InvalidationBus._seen.setdefault(channel, InvalidationBus.generation(channel))
+
+    @staticmethod
+    def publish(channel: str, local: bool = True):
+        """Bump the channel's generation and, unless local is False, run this process's callbacks right away"""
+        try:
+            os.makedirs(InvalidationBus.DIRECTORY, exist_ok=True)
+            fd = os.open(InvalidationBus._path(channel), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+            try:
+                os.write(fd, b'.')
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Error publishing cache invalidation for {channel}: {str(e)}")
+
+        with InvalidationBus._lock:
+            if channel in InvalidationBus._seen:
+                InvalidationBus._seen[channel] = InvalidationBus.generation(channel)
+        if local:
+            InvalidationBus._notify(channel)
+
+    @staticmethod
+    def poll(force: bool = False):
+        """Run the callbacks of channels published since the last poll (throttled to CHECK_SECONDS)"""
+        now = time.monotonic()
+        if not force and now - InvalidationBus._checked_at < InvalidationBus.CHECK_SECONDS:
+            return
+
+        changed = []
+        with InvalidationBus._lock:
+            if not force and now - InvalidationBus._checked_at < InvalidationBus.CHECK_SECONDS:
+                return
+            InvalidationBus._checked_at = now
+            for channel, seen in InvalidationBus._seen.items():
+                current = InvalidationBus.generation(channel)
+                if current != seen:
+                    InvalidationBus._seen[channel] = current
+                    changed.append(channel)
+
+        for channel in changed:
+            InvalidationBus._notify(channel)
+
+    @staticmethod
+    def generation(channel: str) -> int:
+        """Current generation of a channel (0 if it was never published)"""
+        try:
+            return os.stat(InvalidationBus._path(channel)).st_size
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _notify(channel: str):
+        """Run a channel's callbacks; one failing callback does not stop the others"""
+        with InvalidationBus._lock:
+            callbacks = list(InvalidationBus._subscribers.get(channel, []))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error invalidating cache for {channel}: {str(e)}")
+
+    @staticmethod
+    def _path(channel: str) -> str:
+        return os.path.join(InvalidationBus.DIRECTORY, f"{channel}.generation")
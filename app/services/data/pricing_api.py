@@ -1,196 +1,527 @@
 import requests
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 from app.database import db
 import os
-from functools import lru_cache
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from sqlalchemy import tuple_
 from app.models.price_cache import PriceCache
+from app.services.data.http_client import UpstreamClient
+from app.services.data.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.data.deadline import Deadline, DeadlineExceeded
+from app.services.data.catalog_snapshot import CatalogSnapshot
+from app.services.data.invalidation import PRICES
+from app.services.data.cache import TTLCache
+from app.services.data.shared_store import TieredCache
+
+# Model name keywords of the price factor
+LUXURY_WORDS = ('premium', 'luxury', 'sport', 'limited', 'platinum', 'elite')
+ECONOMY_WORDS = ('base', 'standard', 'economy', 'basic')
+
 
 class PricingService:
-    BASE_URL = "https://api.marketcheck.com/v2"
+    BASE_URL = os.environ.get('MARKETCHECK_BASE_URL', "https://api.marketcheck.com/v2")
     API_KEY = os.environ.get('MARKETCHECK_API_KEY', 'your_default_api_key')
     CACHE_EXPIRY_DAYS = 7  # Cache prices for 7 days
+    # Expired prices are still served this long while a background refresh fetches a new one
+    STALE_GRACE_DAYS = int(os.environ.get('PRICE_STALE_GRACE_DAYS', 7))
+    REFRESH_WORKERS = int(os.environ.get('PRICE_REFRESH_WORKERS', 2))
+    _refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix='price-refresh')
+    _refreshing = set()
+    _refresh_lock = threading.Lock()
+    
+    # Base prices by make (very simplified)
+    BASE_PRICES = {
+        'TOYOTA': 30000,
+        'HONDA': 28000,
+        'FORD': 32000,
+        'CHEVROLET': 33000,
+        'BMW': 50000,
+        'MERCEDES-BENZ': 55000,
+        'AUDI': 48000,
+        'LEXUS': 45000,
+        'TESLA': 60000,
+        'VOLKSWAGEN': 28000,
+        'SUBARU': 27000,
+        'NISSAN': 26000,
+        'KIA': 24000,
+        'HYUNDAI': 25000,
+        'MAZDA': 26000,
+        'JEEP': 35000,
+        'DODGE': 32000,
+        'RAM': 40000,
+        'GMC': 38000,
+        'CADILLAC': 50000,
+        'LINCOLN': 48000,
+        'ACURA': 40000,
+        'INFINITI': 42000,
+        'VOLVO': 45000,
+        'PORSCHE': 80000,
+        'JAGUAR': 60000,
+        'LAND ROVER': 70000,
+        'MINI': 30000,
+        'MITSUBISHI': 25000,
+        'BUICK': 32000,
+        'CHRYSLER': 30000,
+        'ALFA ROMEO': 45000,
+        'GENESIS': 45000,
+        'FIAT': 25000,
+        'MASERATI': 90000,
+        'BENTLEY': 200000,
+        'FERRARI': 250000,
+        'LAMBORGHINI': 300000,
+        'ROLLS-ROYCE': 350000,
+        'ASTON MARTIN': 200000,
+        'MCLAREN': 250000,
+        'BUGATTI': 2000000,
+        'LOTUS': 100000,
+    }
+    DEFAULT_BASE_PRICE = 35000
+    
+    _FETCH_FAILED = object()
+    
+    # Price tiers: in-process -> shared store -> price_cache table (CACHE_EXPIRY_DAYS)
+    MEMORY_CACHE_TTL = int(os.environ.get('PRICE_MEMORY_CACHE_TTL', 3600))
+    SHARED_CACHE_TTL = int(os.environ.get('PRICE_SHARED_CACHE_TTL', 24 * 3600))
+    # How long "MarketCheck has no price for this vehicle" is remembered
+    NEGATIVE_CACHE_TTL = int(os.environ.get('PRICE_NEGATIVE_CACHE_TTL', 6 * 3600))
+    _price_cache = TieredCache(
+        'prices',
+        memory=TTLCache('prices', maxsize=4096, ttl=MEMORY_CACHE_TTL, invalidate_on=PRICES),
+        shared_ttl=SHARED_CACHE_TTL,
+        negative_ttl=NEGATIVE_CACHE_TTL,
+        db_get=lambda price_key: PricingService._get_cached_price(price_key),
+        db_set=lambda price_key, price: PricingService._cache_price(price_key, price),
+        db_get_many=lambda price_keys: PricingService._get_cached_prices(price_keys),
+        db_set_many=lambda prices: PricingService._cache_prices(prices)
+    )
+    # MarketCheck is skipped (cache or estimate only) while it fails or is slow, see CircuitBreaker
+    TIMEOUT = (UpstreamClient.CONNECT_TIMEOUT, float(os.environ.get('MARKETCHECK_READ_TIMEOUT', 5)))
+    _breaker = CircuitBreaker(
+        'marketcheck',
+        failure_rate=float(os.environ.get('MARKETCHECK_BREAKER_FAILURE_RATE', 0.5)),
+        slow_call_rate=float(os.environ.get('MARKETCHECK_BREAKER_SLOW_RATE', 0.5)),
+        slow_call_seconds=float(os.environ.get('MARKETCHECK_BREAKER_SLOW_SECONDS', 2.0)),
+        window_size=int(os.environ.get('MARKETCHECK_BREAKER_WINDOW', 20)),
+        min_calls=int(os.environ.get('MARKETCHECK_BREAKER_MIN_CALLS', 10)),
+        open_seconds=float(os.environ.get('MARKETCHECK_BREAKER_OPEN_SECONDS', 30))
+    )
+    # MarketCheck calls in flight for one get_vehicle_prices() batch
+    FETCH_WORKERS = int(os.environ.get('PRICE_FETCH_WORKERS', 8))
     
     @staticmethod
-    @lru_cache(maxsize=128)
     def get_vehicle_price(make, model, year, trim=None):
         """
         Get the current market price for a vehicle
-        Uses caching to reduce API calls
+        Uses the tiered price cache to reduce API calls
         
         Returns:
             float: The vehicle price if found
-            float: Estimated price if API fails
+            float: Estimated price if API fails or has no data
         """
-        # Check if we have this in our database cache first
-        cache_key = f"{make}_{model}_{year}_{trim}"
-        cached_price = PricingService._get_cached_price(cache_key)
-        
-        if cached_price:
-            return cached_price
+        price_key = PricingService.price_key(make, model, year, trim)
+        found, price = PricingService._price_cache.lookup(price_key)
+        if found:
+            return price if price is not None else PricingService._estimate_price(make, model, year)
         
         # If not in cache, call the API
         try:
-            url = f"{PricingService.BASE_URL}/search"
-            params = {
-                'api_key': PricingService.API_KEY,
-                'make': make,
-                'model': model,
-                'year': year,
-                'trim': trim,
-                'stats': 'true',
-                'per_page': 1
-            }
-            
-            response = requests.get(url, params=params, verify=False)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'stats' in data and 'price' in data['stats']:
-                    avg_price = data['stats']['price']['mean']
-                    # Cache this result
-                    PricingService._cache_price(cache_key, avg_price)
-                    return avg_price
-            
-            # If we couldn't get a price, estimate it
-            estimated_price = PricingService._estimate_price(make, model, year)
-            return estimated_price
-            
+            price = PricingService._fetch_market_price(make, model, year, trim)
+        except (CircuitOpenError, DeadlineExceeded):
+            return PricingService._estimate_price(make, model, year)
         except Exception as e:
             print(f"Error fetching price data: {str(e)}")
-            # Fallback to estimation
+            # Fallback to estimation, without caching so the next request tries again
             return PricingService._estimate_price(make, model, year)
+        
+        # A missing price is cached too (briefly), estimates never are
+        PricingService._price_cache.store(price_key, price)
+        return price if price is not None else PricingService._estimate_price(make, model, year)
     
     @staticmethod
-    def _estimate_price(make, model, year):
-        """Estimate vehicle price based on make, model and year"""
-        current_year = datetime.now().year
-        age = current_year - int(year)
-        
-        # Base prices by make (very simplified)
-        base_prices = {
-            'TOYOTA': 30000,
-            'HONDA': 28000,
-            'FORD': 32000,
-            'CHEVROLET': 33000,
-            'BMW': 50000,
-            'MERCEDES-BENZ': 55000,
-            'AUDI': 48000,
-            'LEXUS': 45000,
-            'TESLA': 60000,
-            'VOLKSWAGEN': 28000,
-            'SUBARU': 27000,
-            'NISSAN': 26000,
-            'KIA': 24000,
-            'HYUNDAI': 25000,
-            'MAZDA': 26000,
-            'JEEP': 35000,
-            'DODGE': 32000,
-            'RAM': 40000,
-            'GMC': 38000,
-            'CADILLAC': 50000,
-            'LINCOLN': 48000,
-            'ACURA': 40000,
-            'INFINITI': 42000,
-            'VOLVO': 45000,
-            'PORSCHE': 80000,
-            'JAGUAR': 60000,
-            'LAND ROVER': 70000,
-            'MINI': 30000,
-            'MITSUBISHI': 25000,
-            'BUICK': 32000,
-            'CHRYSLER': 30000,
-            'ALFA ROMEO': 45000,
-            'GENESIS': 45000,
-            'FIAT': 25000,
-            'MASERATI': 90000,
-            'BENTLEY': 200000,
-            'FERRARI': 250000,
-            'LAMBORGHINI': 300000,
-            'ROLLS-ROYCE': 350000,
-            'ASTON MARTIN': 200000,
-            'MCLAREN': 250000,
-            'BUGATTI': 2000000,
-            'LOTUS': 100000,
-        }
+    def get_vehicle_prices(vehicles, workers=None):
+        """
+        Get the prices of several vehicles at once
         
-        # Get base price for make or use average
-        base_price = base_prices.get(make.upper(), 35000)
-        
-        # Apply age depreciation (simplified)
-        if age <= 1:
-            depreciation = 0.1  # 10% first year
-        elif age <= 3:
-            depreciation = 0.1 + (age - 1) * 0.08  # 8% per year after first
-        elif age <= 6:
-            depreciation = 0.26 + (age - 3) * 0.06  # 6% per year after third
-        elif age <= 10:
-            depreciation = 0.44 + (age - 6) * 0.04  # 4% per year after sixth
-        else:
-            depreciation = 0.6 + (age - 10) * 0.02  # 2% per year after tenth
-            
-        # Cap depreciation at 90%
-        depreciation = min(depreciation, 0.9)
+        Every cache tier is checked for all vehicles first (the database with
+        a single query); the remaining vehicles are fetched from MarketCheck
+        concurrently and stored with one database write.
+        
+        Args:
+            vehicles: Iterable of (make, model, year) or (make, model, year, trim) tuples
+            workers: MarketCheck calls in flight (default FETCH_WORKERS)
+        
+        Returns:
+            list: Prices in input order, estimated like get_vehicle_price() where
+            MarketCheck has no price or fails
+        """
+        return [price for price, _ in PricingService.get_vehicle_quotes(vehicles, workers)]
+    
+    @staticmethod
+    def get_vehicle_quotes(vehicles, workers=None):
+        """
+        get_vehicle_prices() that also tells where each price came from
         
-        # Apply model adjustments (simplified)
-        model_lower = model.lower()
-        model_factor = 1.0
+        Returns:
+            list: (price, source) tuples in input order; source is 'market'
+            for MarketCheck prices and 'estimate' for estimated ones
+        """
+        vehicles = [tuple(vehicle) + (None,) * (4 - len(vehicle)) for vehicle in vehicles]
+        keys = [PricingService.price_key(*vehicle) for vehicle in vehicles]
+        prices = PricingService._price_cache.lookup_many(keys)
         
-        # Luxury/premium models
-        if any(word in model_lower for word in ['premium', 'luxury', 'sport', 'limited', 'platinum', 'elite']):
-            model_factor = 1.2
+        missing = {}
+        for key, vehicle in zip(keys, vehicles):
+            if key not in prices:
+                missing.setdefault(key, vehicle)
         
-        # Economy models
-        if any(word in model_lower for word in ['base', 'standard', 'economy', 'basic']):
-            model_factor = 0.9
+        if missing:
+            def fetch(vehicle):
+                try:
+                    return PricingService._fetch_market_price(*vehicle)
+                except (CircuitOpenError, DeadlineExceeded):
+                    return PricingService._FETCH_FAILED
+                except Exception as e:
+                    print(f"Error fetching price data: {str(e)}")
+                    return PricingService._FETCH_FAILED
+            
+            workers = max(1, min(workers or PricingService.FETCH_WORKERS, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = dict(zip(missing, executor.map(Deadline.propagate(fetch), missing.values())))
             
-        # Calculate final price
-        estimated_price = base_price * model_factor * (1 - depreciation)
+            # Failed calls are not cached, so the next request tries again
+            PricingService._price_cache.store_many(
+                {key: price for key, price in fetched.items() if price is not PricingService._FETCH_FAILED}
+            )
+            prices.update(fetched)
         
-        return round(estimated_price, 2)
+        estimate_rows = [row for row, key in enumerate(keys)
+                         if prices[key] is None or prices[key] is PricingService._FETCH_FAILED]
+        quotes = [(prices[key], 'market') for key in keys]
+        if estimate_rows:
+            estimates = PricingService.estimate_prices(
+                *zip(*((vehicles[row][0], vehicles[row][1], int(vehicles[row][2])) for row in estimate_rows))
+            )
+            for row, price in zip(estimate_rows, estimates.tolist()):
+                quotes[row] = (price, 'estimate')
+        return quotes
     
     @staticmethod
-    def _get_cached_price(cache_key):
-        """Check if we have a cached price in our database"""
+    def price_key(make, model, year, trim=None):
+        """Normalized (make, model, year, trim) key of the price caches"""
+        return (
+            str(make).strip().lower(),
+            str(model).strip().lower(),
+            int(year),
+            (trim or '').strip().lower()
+        )
+    
+    @staticmethod
+    def _fetch_market_price(make, model, year, trim=None):
+        """
+        Ask MarketCheck for the mean listing price
+        
+        Returns:
+            float: The mean price, or None if MarketCheck has no price for the vehicle
+        
+        Raises:
+            CircuitOpenError: If MarketCheck is failing or slow and is not being called
+            DeadlineExceeded: If the request's latency budget ran out (not held against MarketCheck)
+            requests.RequestException: If the request failed or was not answered with 200
+        """
+        Deadline.check('MarketCheck price lookup')
+        if not PricingService._breaker.allow():
+            raise CircuitOpenError("MarketCheck circuit breaker is open")
+        
+        url = f"{PricingService.BASE_URL}/search"
+        params = {
+            'api_key': PricingService.API_KEY,
+            'make': make,
+            'model': model,
+            'year': year,
+            'trim': trim,
+            'stats': 'true',
+            'per_page': 1
+        }
+        
+        started = time.perf_counter()
         try:
-            # Find cache entry
-            cache_entry = PriceCache.query.filter_by(cache_key=cache_key).first()
-            
-            # If found and not expired, return the price
-            if cache_entry:
-                expiry_date = datetime.now() - timedelta(days=PricingService.CACHE_EXPIRY_DAYS)
-                if cache_entry.created_at > expiry_date:
-                    return cache_entry.price
-                else:
-                    # Delete expired cache entry
-                    db.session.delete(cache_entry)
-                    db.session.commit()
+            response = UpstreamClient.get(url, params=params, timeout=PricingService.TIMEOUT)
+            if response.status_code != 200:
+                raise requests.HTTPError(f"MarketCheck returned {response.status_code}", response=response)
             
+            data = response.json()
+        except DeadlineExceeded:
+            # Our own budget ran out, which says nothing about MarketCheck's health
+            PricingService._breaker.cancel()
+            raise
+        except BaseException:
+            PricingService._breaker.record(time.perf_counter() - started, failed=True)
+            raise
+        PricingService._breaker.record(time.perf_counter() - started)
+        
+        if 'stats' in data and 'price' in data['stats']:
+            return data['stats']['price'].get('mean')
+        return None
+    
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters of every price cache tier"""
+        return PricingService._price_cache.stats()
+    
+    @staticmethod
+    def base_price(make):
+        """Base price for a make, or the average if the make is unknown"""
+        return PricingService.BASE_PRICES.get(make.upper(), PricingService.DEFAULT_BASE_PRICE)
+    
+    @staticmethod
+    def model_price_factor(model):
+        """Apply model adjustments (simplified)"""
+        return float(PricingService.model_price_factors([model])[0])
+    
+    @staticmethod
+    def base_prices(makes):
+        """base_price() of an array of makes, via a binary search of the sorted make table"""
+        makes = np.char.upper(np.asarray(makes, dtype=str))
+        index = np.searchsorted(_MAKE_NAMES, makes).clip(0, len(_MAKE_NAMES) - 1)
+        return np.where(_MAKE_NAMES[index] == makes, _MAKE_PRICES[index], PricingService.DEFAULT_BASE_PRICE)
+    
+    @staticmethod
+    def model_price_factors(models):
+        """model_price_factor() of an array of model names (economy keywords win over luxury ones)"""
+        models = np.char.lower(np.asarray(models, dtype=str))
+        luxury = np.zeros(models.shape, dtype=bool)
+        economy = np.zeros(models.shape, dtype=bool)
+        for word in LUXURY_WORDS:
+            luxury |= np.char.find(models, word) >= 0
+        for word in ECONOMY_WORDS:
+            economy |= np.char.find(models, word) >= 0
+        return np.where(economy, 0.9, np.where(luxury, 1.2, 1.0))
+    
+    @staticmethod
+    def estimate_prices(makes, models, years, current_year=None):
+        """
+        Estimate the prices of many vehicles in one vectorized pass
+        
+        Args:
+            makes, models, years: Equal-length sequences (or arrays)
+            current_year: Year the ages are counted from (default: this year)
+        
+        Returns:
+            numpy.ndarray: Estimated prices, rounded to cents
+        """
+        models = np.asarray(models, dtype=str)
+        makes = np.asarray(makes, dtype=str)
+        # Each distinct make and model is matched once, then broadcast back to the rows
+        unique_makes, make_index = np.unique(makes, return_inverse=True)
+        unique_models, model_index = np.unique(models, return_inverse=True)
+        base_prices = PricingService.base_prices(unique_makes)[make_index]
+        model_factors = PricingService.model_price_factors(unique_models)[model_index]
+        return PricingService._apply_age(base_prices * model_factors, years, current_year)
+    
+    @staticmethod
+    def estimate_catalog_prices(current_year=None):
+        """
+        Estimate the price of every catalog snapshot row
+        
+        Uses the snapshot's per-make base prices and per-model factors, so
+        this is pure array arithmetic.
+        
+        Returns:
+            numpy.ndarray aligned with the snapshot rows, or None without a snapshot
+        """
+        snapshot = CatalogSnapshot.get()
+        if snapshot is None:
             return None
+        list_prices = snapshot.make_base_price[snapshot.make] * snapshot.model_price_factor[snapshot.model]
+        return PricingService._apply_age(list_prices, snapshot.year, current_year)
+    
+    @staticmethod
+    def _apply_age(list_prices, years, current_year=None):
+        """Depreciate list prices by model year with the AGE_DEPRECIATION table"""
+        current_year = datetime.now().year if current_year is None else current_year
+        ages = (current_year - np.asarray(years, dtype=np.int64)).clip(0, len(AGE_DEPRECIATION) - 1)
+        return np.round(list_prices * (1 - AGE_DEPRECIATION[ages]), 2)
+    
+    @staticmethod
+    def _estimate_price(make, model, year):
+        """Estimate vehicle price based on make, model and year"""
+        return float(PricingService.estimate_prices([make], [model], [int(year)])[0])
+    
+    @staticmethod
+    def _get_cached_price(price_key):
+        """Check if we have a usable price in our database (see _get_cached_prices)"""
+        return PricingService._get_cached_prices([price_key]).get(price_key)
+    
+    @staticmethod
+    def _get_cached_prices(price_keys):
+        """
+        Database prices for several keys in one query, as {price_key: price}
+        
+        Prices older than CACHE_EXPIRY_DAYS but within STALE_GRACE_DAYS are
+        still returned (stale-while-revalidate) and get a background refresh.
+        Read-only: expired rows are left to sweep_expired_prices().
+        """
+        if not price_keys:
+            return {}
+        try:
+            now = datetime.now()
+            stale_date = now - timedelta(days=PricingService.CACHE_EXPIRY_DAYS)
+            expiry_date = stale_date - timedelta(days=PricingService.STALE_GRACE_DAYS)
+            rows = db.session.query(
+                PriceCache.make, PriceCache.model, PriceCache.year, PriceCache.trim,
+                PriceCache.price, PriceCache.fetched_at
+            ).filter(
+                tuple_(PriceCache.make, PriceCache.model, PriceCache.year, PriceCache.trim).in_(list(price_keys)),
+                PriceCache.fetched_at > expiry_date
+            ).all()
         except Exception as e:
-            print(f"Error retrieving cached price: {str(e)}")
-            return None
+            print(f"Error retrieving cached prices: {str(e)}")
+            return {}
+        
+        prices = {(row.make, row.model, row.year, row.trim): row.price for row in rows}
+        stale = [(row.make, row.model, row.year, row.trim) for row in rows if row.fetched_at <= stale_date]
+        if stale:
+            PricingService._schedule_refresh(stale)
+        return prices
+    
+    @staticmethod
+    def _schedule_refresh(price_keys):
+        """Refetch stale prices on the refresh pool; a key already being refreshed is skipped"""
+        app = current_app._get_current_object() if has_app_context() else None
+        with PricingService._refresh_lock:
+            price_keys = [key for key in price_keys if key not in PricingService._refreshing]
+            PricingService._refreshing.update(price_keys)
+        for price_key in price_keys:
+            PricingService._refresh_executor.submit(PricingService._refresh_price, app, price_key)
     
     @staticmethod
-    def _cache_price(cache_key, price):
+    def _refresh_price(app, price_key):
+        """Fetch one price and store it in every tier; on failure the stale price stays in use"""
+        make, model, year, trim = price_key
+        try:
+            price = PricingService._fetch_market_price(make, model, year, trim or None)
+            if app is None:
+                PricingService._price_cache.store(price_key, price)
+            else:
+                with app.app_context():
+                    PricingService._price_cache.store(price_key, price)
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            print(f"Error refreshing price: {str(e)}")
+        finally:
+            with PricingService._refresh_lock:
+                PricingService._refreshing.discard(price_key)
+    
+    @staticmethod
+    def _cache_price(price_key, price, source='marketcheck'):
         """Store price in cache"""
+        PricingService._cache_prices({price_key: price}, source)
+    
+    @staticmethod
+    def _cache_prices(prices, source='marketcheck'):
+        """Store several {price_key: price} in cache, with one commit"""
         try:
-            # Check if entry already exists
-            existing_cache = PriceCache.query.filter_by(cache_key=cache_key).first()
+            now = datetime.now()
+            # Check which entries already exist
+            existing = {
+                (row.make, row.model, row.year, row.trim): row for row in PriceCache.query.filter(
+                    tuple_(PriceCache.make, PriceCache.model, PriceCache.year, PriceCache.trim).in_(list(prices))
+                ).all()
+            }
             
-            if existing_cache:
-                # Update existing entry
-                existing_cache.price = price
-                existing_cache.created_at = datetime.now()
-            else:
-                # Create new entry
-                cache_entry = PriceCache(
-                    cache_key=cache_key,
-                    price=price
-                )
-                db.session.add(cache_entry)
+            for price_key, price in prices.items():
+                existing_cache = existing.get(price_key)
+                if existing_cache:
+                    # Update existing entry
+                    existing_cache.price = price
+                    existing_cache.source = source
+                    existing_cache.fetched_at = now
+                else:
+                    # Create new entry
+                    make, model, year, trim = price_key
+                    db.session.add(PriceCache(
+                        make=make,
+                        model=model,
+                        year=year,
+                        trim=trim,
+                        price=price,
+                        source=source,
+                        fetched_at=now
+                    ))
             
             db.session.commit()
         except Exception as e:
             print(f"Error caching price: {str(e)}")
             db.session.rollback()
+    
+    @staticmethod
+    def sweep_expired_prices(batch_size=1000):
+        """
+        Delete price_cache rows older than CACHE_EXPIRY_DAYS + STALE_GRACE_DAYS
+        
+        Rows are deleted batch_size at a time (one short transaction each),
+        so the sweep never holds long locks on the table.
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        expiry_date = datetime.now() - timedelta(
+            days=PricingService.CACHE_EXPIRY_DAYS + PricingService.STALE_GRACE_DAYS
+        )
+        deleted = 0
+        try:
+            while True:
+                ids = [row.id for row in db.session.query(PriceCache.id).filter(
+                    PriceCache.fetched_at <= expiry_date
+                ).limit(batch_size).all()]
+                if not ids:
+                    break
+                db.session.execute(PriceCache.__table__.delete().where(PriceCache.id.in_(ids)))
+                db.session.commit()
+                deleted += len(ids)
+        except Exception as e:
+            print(f"Error sweeping expired prices: {str(e)}")
+            db.session.rollback()
+        return deleted
+    
+    @staticmethod
+    def start_expiry_sweeper(app, interval):
+        """Run sweep_expired_prices every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                with app.app_context():
+                    PricingService.sweep_expired_prices()
+        
+        thread = threading.Thread(target=run, name='price-cache-sweeper', daemon=True)
+        thread.start()
+        return thread
+
+
+def _age_depreciation(age):
+    """Share of the price lost after `age` years (simplified)"""
+    if age <= 1:
+        depreciation = 0.1  # 10% first year
+    elif age <= 3:
+        depreciation = 0.1 + (age - 1) * 0.08  # 8% per year after first
+    elif age <= 6:
+        depreciation = 0.26 + (age - 3) * 0.06  # 6% per year after third
+    elif age <= 10:
+        depreciation = 0.44 + (age - 6) * 0.04  # 4% per year after sixth
+    else:
+        depreciation = 0.6 + (age - 10) * 0.02  # 2% per year after tenth
+    # Cap depreciation at 90%
+    return min(depreciation, 0.9)
+
+
+# Lookup tables of the estimator: depreciation by age (the cap is reached at 25 years,
+# older vehicles use the last entry) and the make price table sorted for binary search
+AGE_DEPRECIATION = np.array([_age_depreciation(age) for age in range(26)])
+_MAKE_NAMES = np.array(sorted(PricingService.BASE_PRICES))
+_MAKE_PRICES = np.array([PricingService.BASE_PRICES[make] for make in _MAKE_NAMES], dtype=np.float64)
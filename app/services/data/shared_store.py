@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+
+class FileStore:
+    """
+    Key/value store shared by the processes of one host, one JSON file per key
+
+    The local stand-in for Redis: writes go to a temporary file that is
+    renamed over the entry, so readers never see a partial value.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the stored value, or default if missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if entry['expires_at'] <= time.time():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return default
+        return entry['value']
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a JSON-serializable value for ttl seconds"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'value': value, 'expires_at': time.time() + ttl}, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def delete(self, key: str):
+        """Remove an entry"""
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+
+class RedisStore:
+    """The same interface on top of Redis (used when REDIS_URL is set and redis is installed)"""
+
+    def __init__(self, url: str, prefix: str = 'tco:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return default if raw is None else json.loads(raw)['value']
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps({'value': value}), ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+class SharedStore:
+    """
+    The process-wide shared store: Redis when REDIS_URL is set (and the
+    redis package is installed), else a FileStore in SHARED_CACHE_DIR
+    """
+    REDIS_URL = os.environ.get('REDIS_URL')
+    DIRECTORY = os.environ.get('SHARED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tco-shared-cache'))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @staticmethod
+    def get():
+        """Create the store on first use"""
+        if SharedStore._shared is None:
+            with SharedStore._shared_lock:
+                if SharedStore._shared is None:
+                    SharedStore._shared = SharedStore._create()
+        return SharedStore._shared
+
+    @staticmethod
+    def _create():
+        if SharedStore.REDIS_URL:
+            try:
+                return RedisStore(SharedStore.REDIS_URL)
+            except ImportError:
+                print("REDIS_URL is set but the redis package is not installed; using the file store")
+        return FileStore(SharedStore.DIRECTORY)
+
+
+class TieredCache:
+    """
+    Read-through cache over three tiers: in-process TTLCache, shared store, database
+
+    Each tier has its own TTL. A value of None is a negative entry ("the
+    upstream has no data"): it is kept in the memory and shared tiers for
+    negative_ttl, so the upstream is not asked again for every request, but
+    never reaches the database tier. Lookups fill the faster tiers they
+    missed. Hits, negative hits and misses are counted per tier.
+    """
+
+    def __init__(self, name: str, memory, shared_ttl: float, negative_ttl: float,
+                 db_get=None, db_set=None, shared_store=None, db_get_many=None, db_set_many=None):
+        """
+        Args:
+            name: Prefix of the shared store keys
+            memory: TTLCache used as the in-process tier (its ttl is the tier's TTL)
+            shared_ttl: Seconds a value stays in the shared store
+            negative_ttl: Seconds a negative entry stays in the memory and shared tiers
+            db_get: Callable key -> value or None, the database tier (None for no database tier);
+                keys are any hashable, tuples are joined with '|' in the shared store
+            db_set: Callable (key, value) storing a value in the database tier
+            shared_store: Store with get/set (default SharedStore.get())
+            db_get_many: Callable list of keys -> {key: value} of the keys found, used by
+                lookup_many (default: db_get per key)
+            db_set_many: Callable {key: value} storing several values, used by store_many
+                (default: db_set per key)
+        """
+        self.name = name
+        self.memory = memory
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+        self.db_get = db_get
+        self.db_set = db_set
+        self.db_get_many = db_get_many
+        self.db_set_many = db_set_many
+        self._shared_store = shared_store
+        self._lock = threading.Lock()
+        self._counters = {tier: {'hits': 0, 'negative_hits': 0, 'misses': 0, 'errors': 0}
+                          for tier in ('shared', 'database')}
+
+    @property
+    def shared(self):
+        return self._shared_store if self._shared_store is not None else SharedStore.get()
+
+    def lookup(self, key: Hashable):
+        """
+        Find a key in the fastest tier that has it
+
+        Returns:
+            Tuple (found, value): value is None for a negative entry
+        """
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return True, value
+
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self.memory.set(key, value, None if value is not None else self.negative_ttl)
+            return True, value
+
+        value = self._db_get(key)
+        if value is not None:
+            self.memory.set(key, value)
+            self._shared_set(key, value)
+            return True, value
+
+        return False, None
+
+    def store(self, key: Hashable, value: Any):
+        """Store a value in every tier, or a negative entry (value None) in the memory and shared tiers"""
+        if value is None:
+            self.memory.set(key, None, self.negative_ttl)
+            self._shared_set(key, None)
+            return
+
+        if self.db_set is not None:
+            self.db_set(key, value)
+        self.memory.set(key, value)
+        self._shared_set(key, value)
+
+    def lookup_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Find several keys, with one database query for everything the faster tiers miss
+
+        Returns:
+            Dictionary of the keys found -> value (None for negative entries)
+        """
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.memory.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._shared_get(key)
+                if value is not _MISSING:
+                    self.memory.set(key, value, None if value is not None else self.negative_ttl)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if missing and self.db_get_many is not None:
+            rows = self.db_get_many(missing)
+            with self._lock:
+                self._counters['database']['hits'] += len(rows)
+                self._counters['database']['misses'] += len(missing) - len(rows)
+        else:
+            rows = {key: value for key, value in ((key, self._db_get(key)) for key in missing) if value is not None}
+
+        for key, value in rows.items():
+            self.memory.set(key, value)
+            self._shared_set(key, value)
+            found[key] = value
+        return found
+
+    def store_many(self, values: Dict[Hashable, Any]):
+        """store() for several keys, with one database write for the positive values"""
+        positive = {key: value for key, value in values.items() if value is not None}
+        if positive and self.db_set_many is not None:
+            self.db_set_many(positive)
+        elif self.db_set is not None:
+            for key, value in positive.items():
+                self.db_set(key, value)
+
+        for key, value in values.items():
+            self.memory.set(key, value, None if value is not None else self.negative_ttl)
+            self._shared_set(key, value)
+
+    def stats(self):
+        """Counters and hit ratio per tier"""
+        with self._lock:
+            tiers = {tier: dict(counters) for tier, counters in self._counters.items()}
+        tiers['memory'] = self.memory.stats()
+        for counters in tiers.values():
+            lookups = counters['hits'] + counters.get('negative_hits', 0) + counters['misses']
+            counters['hit_ratio'] = round((lookups - counters['misses']) / lookups, 3) if lookups else 0.0
+        return tiers
+
+    def _shared_get(self, key: Hashable):
+        try:
+            value = self.shared.get(self._shared_key(key), _MISSING)
+        except Exception as e:
+            print(f"Error reading shared cache: {str(e)}")
+            self._count('shared', 'errors')
+            value = _MISSING
+        if value is _MISSING:
+            self._count('shared', 'misses')
+        else:
+            self._count('shared', 'hits' if value is not None else 'negative_hits')
+        return value
+
+    def _shared_set(self, key: Hashable, value: Any):
+        try:
+            self.shared.set(self._shared_key(key), value, self.shared_ttl if value is not None else self.negative_ttl)
+        except Exception as e:
+            print(f"Error writing shared cache: {str(e)}")
+            self._count('shared', 'errors')
+
+    def _shared_key(self, key: Hashable) -> str:
+        """Shared store key: the cache name plus the key (tuple parts joined with '|')"""
+        parts = key if isinstance(key, tuple) else (key,)
+        return f"{self.name}:" + '|'.join(str(part) for part in parts)
+
+    def _db_get(self, key: Hashable):
+        if self.db_get is None:
+            return None
+        value = self.db_get(key)
+        self._count('database', 'hits' if value is not None else 'misses')
+        return value
+
+    def _count(self, tier: str, counter: str):
+        with self._lock:
+            self._counters[tier][counter] += 1
@@ -1,107 +1,90 @@
+import os
+import time
 import requests
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.services.data.catalog_store import CatalogStore
+from app.services.data.catalog_snapshot import CatalogSnapshot
+from app.services.data.http_client import UpstreamClient
+from app.services.data.deadline import Deadline
+from app.services.data.cache import TTLCache
+from app.services.data.invalidation import CATALOG
 
 class EPAFuelEconomyService:
-    """Service for interacting with the EPA FuelEconomy.gov API"""
-    BASE_URL = "https://www.fueleconomy.gov/ws/rest"
+    """
+    Service for interacting with the EPA FuelEconomy.gov API
+
+    The year/make/model/fuel-type lookups read the memory-mapped catalog
+    snapshot (see CatalogSnapshot) or else the local catalog (see
+    CatalogStore), and only call the API on a miss. The fetch_* methods
+    always go to the API and are used to build the catalog.
+    """
+    BASE_URL = os.environ.get('EPA_BASE_URL', "https://www.fueleconomy.gov/ws/rest")
+    
+    # vehicle/{id} records never change for a given id, so they are kept per process
+    DETAIL_FETCH_WORKERS = int(os.environ.get('EPA_DETAIL_FETCH_WORKERS', 5))
+    DETAIL_CACHE_SIZE = int(os.environ.get('EPA_DETAIL_CACHE_SIZE', 2048))
+    _detail_cache = TTLCache('epa_vehicle_details', maxsize=DETAIL_CACHE_SIZE, ttl=7 * 24 * 3600)
+    
+    # Menus (years, makes, models, options) only change a few times a year
+    MENU_CACHE_TTL = int(os.environ.get('EPA_MENU_CACHE_TTL', 6 * 3600))
+    MENU_CACHE_MAX_BYTES = int(os.environ.get('EPA_MENU_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    _menu_cache = TTLCache('epa_menus', maxsize=20000, ttl=MENU_CACHE_TTL, max_bytes=MENU_CACHE_MAX_BYTES,
+                           invalidate_on=CATALOG)
+    
+    # catalog_version() is checked on every dropdown request, so it is kept briefly
+    CATALOG_VERSION_TTL = int(os.environ.get('CATALOG_VERSION_TTL', 30))
+    _version_cache = TTLCache('epa_catalog_version', maxsize=1, ttl=CATALOG_VERSION_TTL, invalidate_on=CATALOG)
     
     @staticmethod
     def get_years() -> List[Tuple[int, int]]:
-        """Get all available model years"""
-        endpoint = "vehicle/menu/year"
-        response = EPAFuelEconomyService._make_request(endpoint)
-        
-        if not response:
-            current_year = 2023
-            years = [(year, year) for year in range(current_year, current_year-20, -1)]
-            return years
-        
-        years = []
-        menu_items = response.get('menuItem', [])
+        """
+        Get all available model years
         
-        if isinstance(menu_items, list):
-            for item in menu_items:
-                if isinstance(item, dict):
-                    year = item.get('value')
-                    if year and year.isdigit():
-                        year_int = int(year)
-                        years.append((year_int, year_int))
-                elif isinstance(item, str) and item.isdigit():
-                    year_int = int(item)
-                    years.append((year_int, year_int))
-        elif isinstance(menu_items, dict):
-            year = menu_items.get('value')
-            if year and year.isdigit():
-                year_int = int(year)
-                years.append((year_int, year_int))
+        The catalog usually holds only recent years (populate_database.py
+        --min-year), so its years are merged with the EPA year menu (cached
+        for MENU_CACHE_TTL); if that call fails the catalog years are used.
+        """
+        snapshot = CatalogSnapshot.get()
+        catalog_years = (snapshot.get_years() if snapshot else None) or CatalogStore.get_years()
+        if catalog_years:
+            api_years = {int(year) for year in EPAFuelEconomyService._menu_values("vehicle/menu/year")
+                         if year.isdigit()}
+            return [(year, year) for year in sorted(set(catalog_years) | api_years, reverse=True)]
         
-        years.sort(reverse=True)
-        return years
+        return EPAFuelEconomyService.fetch_years()
     
     @staticmethod
     def get_makes(year: Optional[int] = None) -> List[Tuple[str, str]]:
-        """Get all makes, optionally filtered by year"""
-        if year:
-            endpoint = f"vehicle/menu/make?year={year}"
-        else:
+        """
+        Get all makes, optionally filtered by year
+        
+        Like get_years(), the catalog's makes (often only the popular ones)
+        are merged with the EPA make menu for the year.
+        """
+        if not year:
             years = EPAFuelEconomyService.get_years()
-            if years:
-                year = years[0][0]
-                endpoint = f"vehicle/menu/make?year={year}"
-            else:
+            if not years:
                 return []
+            year = years[0][0]
         
-        response = EPAFuelEconomyService._make_request(endpoint)
-        
-        if not response:
-            return []
-        
-        makes = []
-        menu_items = response.get('menuItem', [])
+        snapshot = CatalogSnapshot.get()
+        catalog_makes = (snapshot.get_makes(year) if snapshot else None) or CatalogStore.get_makes(year)
+        if catalog_makes:
+            api_makes = EPAFuelEconomyService._menu_values(f"vehicle/menu/make?year={year}")
+            return [(make, make) for make in sorted(set(catalog_makes) | set(api_makes))]
         
-        if isinstance(menu_items, list):
-            for item in menu_items:
-                if isinstance(item, dict):
-                    make = item.get('value')
-                    if make:
-                        makes.append((make, make))
-                elif isinstance(item, str):
-                    makes.append((item, item))
-        elif isinstance(menu_items, dict):
-            make = menu_items.get('value')
-            if make:
-                makes.append((make, make))
-        
-        makes.sort()
-        return makes
+        return EPAFuelEconomyService.fetch_makes(year)
     
     @staticmethod
     def get_models(make: str, year: int) -> List[Tuple[str, str]]:
         """Get all models for a specific make and year"""
-        endpoint = f"vehicle/menu/model?year={year}&make={make}"
-        response = EPAFuelEconomyService._make_request(endpoint)
+        snapshot = CatalogSnapshot.get()
+        catalog_models = (snapshot.get_models(make, year) if snapshot else None) or CatalogStore.get_models(make, year)
+        if catalog_models:
+            return [(model, model) for model in catalog_models]
         
-        if not response:
-            return []
-        
-        models = []
-        menu_items = response.get('menuItem', [])
-        
-        if isinstance(menu_items, list):
-            for item in menu_items:
-                if isinstance(item, dict):
-                    model = item.get('value')
-                    if model:
-                        models.append((model, model))
-                elif isinstance(item, str):
-                    models.append((item, item))
-        elif isinstance(menu_items, dict):
-            model = menu_items.get('value')
-            if model:
-                models.append((model, model))
-        
-        models.sort()
-        return models
+        return EPAFuelEconomyService.fetch_models(make, year)
     
     @staticmethod
     def get_vehicle_types(make: str) -> List[Dict]:
@@ -124,65 +107,169 @@ class EPAFuelEconomyService:
     @staticmethod
     def get_fuel_types(make: str, model: str, year: int) -> List[Tuple[str, str]]:
         """Get available fuel types for a specific make/model/year"""
-        options_endpoint = f"vehicle/menu/options?year={year}&make={make}&model={model}"
-        options_response = EPAFuelEconomyService._make_request(options_endpoint)
+        snapshot = CatalogSnapshot.get()
+        catalog_fuel_types = ((snapshot.get_fuel_types(make, model, year) if snapshot else None)
+                              or CatalogStore.get_fuel_types(make, model, year))
+        if catalog_fuel_types:
+            return sorted(
+                (fuel_type, EPAFuelEconomyService.fuel_type_display_name(fuel_type))
+                for fuel_type in catalog_fuel_types
+            )
         
-        if not options_response:
-            return EPAFuelEconomyService.default_fuel_types()
+        return EPAFuelEconomyService.fetch_fuel_types(make, model, year)
+    
+    @staticmethod
+    def get_vehicle_details(vehicle_id: str) -> Optional[Dict]:
+        """Get detailed information for a specific vehicle"""
+        vehicle_id = str(vehicle_id)
+        return EPAFuelEconomyService._detail_cache.get_or_load(
+            vehicle_id,
+            lambda: EPAFuelEconomyService._make_request(f"vehicle/{vehicle_id}")
+        )
+    
+    @staticmethod
+    def get_vehicle_details_many(vehicle_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get detailed information for several vehicles at once
         
-        vehicle_ids = []
-        menu_items = options_response.get('menuItem', [])
+        Cached records are returned directly; the rest are fetched concurrently
+        with at most DETAIL_FETCH_WORKERS requests in flight.
         
-        if isinstance(menu_items, list):
-            for item in menu_items:
-                if isinstance(item, dict):
-                    vehicle_id = item.get('value')
-                    if vehicle_id:
-                        vehicle_ids.append(vehicle_id)
-                elif isinstance(item, str) and item.isdigit():
-                    vehicle_ids.append(item)
-        elif isinstance(menu_items, dict):
-            vehicle_id = menu_items.get('value')
-            if vehicle_id:
-                vehicle_ids.append(vehicle_id)
+        Returns:
+            Dictionary of vehicle id -> details (None if the fetch failed)
+        """
+        results = {}
+        missing = []
+        for vehicle_id in vehicle_ids:
+            vehicle_id = str(vehicle_id)
+            if vehicle_id in results or vehicle_id in missing:
+                continue
+            details = EPAFuelEconomyService._detail_cache.get(vehicle_id)
+            if details is not None:
+                results[vehicle_id] = details
+            else:
+                missing.append(vehicle_id)
+        
+        if len(missing) == 1:
+            results[missing[0]] = EPAFuelEconomyService.get_vehicle_details(missing[0])
+        elif missing:
+            workers = min(EPAFuelEconomyService.DETAIL_FETCH_WORKERS, len(missing))
+            fetch = Deadline.propagate(EPAFuelEconomyService.get_vehicle_details)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for vehicle_id, details in zip(missing, executor.map(fetch, missing)):
+                    results[vehicle_id] = details
+        
+        return results
+    
+    @staticmethod
+    def fetch_years() -> List[Tuple[int, int]]:
+        """Fetch all available model years from the EPA API"""
+        endpoint = "vehicle/menu/year"
+        response = EPAFuelEconomyService._make_menu_request(endpoint)
+        
+        if not response:
+            current_year = 2023
+            years = [(year, year) for year in range(current_year, current_year-20, -1)]
+            return years
+        
+        years = []
+        for year in EPAFuelEconomyService.parse_menu_values(response):
+            if year.isdigit():
+                year_int = int(year)
+                years.append((year_int, year_int))
+        
+        years.sort(reverse=True)
+        return years
+    
+    @staticmethod
+    def fetch_makes(year: int) -> List[Tuple[str, str]]:
+        """Fetch all makes for a year from the EPA API"""
+        endpoint = f"vehicle/menu/make?year={year}"
+        response = EPAFuelEconomyService._make_menu_request(endpoint)
+        
+        if not response:
+            return []
+        
+        makes = [(make, make) for make in EPAFuelEconomyService.parse_menu_values(response)]
+        makes.sort()
+        return makes
+    
+    @staticmethod
+    def fetch_models(make: str, year: int) -> List[Tuple[str, str]]:
+        """Fetch all models for a specific make and year from the EPA API"""
+        endpoint = f"vehicle/menu/model?year={year}&make={make}"
+        response = EPAFuelEconomyService._make_menu_request(endpoint)
+        
+        if not response:
+            return []
+        
+        models = [(model, model) for model in EPAFuelEconomyService.parse_menu_values(response)]
+        models.sort()
+        return models
+    
+    @staticmethod
+    def fetch_vehicle_options(make: str, model: str, year: int) -> List[Tuple[str, str]]:
+        """Fetch the EPA vehicle ids and option descriptions for a make/model/year"""
+        endpoint = f"vehicle/menu/options?year={year}&make={make}&model={model}"
+        response = EPAFuelEconomyService._make_menu_request(endpoint)
+        
+        if not response:
+            return []
+        
+        options = []
+        menu_items = response.get('menuItem', [])
+        if isinstance(menu_items, dict):
+            menu_items = [menu_items]
+        
+        for item in menu_items:
+            if isinstance(item, dict):
+                vehicle_id = item.get('value')
+                if vehicle_id:
+                    options.append((vehicle_id, item.get('text', '')))
+            elif isinstance(item, str) and item.isdigit():
+                options.append((item, ''))
+        
+        return options
+    
+    @staticmethod
+    def fetch_catalog_options(make: str, model: str, year: int) -> List[Dict]:
+        """
+        Fetch every EPA option for a make/model/year with its fuel type
+
+        Returns:
+            List of dicts with epa_id, option_text and fuel_type, ready for
+            CatalogStore.store_options
+        """
+        options = EPAFuelEconomyService.fetch_vehicle_options(make, model, year)
+        details_by_id = EPAFuelEconomyService.get_vehicle_details_many(vehicle_id for vehicle_id, _ in options)
+        
+        catalog_options = []
+        for vehicle_id, option_text in options:
+            details = details_by_id.get(str(vehicle_id))
+            catalog_options.append({
+                'epa_id': vehicle_id,
+                'option_text': option_text,
+                'fuel_type': details.get('fuelType') if details else None
+            })
+        return catalog_options
+    
+    @staticmethod
+    def fetch_fuel_types(make: str, model: str, year: int) -> List[Tuple[str, str]]:
+        """Fetch available fuel types for a specific make/model/year from the EPA API"""
+        options = EPAFuelEconomyService.fetch_vehicle_options(make, model, year)
+        vehicle_ids = [vehicle_id for vehicle_id, _ in options]
         
         if not vehicle_ids:
             return EPAFuelEconomyService.default_fuel_types()
         
         fuel_types = set()
+        details_by_id = EPAFuelEconomyService.get_vehicle_details_many(vehicle_ids[:5])
         
-        for vehicle_id in vehicle_ids[:5]:
-            vehicle_endpoint = f"vehicle/{vehicle_id}"
-            vehicle_response = EPAFuelEconomyService._make_request(vehicle_endpoint)
-            
+        for vehicle_response in details_by_id.values():
             if vehicle_response:
                 fuel_type = vehicle_response.get('fuelType')
                 if fuel_type:
-                    if fuel_type == 'Regular Gasoline' or fuel_type == 'Regular':
-                        display_name = 'Gasoline (Regular 87 octane)'
-                    elif fuel_type == 'Premium Gasoline' or fuel_type == 'Premium':
-                        display_name = 'Gasoline (Premium 91-93 octane)'
-                    elif fuel_type == 'Midgrade Gasoline' or fuel_type == 'Midgrade':
-                        display_name = 'Gasoline (Midgrade 89 octane)'
-                    elif 'Electricity' in fuel_type:
-                        if 'and' in fuel_type:
-                            if 'Premium' in fuel_type:
-                                display_name = 'Plug-in Hybrid (Premium Gas + Electric)'
-                            else:
-                                display_name = 'Plug-in Hybrid (Regular Gas + Electric)'
-                        else:
-                            display_name = 'Electric Vehicle (Battery Only)'
-                    elif 'Hybrid' in fuel_type:
-                        display_name = 'Hybrid (Gasoline + Electric, Non Plug-in)'
-                    elif 'Diesel' in fuel_type:
-                        display_name = 'Diesel Fuel'
-                    elif 'E85' in fuel_type or 'Flex' in fuel_type:
-                        display_name = 'Flex Fuel (E85 Ethanol/Gasoline)'
-                    elif 'Natural Gas' in fuel_type or 'CNG' in fuel_type:
-                        display_name = 'Compressed Natural Gas (CNG)'
-                    else:
-                        display_name = f'{fuel_type} (See vehicle manual)'
-                    
+                    display_name = EPAFuelEconomyService.fuel_type_display_name(fuel_type)
                     fuel_types.add((fuel_type, display_name))
         
         fuel_types = sorted(list(fuel_types))
@@ -193,10 +280,29 @@ class EPAFuelEconomyService:
         return fuel_types
     
     @staticmethod
-    def get_vehicle_details(vehicle_id: str) -> Optional[Dict]:
-        """Get detailed information for a specific vehicle"""
-        endpoint = f"vehicle/{vehicle_id}"
-        return EPAFuelEconomyService._make_request(endpoint)
+    def fuel_type_display_name(fuel_type: str) -> str:
+        """Map a raw EPA fuelType to the label shown in the fuel type dropdown"""
+        if fuel_type == 'Regular Gasoline' or fuel_type == 'Regular':
+            return 'Gasoline (Regular 87 octane)'
+        elif fuel_type == 'Premium Gasoline' or fuel_type == 'Premium':
+            return 'Gasoline (Premium 91-93 octane)'
+        elif fuel_type == 'Midgrade Gasoline' or fuel_type == 'Midgrade':
+            return 'Gasoline (Midgrade 89 octane)'
+        elif 'Electricity' in fuel_type:
+            if 'and' in fuel_type:
+                if 'Premium' in fuel_type:
+                    return 'Plug-in Hybrid (Premium Gas + Electric)'
+                return 'Plug-in Hybrid (Regular Gas + Electric)'
+            return 'Electric Vehicle (Battery Only)'
+        elif 'Hybrid' in fuel_type:
+            return 'Hybrid (Gasoline + Electric, Non Plug-in)'
+        elif 'Diesel' in fuel_type:
+            return 'Diesel Fuel'
+        elif 'E85' in fuel_type or 'Flex' in fuel_type:
+            return 'Flex Fuel (E85 Ethanol/Gasoline)'
+        elif 'Natural Gas' in fuel_type or 'CNG' in fuel_type:
+            return 'Compressed Natural Gas (CNG)'
+        return f'{fuel_type} (See vehicle manual)'
     
     @staticmethod
     def default_fuel_types() -> List[Tuple[str, str]]:
@@ -213,13 +319,93 @@ class EPAFuelEconomyService:
             ('E85', 'Flex Fuel (E85 Ethanol/Gasoline)')
         ]
     
+    @staticmethod
+    def is_default_fuel_types(fuel_types: List[Tuple[str, str]]) -> bool:
+        """Whether fuel_types is the default_fuel_types() fallback rather than the vehicle's own fuel types"""
+        return list(fuel_types) == EPAFuelEconomyService.default_fuel_types()
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Dict]:
+        """Hit/miss/eviction counters for the menu and vehicle detail caches"""
+        return {
+            'menus': EPAFuelEconomyService._menu_cache.stats(),
+            'vehicle_details': EPAFuelEconomyService._detail_cache.stats()
+        }
+    
+    @staticmethod
+    def clear_menu_cache():
+        """Drop every cached menu response (e.g. after a catalog sync)"""
+        EPAFuelEconomyService._menu_cache.clear()
+        EPAFuelEconomyService._version_cache.clear()
+    
+    @staticmethod
+    def catalog_version() -> str:
+        """
+        Identifier of the current menu data, for HTTP validators and cache keys
+        
+        This is the catalog snapshot's version when there is a snapshot,
+        else the local catalog's version when it has rows. Otherwise the
+        menus come from the API and are refreshed every MENU_CACHE_TTL, so the
+        current MENU_CACHE_TTL period is used.
+        """
+        snapshot = CatalogSnapshot.get()
+        if snapshot is not None:
+            return f"snapshot-{snapshot.version}"
+        
+        version = EPAFuelEconomyService._version_cache.get_or_load(
+            'catalog', CatalogStore.get_version, cache_none=True
+        )
+        if version:
+            return f"catalog-{version}"
+        return f"api-{int(time.time() // EPAFuelEconomyService.MENU_CACHE_TTL)}"
+    
+    @staticmethod
+    def _make_menu_request(endpoint: str) -> Optional[Dict]:
+        """
+        Make a vehicle/menu/* request through the menu cache
+        
+        Concurrent misses for the same menu share one upstream call; failed
+        calls are not cached.
+        """
+        return EPAFuelEconomyService._menu_cache.get_or_load(
+            endpoint,
+            lambda: EPAFuelEconomyService._make_request(endpoint)
+        )
+    
+    @staticmethod
+    def _menu_values(endpoint: str) -> List[str]:
+        """Values of a vehicle/menu/* response through the menu cache ([] if the call failed)"""
+        response = EPAFuelEconomyService._make_menu_request(endpoint)
+        return EPAFuelEconomyService.parse_menu_values(response) if response else []
+    
+    @staticmethod
+    def parse_menu_values(response: Dict) -> List[str]:
+        """Extract the values from a menu response (a list, a single dict or bare strings)"""
+        values = []
+        menu_items = response.get('menuItem', [])
+        
+        if isinstance(menu_items, list):
+            for item in menu_items:
+                if isinstance(item, dict):
+                    value = item.get('value')
+                    if value:
+                        values.append(value)
+                elif isinstance(item, str):
+                    values.append(item)
+        elif isinstance(menu_items, dict):
+            value = menu_items.get('value')
+            if value:
+                values.append(value)
+        
+        return values
+    
     @staticmethod
     def _make_request(endpoint: str) -> Optional[Dict]:
         """Make API request with error handling"""
         try:
             url = f"{EPAFuelEconomyService.BASE_URL}/{endpoint}"
             headers = {'Accept': 'application/json'}
-            response = requests.get(url, headers=headers)
+            response = UpstreamClient.get(url, headers=headers)
             
             if response.status_code == 200:
                 try:
@@ -236,7 +422,8 @@ class EPAFuelEconomyService:
 
 # Keep NHTSA service as a fallback or for specific data not available in EPA
 class NHTSAService:
-    BASE_URL = "https://vpic.nhtsa.dot.gov/api"
+    BASE_URL = os.environ.get('NHTSA_BASE_URL', "https://vpic.nhtsa.dot.gov/api")
+    BATCH_DECODE_SIZE = 50  # DecodeVINValuesBatch limit
     
     @staticmethod
     def get_makes() -> List[Dict]:
@@ -278,12 +465,39 @@ class NHTSAService:
         response = NHTSAService._make_request(endpoint)
         return response.get('Results', []) if response else []
     
+    @staticmethod
+    def decode_vins_batch(vins: Iterable[str]) -> List[Dict]:
+        """
+        Decode up to BATCH_DECODE_SIZE VINs in one DecodeVINValuesBatch call
+        
+        Returns:
+            One flat dict of decoded values per VIN (with a 'VIN' key), or an
+            empty list if the request failed
+        """
+        vins = list(vins)
+        if not vins:
+            return []
+        if len(vins) > NHTSAService.BATCH_DECODE_SIZE:
+            raise ValueError(f"At most {NHTSAService.BATCH_DECODE_SIZE} VINs per batch")
+        
+        try:
+            url = f"{NHTSAService.BASE_URL}/vehicles/DecodeVINValuesBatch/"
+            response = UpstreamClient.post(url, data={'format': 'json', 'data': ';'.join(vins)})
+            
+            if response.status_code == 200:
+                return response.json().get('Results', [])
+            return []
+        
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error batch decoding VINs: {str(e)}")
+            return []
+    
     @staticmethod
     def _make_request(endpoint: str) -> Optional[Dict]:
         """Make API request with error handling"""
         try:
             url = f"{NHTSAService.BASE_URL}/{endpoint}"
-            response = requests.get(url)
+            response = UpstreamClient.get(url)
             
             if response.status_code == 200:
                 data = response.json()
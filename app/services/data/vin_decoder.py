@@ -0,0 +1,202 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.exc import IntegrityError
+from app.database import db
+from app.models.vin_pattern import VinPattern
+from app.services.data.cache import TTLCache
+from app.services.data.deadline import Deadline
+from app.services.data.vehicle_api import NHTSAService
+
+_VIN_PATTERN = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+
+# Decoded values that describe the individual VIN (or its plant) rather than the vehicle
+_PER_VIN_FIELDS = frozenset({'VIN', 'ErrorCode', 'ErrorText', 'AdditionalErrorText', 'SuggestedVIN', 'PossibleValues'})
+
+
+class VinDecoderService:
+    """
+    Batch VIN decoding on top of a persistent VIN pattern cache
+
+    VINs that share a pattern (see VinPattern) decode to the same vehicle,
+    so a fleet of hundreds of VINs usually maps to a few dozen patterns.
+    Patterns are looked up in-process, then in the vin_patterns table with
+    one query; only the remaining ones go to NHTSA, one representative VIN
+    per pattern, BATCH_DECODE_SIZE VINs per DecodeVINValuesBatch call.
+    """
+    BATCH_WORKERS = int(os.environ.get('VIN_BATCH_WORKERS', 3))
+    _pattern_cache = TTLCache('vin_patterns', maxsize=50000, ttl=24 * 3600)
+
+    @staticmethod
+    def normalize(vin: str) -> Optional[str]:
+        """Upper-case, strip and validate a VIN (17 characters, no I, O or Q)"""
+        vin = (vin or '').strip().upper()
+        return vin if _VIN_PATTERN.match(vin) else None
+
+    @staticmethod
+    def pattern_for(vin: str) -> Optional[str]:
+        """
+        Get the pattern of a VIN: WMI + VDS (positions 1-8) and the model year (position 10)
+
+        WMIs ending in 9 belong to small manufacturers whose code continues
+        in positions 12-14, so those are added too. Returns None for an
+        invalid VIN.
+        """
+        vin = VinDecoderService.normalize(vin)
+        if vin is None:
+            return None
+        pattern = vin[:8] + vin[9]
+        if vin[2] == '9':
+            pattern += vin[11:14]
+        return pattern
+
+    @staticmethod
+    def decode_many(vins: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Decode a batch of VINs
+
+        Args:
+            vins: VINs as entered (case and surrounding whitespace are ignored)
+
+        Returns:
+            Dictionary of normalized VIN -> decoded vehicle (vin, pattern,
+            make, model, model_year, trim, body_class, fuel_type, values and
+            source: 'memory', 'database' or 'nhtsa'), or None for invalid
+            VINs and VINs NHTSA could not decode. Invalid VINs are keyed by
+            the stripped input.
+        """
+        results: Dict[str, Optional[Dict]] = {}
+        vins_by_pattern: Dict[str, List[str]] = {}
+        for raw_vin in vins:
+            vin = VinDecoderService.normalize(raw_vin)
+            if vin is None:
+                results[(raw_vin or '').strip()] = None
+                continue
+            vins_by_pattern.setdefault(VinDecoderService.pattern_for(vin), []).append(vin)
+
+        decoded: Dict[str, Dict] = {}
+        missing = []
+        for pattern in vins_by_pattern:
+            cached = VinDecoderService._pattern_cache.get(pattern)
+            if cached is not None:
+                decoded[pattern] = dict(cached, source='memory')
+            else:
+                missing.append(pattern)
+
+        if missing:
+            for pattern, vehicle in VinDecoderService._load_patterns(missing).items():
+                VinDecoderService._pattern_cache.set(pattern, vehicle)
+                decoded[pattern] = dict(vehicle, source='database')
+            missing = [pattern for pattern in missing if pattern not in decoded]
+
+        if missing:
+            fetched = VinDecoderService._fetch_patterns({pattern: vins_by_pattern[pattern][0] for pattern in missing})
+            VinDecoderService._store_patterns(fetched)
+            for pattern, vehicle in fetched.items():
+                VinDecoderService._pattern_cache.set(pattern, vehicle)
+                decoded[pattern] = dict(vehicle, source='nhtsa')
+
+        for pattern, pattern_vins in vins_by_pattern.items():
+            vehicle = decoded.get(pattern)
+            for vin in pattern_vins:
+                results[vin] = dict(vehicle, vin=vin) if vehicle else None
+
+        return results
+
+    @staticmethod
+    def _load_patterns(patterns: List[str]) -> Dict[str, Dict]:
+        """Read known patterns from the database (one IN query per 500 patterns)"""
+        found = {}
+        try:
+            for start in range(0, len(patterns), 500):
+                rows = VinPattern.query.filter(VinPattern.pattern.in_(patterns[start:start + 500])).all()
+                for row in rows:
+                    found[row.pattern] = VinDecoderService._to_vehicle(row.pattern, row.get_values())
+        except Exception as e:
+            print(f"Error reading VIN patterns: {str(e)}")
+        return found
+
+    @staticmethod
+    def _fetch_patterns(representatives: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        Decode one VIN per unknown pattern with batched NHTSA calls
+
+        Args:
+            representatives: Dictionary of pattern -> a VIN with that pattern
+
+        Returns:
+            Dictionary of pattern -> decoded vehicle for the VINs NHTSA decoded
+        """
+        patterns_by_vin = {vin: pattern for pattern, vin in representatives.items()}
+        vins = list(patterns_by_vin)
+        size = NHTSAService.BATCH_DECODE_SIZE
+        batches = [vins[start:start + size] for start in range(0, len(vins), size)]
+
+        workers = max(1, min(VinDecoderService.BATCH_WORKERS, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch_results = list(executor.map(Deadline.propagate(NHTSAService.decode_vins_batch), batches))
+
+        fetched = {}
+        for rows in batch_results:
+            for row in rows:
+                pattern = patterns_by_vin.get((row.get('VIN') or '').strip().upper())
+                # Without a make and model the decode failed; leave it for the next request
+                if pattern and row.get('Make') and row.get('Model'):
+                    values = {key: value for key, value in row.items()
+                              if value not in (None, '') and key not in _PER_VIN_FIELDS
+                              and not key.startswith('Plant')}
+                    fetched[pattern] = VinDecoderService._to_vehicle(pattern, values)
+        return fetched
+
+    @staticmethod
+    def _store_patterns(fetched: Dict[str, Dict]):
+        """Save newly decoded patterns; patterns saved concurrently by another request are skipped"""
+        if not fetched:
+            return
+
+        def build(vehicle):
+            row = VinPattern(
+                pattern=vehicle['pattern'],
+                make=vehicle['make'],
+                model=vehicle['model'],
+                model_year=vehicle['model_year'],
+                trim=vehicle['trim'],
+                body_class=vehicle['body_class'],
+                fuel_type=vehicle['fuel_type']
+            )
+            row.set_values(vehicle['values'])
+            return row
+
+        try:
+            db.session.add_all([build(vehicle) for vehicle in fetched.values()])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            existing = set(VinDecoderService._load_patterns(list(fetched)))
+            for pattern, vehicle in fetched.items():
+                if pattern in existing:
+                    continue
+                try:
+                    db.session.add(build(vehicle))
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error saving VIN patterns: {str(e)}")
+
+    @staticmethod
+    def _to_vehicle(pattern: str, values: Dict[str, str]) -> Dict:
+        """Shape decoded NHTSA values into the result returned by decode_many"""
+        model_year = values.get('ModelYear')
+        return {
+            'pattern': pattern,
+            'make': values.get('Make'),
+            'model': values.get('Model'),
+            'model_year': int(model_year) if model_year and str(model_year).isdigit() else None,
+            'trim': values.get('Trim'),
+            'body_class': values.get('BodyClass'),
+            'fuel_type': values.get('FuelTypePrimary'),
+            'values': values
+        }
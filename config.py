@@ -9,3 +9,26 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     print(f"Attempting to connect to: {os.environ.get('DATABASE_URL')}")
+
+    # Cache warm-up (see scripts/warm_caches.py)
+    WARM_CACHES_ON_BOOT = os.environ.get('WARM_CACHES_ON_BOOT', 'false').lower() == 'true'
+    WARMUP_VEHICLE_LIMIT = int(os.environ.get('WARMUP_VEHICLE_LIMIT', 50))
+    WARMUP_CONCURRENCY = int(os.environ.get('WARMUP_CONCURRENCY', 4))
+    # Extra vehicles to warm, e.g. "2024|Toyota|RAV4;2024|Honda|Civic"
+    WARMUP_VEHICLES = os.environ.get('WARMUP_VEHICLES', '')
+
+    # Latency budget of a request's upstream calls (MarketCheck, EPA, NHTSA); past it they fall
+    # back to estimates, defaults or cached data. 0 disables it
+    REQUEST_DEADLINE_MS = int(os.environ.get('REQUEST_DEADLINE_MS', 800))
+    # Budget of the /api batch endpoints instead (a POST /api/decode-vins call to NHTSA decodes 50 VINs)
+    API_REQUEST_DEADLINE_MS = int(os.environ.get('API_REQUEST_DEADLINE_MS', 30000))
+
+    # Expired price_cache rows are deleted by scripts/sweep_price_cache.py (e.g. from cron). Setting this
+    # runs the sweep from inside the app instead, on one process only: every create_app() starts a sweeper
+    PRICE_CACHE_SWEEP_SECONDS = int(os.environ.get('PRICE_CACHE_SWEEP_SECONDS', 0))
+
+    # Materialized vehicle prices (see scripts/refresh_vehicle_prices.py); the in-app refresh is off by default
+    PRICE_REFRESH_INTERVAL_SECONDS = int(os.environ.get('PRICE_REFRESH_INTERVAL_SECONDS', 0))
+    PRICE_REFRESH_MAX_AGE_DAYS = int(os.environ.get('PRICE_REFRESH_MAX_AGE_DAYS', 1))
+    PRICE_REFRESH_LIMIT = int(os.environ.get('PRICE_REFRESH_LIMIT', 1000))
+    PRICE_REFRESH_CONCURRENCY = int(os.environ.get('PRICE_REFRESH_CONCURRENCY', 4))
@@ -0,0 +1,427 @@
+import os
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'tests', 'fixtures', 'upstream')
+
+# Query parameters that never take part in fixture lookups and are never written to disk
+SECRET_PARAMS = frozenset({'api_key'})
+
+class FakeUpstream:
+    """
+    Local stand-in for the EPA, NHTSA and MarketCheck APIs
+
+    Each API is served under its own path prefix (/epa, /nhtsa,
+    /marketcheck), so pointing EPA_BASE_URL, NHTSA_BASE_URL and
+    MARKETCHECK_BASE_URL at base_urls() sends every upstream call here.
+
+    Modes:
+        replay: Serve the recorded fixture for the request, or a
+            deterministic synthetic response when there is none
+        strict: Like replay, but requests without a fixture get a 404
+        record: Forward the request to the real API and save the response
+            as a fixture (secrets such as api_key are not stored)
+
+    Latency, injected error rate and a minimum payload size are
+    configurable, and per-API counters are served at /_fake/stats.
+    """
+    UPSTREAMS = {
+        'epa': 'https://www.fueleconomy.gov/ws/rest',
+        'nhtsa': 'https://vpic.nhtsa.dot.gov/api',
+        'marketcheck': 'https://api.marketcheck.com/v2'
+    }
+    MODES = ('replay', 'strict', 'record')
+
+    def __init__(self, fixtures_dir: str = DEFAULT_FIXTURES_DIR, mode: str = 'replay', latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503, payload_bytes: int = 0,
+                 host: str = '127.0.0.1', port: int = 0, seed: Optional[int] = None):
+        """
+        Args:
+            fixtures_dir: Directory with one sub-directory of fixtures per API
+            mode: 'replay', 'strict' or 'record'
+            latency: Seconds added to every response
+            jitter: Up to this many extra seconds, chosen at random per response
+            error_rate: Fraction of requests (0-1) answered with error_status
+            error_status: HTTP status used for injected errors
+            payload_bytes: Pad JSON responses to at least this many bytes
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            seed: Seed for the latency/error randomness, for repeatable runs
+        """
+        if mode not in FakeUpstream.MODES:
+            raise ValueError(f"mode must be one of {', '.join(FakeUpstream.MODES)}")
+
+        self.fixtures_dir = fixtures_dir
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_bytes = payload_bytes
+        self.host = host
+        self.port = port
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.reset_stats()
+
+    def start(self) -> str:
+        """Start serving on a background thread and return the server's root URL"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                fake._handle(self)
+
+            def do_POST(self):
+                fake._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-upstream', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def base_urls(self) -> Dict[str, str]:
+        """Environment variables that point the services at this server"""
+        return {
+            'EPA_BASE_URL': f"{self.url}/epa",
+            'NHTSA_BASE_URL': f"{self.url}/nhtsa",
+            'MARKETCHECK_BASE_URL': f"{self.url}/marketcheck"
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {api: {'requests': 0, 'fixtures': 0, 'synthetic': 0, 'recorded': 0,
+                                'errors_injected': 0, 'not_found': 0}
+                          for api in FakeUpstream.UPSTREAMS}
+
+    def fixture_path(self, api: str, path: str, query: str) -> str:
+        """File that holds the recorded response for a request"""
+        params = sorted((key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                        if key not in SECRET_PARAMS)
+        digest = hashlib.sha1(urlencode(params).encode()).hexdigest()[:10]
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')[:80] or 'root'
+        return os.path.join(self.fixtures_dir, api, f"{slug}-{digest}.json")
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        """Serve one request: stats, injected error, fixture, recording or synthetic response"""
+        parts = urlsplit(handler.path)
+        segments = parts.path.lstrip('/').split('/', 1)
+        api = segments[0]
+        path = segments[1].rstrip('/') if len(segments) > 1 else ''
+
+        # Form fields of a POST (e.g. DecodeVINValuesBatch) count as request parameters
+        form = ''
+        if handler.command == 'POST':
+            length = int(handler.headers.get('Content-Length') or 0)
+            form = handler.rfile.read(length).decode('utf-8', errors='replace') if length else ''
+        query = '&'.join(part for part in (parts.query, form) if part)
+
+        if api == '_fake' and path == 'stats':
+            with self._lock:
+                body = json.dumps(self.stats).encode()
+            return self._send(handler, 200, body, {'Content-Type': 'application/json'})
+
+        if api not in FakeUpstream.UPSTREAMS:
+            return self._send(handler, 404, b'{"error": "unknown upstream"}', {'Content-Type': 'application/json'})
+
+        with self._lock:
+            counters = self.stats[api]
+            counters['requests'] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            inject_error = self.error_rate > 0 and self._random.random() < self.error_rate
+            if inject_error:
+                counters['errors_injected'] += 1
+
+        if delay:
+            time.sleep(delay)
+        if inject_error:
+            return self._send(handler, self.error_status, b'{"error": "injected"}', {'Content-Type': 'application/json'})
+
+        fixture_file = self.fixture_path(api, path, query)
+        if self.mode == 'record':
+            status, headers, body = self._record(api, path, parts.query, form, fixture_file)
+            counter = 'recorded'
+        elif os.path.exists(fixture_file):
+            status, headers, body = FakeUpstream._load_fixture(fixture_file)
+            counter = 'fixtures'
+        elif self.mode == 'strict':
+            status, headers, body = 404, {'Content-Type': 'application/json'}, b'{"error": "no fixture"}'
+            counter = 'not_found'
+        else:
+            payload = SyntheticResponses.build(api, path, dict(parse_qsl(query)))
+            status, headers, body = 200, {'Content-Type': 'application/json'}, json.dumps(payload).encode()
+            counter = 'synthetic'
+
+        with self._lock:
+            counters[counter] += 1
+
+        if status == 200 and self.payload_bytes:
+            body = FakeUpstream._pad(body, self.payload_bytes)
+
+        # Conditional requests (see CatalogSyncService) are answered like the real API would
+        etag = headers.get('ETag') or f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        headers['ETag'] = etag
+        if status == 200 and handler.headers.get('If-None-Match') == etag:
+            return self._send(handler, 304, b'', {'ETag': etag})
+
+        self._send(handler, status, body, headers)
+
+    def _record(self, api: str, path: str, query: str, form: str, fixture_file: str) -> Tuple[int, Dict, bytes]:
+        """Forward a request to the real API and save the response (without secrets)"""
+        url = f"{FakeUpstream.UPSTREAMS[api]}/{path}"
+        if query:
+            url = f"{url}?{query}"
+
+        request = urllib.request.Request(url, data=form.encode() if form else None,
+                                         headers={'Accept': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, body = response.status, response.read()
+                content_type = response.headers.get('Content-Type', 'application/json')
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+            content_type = e.headers.get('Content-Type', 'application/json')
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Error recording {api}/{path}: {e}")
+            return 502, {'Content-Type': 'application/json'}, b'{"error": "record failed"}'
+
+        headers = {'Content-Type': content_type}
+        if status == 200:
+            os.makedirs(os.path.dirname(fixture_file), exist_ok=True)
+            with open(fixture_file, 'w') as f:
+                json.dump({
+                    'request': {'path': path, 'params': {key: value for key, value in parse_qsl(query)
+                                                        if key not in SECRET_PARAMS},
+                                'form': dict(parse_qsl(form))},
+                    'status': status,
+                    'headers': headers,
+                    'body': body.decode('utf-8', errors='replace')
+                }, f, indent=2)
+        return status, headers, body
+
+    @staticmethod
+    def _load_fixture(fixture_file: str) -> Tuple[int, Dict, bytes]:
+        with open(fixture_file) as f:
+            fixture = json.load(f)
+        body = fixture['body']
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return fixture.get('status', 200), dict(fixture.get('headers') or {'Content-Type': 'application/json'}), body.encode()
+
+    @staticmethod
+    def _pad(body: bytes, size: int) -> bytes:
+        """Grow a JSON object body to `size` bytes with a field no service reads"""
+        missing = size - len(body)
+        if missing <= 0:
+            return body
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return body
+        if not isinstance(payload, dict):
+            return body
+        payload['_padding'] = 'x' * max(0, missing - len('"_padding": "", '))
+        return json.dumps(payload).encode()
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, headers: Dict[str, str]):
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if body:
+            handler.wfile.write(body)
+
+
+class SyntheticResponses:
+    """
+    Deterministic responses shaped like the real APIs, for requests with no fixture
+
+    The same request always gets the same response, so runs are repeatable
+    without any recordings.
+    """
+    MAKES = ['Acura', 'BMW', 'Chevrolet', 'Ford', 'Honda', 'Hyundai', 'Kia', 'Mazda',
+             'Nissan', 'Subaru', 'Tesla', 'Toyota', 'Volkswagen']
+    FUEL_TYPES = ['Regular Gasoline', 'Regular Gasoline', 'Premium Gasoline', 'Electricity',
+                  'Regular Gasoline and Electricity', 'Diesel']
+    OPTION_TEXTS = ['Auto (S8), 4 cyl, 2.5 L', 'Auto (AV-S7), 4 cyl, 2.0 L', 'Manual 6-spd, 4 cyl, 2.0 L',
+                    'Auto (S10), 6 cyl, 3.5 L', 'Auto (A1)']
+
+    @staticmethod
+    def build(api: str, path: str, params: Dict[str, str]) -> Dict:
+        rng = random.Random(hashlib.sha1(f"{api}/{path}?{sorted(params.items())}".encode()).hexdigest())
+        if api == 'epa':
+            return SyntheticResponses._epa(path, params, rng)
+        if api == 'nhtsa':
+            return SyntheticResponses._nhtsa(path, params, rng)
+        return SyntheticResponses._marketcheck(path, params, rng)
+
+    @staticmethod
+    def _menu(values) -> Dict:
+        return {'menuItem': [{'text': str(value), 'value': str(value)} for value in values]}
+
+    @staticmethod
+    def _epa(path: str, params: Dict[str, str], rng: random.Random) -> Dict:
+        if path == 'vehicle/menu/year':
+            return SyntheticResponses._menu(range(2026, 1983, -1))
+        if path == 'vehicle/menu/make':
+            return SyntheticResponses._menu(SyntheticResponses.MAKES)
+        if path == 'vehicle/menu/model':
+            make = params.get('make', 'Model')
+            return SyntheticResponses._menu(f"{make} {name}" for name in
+                                            sorted(rng.sample(['A', 'B', 'C', 'E', 'S', 'X', 'Z', 'GT', 'LX', 'EV'],
+                                                              rng.randint(3, 8))))
+        if path == 'vehicle/menu/options':
+            # EPA ids are unique across the whole catalog, so derive them from the full option
+            texts = rng.sample(SyntheticResponses.OPTION_TEXTS, rng.randint(1, 4))
+            return {'menuItem': [{'text': text, 'value': str(SyntheticResponses._option_id(params, text))}
+                                 for text in texts]}
+        if path.startswith('vehicle/') and path.split('/', 1)[1].isdigit():
+            vehicle_id = int(path.split('/', 1)[1])
+            fuel_type = SyntheticResponses.FUEL_TYPES[vehicle_id % len(SyntheticResponses.FUEL_TYPES)]
+            mpg = 110 if fuel_type == 'Electricity' else rng.randint(20, 45)
+            return {'id': str(vehicle_id), 'fuelType': fuel_type, 'fuelType1': fuel_type,
+                    'city08': str(mpg), 'highway08': str(mpg - 4), 'comb08': str(mpg - 2)}
+        return {}
+
+    @staticmethod
+    def _option_id(params: Dict[str, str], text: str) -> int:
+        key = f"{params.get('year')}|{params.get('make')}|{params.get('model')}|{text}"
+        return 10000000 + int(hashlib.sha1(key.encode()).hexdigest(), 16) % 90000000
+
+    @staticmethod
+    def _nhtsa(path: str, params: Dict[str, str], rng: random.Random) -> Dict:
+        if path == 'vehicles/GetAllMakes':
+            results = [{'Make_ID': 440 + index, 'Make_Name': make.upper()}
+                       for index, make in enumerate(SyntheticResponses.MAKES)]
+        elif path.startswith('vehicles/GetVehicleTypesForMake/'):
+            results = [{'VehicleTypeId': 2, 'VehicleTypeName': 'Passenger Car'},
+                       {'VehicleTypeId': 7, 'VehicleTypeName': 'Multipurpose Passenger Vehicle (MPV)'}]
+        elif path.startswith('vehicles/GetModelsForMakeYear/'):
+            make = path.split('/')[3] if len(path.split('/')) > 3 else 'Make'
+            results = [{'Make_Name': make, 'Model_ID': 1000 + index, 'Model_Name': f"{make} {name}"}
+                       for index, name in enumerate(['A', 'B', 'C', 'S', 'X'][:rng.randint(2, 5)])]
+        elif path == 'vehicles/GetVehicleVariableList':
+            results = [{'ID': 26, 'Name': 'Make'}, {'ID': 28, 'Name': 'Model'}, {'ID': 29, 'Name': 'Model Year'},
+                       {'ID': 5, 'Name': 'Body Class'}, {'ID': 24, 'Name': 'Fuel Type - Primary'}]
+        elif path.startswith('vehicles/DecodeVin/'):
+            values = SyntheticResponses._decoded_vin(path.rsplit('/', 1)[1])
+            results = [{'Variable': variable, 'VariableId': variable_id, 'Value': values[key]}
+                       for key, variable, variable_id in (('Make', 'Make', 26), ('Model', 'Model', 28),
+                                                          ('ModelYear', 'Model Year', 29),
+                                                          ('BodyClass', 'Body Class', 5),
+                                                          ('FuelTypePrimary', 'Fuel Type - Primary', 24))]
+        elif path == 'vehicles/DecodeVINValuesBatch':
+            results = [SyntheticResponses._decoded_vin(vin.split(',')[0])
+                       for vin in params.get('data', '').split(';') if vin.strip()]
+        else:
+            results = []
+        return {'Count': len(results), 'Message': 'Results returned successfully', 'Results': results}
+
+    @staticmethod
+    def _decoded_vin(vin: str) -> Dict[str, str]:
+        """
+        Flat decoded values (DecodeVINValuesBatch style) for a VIN
+
+        Like the real decoder, the result depends only on the VIN's
+        manufacturer, descriptor and model year characters.
+        """
+        vin = vin.strip().upper()
+        rng = random.Random(vin[:8] + vin[9:10])
+        make = SyntheticResponses.MAKES[int(hashlib.sha1(vin[:3].encode()).hexdigest(), 16)
+                                        % len(SyntheticResponses.MAKES)]
+        return {
+            'VIN': vin,
+            'ErrorCode': '0',
+            'Make': make.upper(),
+            'Model': f"{make} {vin[3:5]}",
+            'ModelYear': str(2000 + rng.randint(10, 26)),
+            'Trim': rng.choice(['', 'Base', 'Sport', 'Limited']),
+            'BodyClass': rng.choice(['Sedan/Saloon', 'Sport Utility Vehicle (SUV)/Multi-Purpose Vehicle (MPV)', 'Pickup']),
+            'FuelTypePrimary': rng.choice(['Gasoline', 'Electric', 'Diesel'])
+        }
+
+    @staticmethod
+    def _marketcheck(path: str, params: Dict[str, str], rng: random.Random) -> Dict:
+        if path != 'search':
+            return {}
+        mean = rng.randint(18000, 65000)
+        return {'num_found': rng.randint(5, 500), 'listings': [],
+                'stats': {'price': {'mean': mean, 'min': int(mean * 0.8), 'max': int(mean * 1.25)}}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded or synthetic EPA, NHTSA and MarketCheck responses')
+    parser.add_argument('--mode', choices=FakeUpstream.MODES, default='replay')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help='Fixture directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--payload-bytes', type=int, default=0, help='Pad JSON responses to at least this size')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeUpstream(fixtures_dir=args.fixtures, mode=args.mode, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, error_status=args.error_status,
+                        payload_bytes=args.payload_bytes, host=args.host, port=args.port, seed=args.seed)
+    fake.start()
+
+    print(f"Fake upstream ({args.mode}) listening on {fake.url}")
+    print("Point the app at it with:")
+    for name, value in fake.base_urls().items():
+        print(f"  export {name}={value}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import sys
+import os
+import argparse
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data.invalidation import CATALOG, PRICES, InvalidationBus
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Make every web worker drop its cached copy of data changed outside the app"
+    )
+    parser.add_argument('channels', nargs='+', choices=[CATALOG, PRICES],
+                        help="Data that changed, e.g. \"prices\" after editing the price_cache table")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    for channel in args.channels:
+        InvalidationBus.publish(channel)
+        print(f"{channel}: generation {InvalidationBus.generation(channel)}")
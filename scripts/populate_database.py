@@ -1,17 +1,20 @@
 import sys
 import os
+import argparse
 from typing import List, Dict, Tuple
-from datetime import datetime
-import time
 from tqdm import tqdm  # For progress bars
 
 # Add the project root directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
-from app.models import Vehicle
 from app.services.data.vehicle_api import EPAFuelEconomyService
-from app.database import db
+from app.services.data.catalog_ingest import CatalogIngestPipeline
+from app.services.data.catalog_sync import CatalogSyncService
+from app.services.data.catalog_snapshot import CatalogSnapshot
+from app.services.data.invalidation import CATALOG, InvalidationBus
+from app.services.business_logic.vehicle_type_classifier import VehicleTypeClassifier
+from app.database import db, upgrade_schema
 
 # Popular makes set - we'll keep this to filter the makes
 POPULAR_MAKES = {
@@ -49,19 +52,38 @@ POPULAR_MAKES = {
     'KOENIGSEGG', 'PININFARINA', 'ZENVO', 'LUCID', 'RIVIAN'
 }
 
-def setup_database():
-    """Ensure the database schema is up to date"""
+def setup_database(reset: bool = False):
+    """
+    Ensure the database schema is up to date
+    
+    Args:
+        reset: Drop every table first (this also deletes saved comparisons)
+    """
     app = create_app()
     with app.app_context():
         print("Setting up database schema...")
-        # Drop existing tables if they exist
-        db.drop_all()
-        # Create all tables based on current models
-        db.create_all()
+        if reset:
+            # Drop existing tables if they exist
+            print("Dropping all tables...")
+            db.drop_all()
+        # Create missing tables and add the columns newer versions introduced
+        for change in upgrade_schema():
+            print(f"Upgraded schema: {change}")
         print("Database schema created successfully.")
 
-def populate_vehicles():
-    """Populate the database with vehicles from the EPA FuelEconomy.gov API"""
+def populate_vehicles(min_year: int = 2025, workers: int = 4, rate: float = 8.0):
+    """
+    Populate the database with vehicles from the EPA FuelEconomy.gov API
+    
+    (year, make) batches are fetched in parallel under a shared rate limit
+    and checkpointed as they are written, so an interrupted run can simply
+    be started again.
+    
+    Args:
+        min_year: Oldest model year to ingest
+        workers: Number of (year, make) batches fetched in parallel
+        rate: Upstream requests per second
+    """
     # Create Flask app context
     app = create_app()
     
@@ -70,112 +92,176 @@ def populate_vehicles():
         
         # Get all years
         print("Fetching available years...")
-        years = [year[0] for year in EPAFuelEconomyService.get_years()]
-        years = [year for year in years if year >= 2025]  # Filter to years 2000 and newer
+        years = [year[0] for year in EPAFuelEconomyService.fetch_years()]
+        years = [year for year in years if year >= min_year]
         print(f"Found {len(years)} years to process")
         
-        total_vehicles = 0
+        pipeline = CatalogIngestPipeline(
+            classify=determine_vehicle_type,
+            makes_filter=POPULAR_MAKES,
+            workers=workers,
+            rate=rate
+        )
         
-        # Process each year
-        for year in tqdm(years, desc="Processing years"):
-            # Get makes for this year
-            makes_data = EPAFuelEconomyService.get_makes(year)
-            makes = [make[0] for make in makes_data]
-            
-            # Filter to popular makes
-            makes = [make for make in makes if make.upper() in POPULAR_MAKES]
-            
-            # Process each make
-            for make in tqdm(makes, desc=f"Processing makes for {year}", leave=False):
-                # Get models for this make and year
-                models_data = EPAFuelEconomyService.get_models(make, year)
-                models = [model[0] for model in models_data]
-                
-                # Process each model
-                for model in models:
-                    try:
-                        # Get fuel types for this model
-                        fuel_types = EPAFuelEconomyService.get_fuel_types(make, model, year)
-                        fuel_types = [ft[0] for ft in fuel_types]
-                        
-                        # If no fuel types found, use a default
-                        if not fuel_types:
-                            fuel_types = ['Gasoline']
-                        
-                        # Get vehicle types (EPA doesn't provide this, so we'll use a simplified approach)
-                        # We'll determine type based on the model name or use a default
-                        vehicle_type = determine_vehicle_type(model)
-                        
-                        # Add a vehicle entry for each fuel type
-                        for fuel_type in fuel_types:
-                            # Create new vehicle
-                            vehicle = Vehicle(
-                                make=make,
-                                model=model,
-                                year=year,
-                                type=vehicle_type,
-                                fuel_type=fuel_type,
-                                created_at=datetime.utcnow()
-                            )
-                            
-                            db.session.add(vehicle)
-                            total_vehicles += 1
-                            
-                            # Commit every 100 vehicles to avoid memory issues
-                            if total_vehicles % 100 == 0:
-                                print(f"Committing batch... Total vehicles so far: {total_vehicles}")
-                                db.session.commit()
-                    except Exception as e:
-                        print(f"Error processing model {model} for {make} {year}: {e}")
-                        continue
-                
-                # Add a small delay to avoid overwhelming the API
-                time.sleep(0.1)
+        progress = None
+        
+        def on_batch(batch):
+            progress.update(1)
+            progress.set_postfix_str(f"{batch['year']} {batch['make']}")
+        
+        print("Listing makes still to ingest...")
+        pending = pipeline.pending_batches(years)
+        print(f"{len(pending['work'])} (year, make) batches to ingest, {pending['skipped']} already done")
         
-        # Final commit for remaining vehicles
-        db.session.commit()
-        print(f"\nFinished! Total vehicles added to database: {total_vehicles}")
+        progress = tqdm(total=len(pending['work']), desc="Ingesting makes")
+        try:
+            totals = pipeline.run(years, on_batch=on_batch, pending=pending)
+        finally:
+            progress.close()
+        
+        print(f"\nFinished in {totals['elapsed_seconds']}s! "
+              f"Vehicles added: {totals['vehicles']}, catalog options stored: {totals['options']}, "
+              f"failed batches: {totals['failed']}")
 
-def determine_vehicle_type(model_name: str) -> str:
+def sync_vehicles(min_year: int = 2025, rate: float = 8.0, deep: bool = False):
     """
-    Determine vehicle type based on model name.
-    This is a simplified approach since EPA doesn't provide vehicle type data.
+    Incrementally refresh the catalog instead of re-downloading it
+    
+    Only menus that changed since the last run are diffed; new models are
+    added and vanished ones retired.
+    
+    Args:
+        min_year: Oldest model year to sync
+        rate: Upstream requests per second
+        deep: Also re-check the options of every existing model
     """
-    model_lower = model_name.lower()
+    app = create_app()
     
-    # Check for SUVs
-    if any(term in model_lower for term in ['suv', 'crossover', 'explorer', 'escape', 'expedition', 'tahoe', 'suburban', 'equinox']):
-        return 'SUV'
+    with app.app_context():
+        print("Starting incremental catalog sync with EPA FuelEconomy.gov data...")
+        years = [year[0] for year in EPAFuelEconomyService.fetch_years()]
+        years = [year for year in years if year >= min_year]
+        print(f"Found {len(years)} years to sync")
+        
+        sync_service = CatalogSyncService(
+            classify=determine_vehicle_type,
+            makes_filter=POPULAR_MAKES,
+            rate=rate,
+            deep=deep
+        )
+        
+        with tqdm(desc="Syncing makes") as progress:
+            counts = sync_service.sync(years, on_make=lambda year, make: progress.update(1))
+        
+        print(f"\nFinished in {counts['elapsed_seconds']}s with {counts['requests']} requests "
+              f"({counts['not_modified']} not modified, {counts['unchanged']} unchanged, {counts['changed']} changed, "
+              f"{counts['failed']} failed)")
+        print(f"Models added: {counts['models_added']}, models retired: {counts['models_retired']}, "
+              f"models with updated options: {counts['options_updated']}, vehicles added: {counts['vehicles_added']}")
+
+def ingest_bulk_file(path: str, min_year: int = 2025, chunksize: int = 20000):
+    """
+    Build the catalog offline from the EPA bulk vehicles file
     
-    # Check for trucks
-    if any(term in model_lower for term in ['truck', 'pickup', 'silverado', 'f-150', 'ram', 'ranger', 'tacoma', 'tundra', 'colorado']):
-        return 'Truck'
+    The file is streamed in chunks, so memory stays bounded however large
+    it is. Catalog options are upserted per EPA id and Vehicle rows get
+    their averaged fuel economy (MPG and kWh/100mi).
     
-    # Check for vans
-    if any(term in model_lower for term in ['van', 'caravan', 'sienna', 'odyssey', 'pacifica']):
-        return 'Van'
+    Args:
+        path: Downloaded vehicles.csv (or .csv.zip) from fueleconomy.gov
+        min_year: Oldest model year to ingest
+        chunksize: CSV rows parsed at a time
+    """
+    # pandas is only needed for this offline path
+    from app.services.data.epa_bulk_ingest import EPABulkIngest
     
-    # Check for coupes
-    if any(term in model_lower for term in ['coupe', 'mustang', 'camaro', 'challenger', 'corvette']):
-        return 'Coupe'
+    app = create_app()
     
-    # Check for convertibles
-    if any(term in model_lower for term in ['convertible', 'cabriolet', 'spyder', 'spider']):
-        return 'Convertible'
+    with app.app_context():
+        print(f"Ingesting EPA bulk file {path}...")
+        ingest = EPABulkIngest(
+            classify=determine_vehicle_type,
+            makes_filter=POPULAR_MAKES,
+            min_year=min_year,
+            chunksize=chunksize
+        )
+        
+        with tqdm(desc="Reading rows", unit="rows") as progress:
+            def on_chunk(rows):
+                progress.update(rows - progress.n)
+            
+            totals = ingest.run(path, on_chunk=on_chunk)
+        
+        InvalidationBus.publish(CATALOG)
+        
+        print(f"\nFinished in {totals['elapsed_seconds']}s! Rows read: {totals['rows']} ({totals['rows_used']} used), "
+              f"catalog options stored: {totals['options']}, vehicles added: {totals['vehicles_added']}, "
+              f"vehicles updated: {totals['vehicles_updated']}")
+
+def write_catalog_snapshot():
+    """
+    Write the memory-mapped catalog snapshot the web workers read from
     
-    # Check for hatchbacks
-    if any(term in model_lower for term in ['hatchback', 'golf', 'civic hatch', 'fit', 'yaris']):
-        return 'Hatchback'
+    Run after every catalog change; the catalog invalidation makes the
+    workers map the new file (and drop their menu caches) within
+    InvalidationBus.CHECK_SECONDS.
+    """
+    app = create_app()
     
-    # Check for wagons
-    if any(term in model_lower for term in ['wagon', 'estate', 'touring', 'outback']):
-        return 'Wagon'
+    with app.app_context():
+        rows = CatalogSnapshot.write()
+        InvalidationBus.publish(CATALOG)
+        print(f"Catalog snapshot with {rows} rows written to {CatalogSnapshot.PATH}")
+
+def determine_vehicle_type(model_name: str) -> str:
+    """
+    Determine vehicle type based on model name.
+    This is a simplified approach since EPA doesn't provide vehicle type data;
+    the rules live in VehicleTypeClassifier.
+    """
+    return VehicleTypeClassifier.classify_model(model_name)
+
+def classify_vehicles():
+    """Recompute the stored type of every vehicle (after a change to the type rules)"""
+    app = create_app()
     
-    # Default to sedan if no other type matches
-    return 'Sedan'
+    with app.app_context():
+        counts = VehicleTypeClassifier.reclassify_all()
+        print(f"Vehicle types checked: {counts['vehicles']}, updated: {counts['updated']}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the vehicle catalog from FuelEconomy.gov")
+    parser.add_argument('--sync', action='store_true',
+                        help="Incrementally refresh an existing catalog instead of a full ingest")
+    parser.add_argument('--deep', action='store_true',
+                        help="With --sync, also re-check the options of every existing model")
+    parser.add_argument('--reset', action='store_true',
+                        help="Drop and recreate every table first (deletes saved comparisons)")
+    parser.add_argument('--min-year', type=int, default=2025, help="Oldest model year to ingest")
+    parser.add_argument('--workers', type=int, default=4, help="(year, make) batches fetched in parallel")
+    parser.add_argument('--rate', type=float, default=8.0, help="Upstream requests per second")
+    parser.add_argument('--bulk-file',
+                        help="Build the catalog offline from the EPA bulk vehicles.csv instead of the API")
+    parser.add_argument('--classify', action='store_true',
+                        help="Only recompute the stored vehicle types (e.g. after editing VEHICLE_TYPE_RULES_FILE)")
+    parser.add_argument('--chunksize', type=int, default=20000, help="With --bulk-file, CSV rows parsed at a time")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     # First set up the database schema
-    setup_database()
-    # Then populate the vehicles
-    populate_vehicles()
+    setup_database(reset=args.reset and not args.sync)
+    if args.classify:
+        # Types only, the catalog itself is left as it is
+        classify_vehicles()
+    elif args.bulk_file:
+        # One pass over the downloaded file, no API calls
+        ingest_bulk_file(args.bulk_file, min_year=args.min_year, chunksize=args.chunksize)
+    elif args.sync:
+        # Refresh only what changed upstream
+        sync_vehicles(min_year=args.min_year, rate=args.rate, deep=args.deep)
+    else:
+        # Then populate the vehicles
+        populate_vehicles(min_year=args.min_year, workers=args.workers, rate=args.rate)
+    # Finally publish the catalog to the web workers
+    write_catalog_snapshot()
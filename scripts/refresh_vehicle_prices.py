@@ -0,0 +1,48 @@
+import sys
+import os
+import argparse
+from tqdm import tqdm  # For progress bars
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.business_logic.price_refresh_service import PriceRefreshService
+
+def refresh_prices(max_age_days: int, limit: int, concurrency: int):
+    """
+    Refresh the materialized prices of the vehicles that are due, most recently analyzed first
+    
+    Args:
+        max_age_days: Refresh prices older than this
+        limit: Maximum vehicles refreshed in this run
+        concurrency: Maximum MarketCheck calls in flight
+    """
+    app = create_app()
+    
+    with app.app_context():
+        vehicles = PriceRefreshService.due_vehicles(max_age_days, limit)
+        print(f"{len(vehicles)} vehicles due for a price refresh")
+        
+        with tqdm(total=len(vehicles), desc="Refreshing prices") as progress:
+            def on_batch(done):
+                progress.update(done - progress.n)
+            
+            summary = PriceRefreshService.refresh(vehicles, concurrency=concurrency, on_batch=on_batch)
+    
+    print(f"\nFinished in {summary['elapsed_seconds']}s! {summary['market']} market prices, "
+          f"{summary['estimate']} estimates")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Refresh the materialized vehicle prices (run from cron)")
+    parser.add_argument('--max-age-days', type=int, default=int(os.environ.get('PRICE_REFRESH_MAX_AGE_DAYS', 1)),
+                        help="Refresh prices older than this many days")
+    parser.add_argument('--limit', type=int, default=int(os.environ.get('PRICE_REFRESH_LIMIT', 1000)),
+                        help="Maximum vehicles refreshed per run")
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('PRICE_REFRESH_CONCURRENCY', 4)),
+                        help="Maximum MarketCheck calls in flight")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    refresh_prices(args.max_age_days, args.limit, args.concurrency)
@@ -0,0 +1,21 @@
+import sys
+import os
+import argparse
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.data.pricing_api import PricingService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Delete expired rows from the price_cache table (e.g. from cron)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    app = create_app()
+    with app.app_context():
+        deleted = PricingService.sweep_expired_prices(batch_size=args.batch_size)
+        print(f"Deleted {deleted} expired prices")
@@ -0,0 +1,70 @@
+import sys
+import os
+import argparse
+from tqdm import tqdm  # For progress bars
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services.business_logic.cache_warmup_service import CacheWarmupService
+from app.services.data.invalidation import InvalidationBus, WARMUP
+
+def warm_caches(limit: int, concurrency: int, vehicles: str, signal_workers: bool = True):
+    """
+    Preload the prices for the hottest vehicles and ask the web workers to warm up
+    
+    This process's own in-memory caches are gone when it exits, so what it
+    warms are the shared and database price tiers. The running web workers
+    are then signalled through the invalidation bus; each one runs its
+    on-boot warm-up (with its own WARMUP_* settings) on its next request,
+    which now mostly reads from those tiers.
+    
+    Args:
+        limit: Number of most-analyzed vehicles from tco_comparisons
+        concurrency: Maximum lookups in flight
+        vehicles: Extra vehicles as "year|make|model;year|make|model"
+        signal_workers: Also ask the running web workers to warm their in-memory caches
+    """
+    app = create_app()
+    
+    with app.app_context():
+        targets = CacheWarmupService.hot_vehicles(limit)
+        print(f"Found {len(targets)} frequently analyzed vehicles")
+        configured = CacheWarmupService.configured_vehicles(vehicles)
+        if configured:
+            print(f"Adding {len(configured)} configured vehicles")
+        targets += configured
+    
+    with tqdm(desc="Warming caches") as progress:
+        def on_progress(done, total):
+            progress.total = total
+            progress.update(1)
+        
+        summary = CacheWarmupService.warm(app, targets, concurrency=concurrency, on_progress=on_progress)
+    
+    print(f"\nFinished! {summary['tasks']} lookups for {summary['vehicles']} vehicles "
+          f"in {summary['elapsed_seconds']}s ({summary['failed']} failed)")
+    
+    if signal_workers:
+        InvalidationBus.publish(WARMUP, local=False)
+        print("Asked the running web workers to warm their in-memory caches")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Preload the shared and database price caches, then ask the running web workers "
+                    "to warm their in-memory caches"
+    )
+    parser.add_argument('--limit', type=int, default=int(os.environ.get('WARMUP_VEHICLE_LIMIT', 50)),
+                        help="Number of most-analyzed vehicles to warm")
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('WARMUP_CONCURRENCY', 4)),
+                        help="Maximum lookups in flight")
+    parser.add_argument('--vehicles', default=os.environ.get('WARMUP_VEHICLES', ''),
+                        help="Extra vehicles to warm, e.g. \"2024|Toyota|RAV4;2024|Honda|Civic\"")
+    parser.add_argument('--no-signal', action='store_true',
+                        help="Only warm the shared and database tiers; do not signal the web workers")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    warm_caches(args.limit, args.concurrency, args.vehicles, signal_workers=not args.no_signal)
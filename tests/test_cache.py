@@ -0,0 +1,68 @@
+import sys
+import os
+import threading
+import time
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data.cache import TTLCache
+
+def test_entries_expire_after_ttl():
+    """Expired entries are treated as misses"""
+    cache = TTLCache('test_expiry', ttl=0.05)
+    cache.set('years', [2024, 2023])
+    assert cache.get('years') == [2024, 2023]
+    
+    time.sleep(0.1)
+    assert cache.get('years') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    """Going over maxsize evicts the least recently used entry"""
+    cache = TTLCache('test_lru', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+def test_memory_budget_is_enforced():
+    """Entries are evicted once the byte budget is exceeded"""
+    cache = TTLCache('test_bytes', maxsize=100, max_bytes=4096)
+    for i in range(50):
+        cache.set(i, 'x' * 500)
+    
+    stats = cache.stats()
+    assert stats['bytes'] <= 4096
+    assert stats['evictions'] > 0
+
+def test_concurrent_misses_share_one_load():
+    """Concurrent get_or_load calls for the same key call the loader once"""
+    cache = TTLCache('test_single_flight')
+    calls = []
+    
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return ['2024', '2023']
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('vehicle/menu/year', loader)))
+               for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert results == [['2024', '2023']] * 20
+
+def test_none_results_are_not_cached():
+    """A failed upstream call (None) is retried on the next lookup"""
+    cache = TTLCache('test_none')
+    assert cache.get_or_load('menu', lambda: None) is None
+    assert cache.get_or_load('menu', lambda: {'menuItem': []}) == {'menuItem': []}
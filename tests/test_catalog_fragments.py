@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.routes.tco_calculator import user_data_input
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+def _client(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+        PRICE_CACHE_SWEEP_SECONDS = 0
+    return create_app(TestConfig).test_client()
+
+def test_default_fuel_types_are_rendered_but_not_cached(tmp_path, monkeypatch):
+    """The fallback fuel type list after a failed upstream call is not kept in the fragment cache"""
+    client = _client(tmp_path)
+    user_data_input._fragment_cache.clear()
+    answers = [EPAFuelEconomyService.default_fuel_types(), [('Regular', 'Gasoline (Regular 87 octane)')]]
+    monkeypatch.setattr(EPAFuelEconomyService, 'get_fuel_types', lambda make, model, year: answers.pop(0))
+    url = '/tco-calculator/user-data-input/fuel-types?year=2024&make=Toyota&model=RAV4'
+
+    degraded = client.get(url)
+    assert 'E85' in degraded.get_data(as_text=True)
+
+    good = client.get(url)
+    assert 'E85' not in good.get_data(as_text=True)
+    assert client.get(url).get_data() == good.get_data()
+    assert answers == []
+
+def test_degraded_responses_are_not_cacheable(tmp_path, monkeypatch):
+    """An empty option list gets no ETag and no-store; the next good response is cacheable"""
+    client = _client(tmp_path)
+    user_data_input._fragment_cache.clear()
+    answers = [[], [('RAV4', 'RAV4')]]
+    monkeypatch.setattr(EPAFuelEconomyService, 'get_models', lambda make, year: answers.pop(0))
+    url = '/tco-calculator/user-data-input/models?year=2024&make=Toyota'
+
+    degraded = client.get(url)
+    assert degraded.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in degraded.headers
+
+    good = client.get(url)
+    assert good.headers['Cache-Control'].startswith('public')
+    assert client.get(url, headers={'If-None-Match': good.headers['ETag']}).status_code == 304
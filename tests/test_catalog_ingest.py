@@ -0,0 +1,44 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.database import db
+from app.models.catalog import CatalogEntry, CatalogIngestCheckpoint
+from app.services.data.catalog_ingest import CatalogIngestPipeline
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+def _app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+        PRICE_CACHE_SWEEP_SECONDS = 0
+    return create_app(TestConfig)
+
+def test_failed_fetches_keep_the_catalog_and_are_retried(tmp_path, monkeypatch):
+    """An empty or partial batch neither replaces catalog rows nor gets checkpointed"""
+    app = _app(tmp_path)
+    monkeypatch.setattr(EPAFuelEconomyService, 'fetch_models',
+                        lambda make, year: [('Camry', 'Camry'), ('RAV4', 'RAV4')])
+    # RAV4's detail call failed
+    monkeypatch.setattr(EPAFuelEconomyService, 'fetch_catalog_options', lambda make, model, year: [
+        {'epa_id': f'{model}-1', 'option_text': 'Auto', 'fuel_type': None if model == 'RAV4' else 'Regular'}
+    ])
+    pipeline = CatalogIngestPipeline(classify=lambda model: 'Sedan', workers=1)
+    pending = {'work': [(2024, 'Toyota')], 'skipped': 0}
+
+    with app.app_context():
+        db.session.add(CatalogEntry(year=2024, make='Toyota', model='Corolla', epa_id='1', fuel_type='Regular'))
+        db.session.commit()
+
+        totals = pipeline.run([2024], pending=pending)
+        assert (totals['batches'], totals['failed']) == (0, 1)
+        assert [entry.model for entry in CatalogEntry.query.all()] == ['Corolla']
+        assert CatalogIngestCheckpoint.query.count() == 0
+
+        monkeypatch.setattr(EPAFuelEconomyService, 'fetch_models', lambda make, year: [])
+        assert pipeline.run([2024], pending=pending)['failed'] == 1
+        assert CatalogEntry.query.count() == 1
@@ -0,0 +1,90 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app.services.data.catalog_snapshot import CatalogSnapshot
+from app.services.data.pricing_api import PricingService
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+ROWS = [
+    (2024, 'Toyota', 'RAV4', 'Regular Gasoline', 'SUV'),
+    (2024, 'Toyota', 'RAV4', 'Regular Gasoline and Electricity', 'SUV'),
+    (2024, 'Toyota', 'Camry', 'Regular Gasoline', 'Sedan'),
+    (2024, 'Honda', 'Civic', 'Premium Gasoline', 'Sedan'),
+    (2023, 'Toyota', 'RAV4', 'Regular Gasoline', 'SUV'),
+    (2023, 'Škoda', 'Octavia', None, None),
+]
+
+def _snapshot(tmp_path):
+    path = str(tmp_path / 'catalog_snapshot.bin')
+    written = CatalogSnapshot.write_rows(path, ROWS, base_price=lambda make: 30000 if make == 'Toyota' else 35000,
+                                         price_factor=lambda model: 1.2 if model == 'RAV4' else 1.0)
+    assert written == len(ROWS)
+    return CatalogSnapshot(path)
+
+def test_menus_come_back_sorted(tmp_path):
+    """Years newest first, makes/models/fuel types alphabetical"""
+    snapshot = _snapshot(tmp_path)
+    
+    assert snapshot.get_years() == [2024, 2023]
+    assert snapshot.get_makes(2024) == ['Honda', 'Toyota']
+    assert snapshot.get_makes(2023) == ['Toyota', 'Škoda']
+    assert snapshot.get_models('Toyota', 2024) == ['Camry', 'RAV4']
+    assert snapshot.get_fuel_types('Toyota', 'RAV4', 2024) == ['Regular Gasoline', 'Regular Gasoline and Electricity']
+
+def test_misses_return_none(tmp_path):
+    """Unknown years, makes and models are misses, as in CatalogStore"""
+    snapshot = _snapshot(tmp_path)
+    
+    assert snapshot.get_makes(1999) is None
+    assert snapshot.get_models('Honda', 2023) is None
+    assert snapshot.get_models('Yugo', 2024) is None
+    assert snapshot.get_fuel_types('Toyota', 'Civic', 2024) is None
+    assert snapshot.get_fuel_types('Škoda', 'Octavia', 2023) is None
+
+def test_vehicle_types_and_catalog_prices(tmp_path, monkeypatch):
+    """Per-model vehicle type, and the per-make/model price columns behind PricingService.estimate_catalog_prices"""
+    snapshot = _snapshot(tmp_path)
+    
+    assert snapshot.get_vehicle_type('Toyota', 'RAV4', 2023) == 'SUV'
+    assert snapshot.get_vehicle_type('Škoda', 'Octavia', 2023) is None
+    
+    monkeypatch.setattr(CatalogSnapshot, 'get', staticmethod(lambda: snapshot))
+    prices = PricingService.estimate_catalog_prices(current_year=2024)
+    rows = [(int(year), snapshot.models[int(model)], price)
+            for year, model, price in zip(snapshot.year, snapshot.model, prices.tolist())]
+    list_prices = {'RAV4': 36000.0, 'Camry': 30000.0, 'Civic': 35000.0, 'Octavia': 35000.0}
+    expected = PricingService._apply_age(np.array([list_prices[model] for _, _, model, _, _ in ROWS]),
+                                         np.array([year for year, *_ in ROWS]), 2024)
+    assert sorted(rows) == sorted((year, model, price)
+                                  for (year, _, model, _, _), price in zip(ROWS, expected.tolist()))
+
+def test_rewriting_replaces_the_file_atomically(tmp_path):
+    """A snapshot opened before a rewrite keeps reading its own consistent copy"""
+    old = _snapshot(tmp_path)
+    CatalogSnapshot.write_rows(old.path, ROWS[:1], base_price=lambda make: 1.0, price_factor=lambda model: 1.0)
+    new = CatalogSnapshot(old.path)
+    
+    assert len(old) == len(ROWS)
+    assert old.get_makes(2024) == ['Honda', 'Toyota']
+    assert len(new) == 1
+    assert new.get_makes(2024) == ['Toyota']
+
+def test_menus_add_the_years_and_makes_the_catalog_lacks(tmp_path, monkeypatch):
+    """A catalog of recent years and popular makes is merged with the EPA menus, and used alone if they fail"""
+    snapshot = _snapshot(tmp_path)
+    monkeypatch.setattr(CatalogSnapshot, 'get', staticmethod(lambda: snapshot))
+    menus = {
+        'vehicle/menu/year': ['2024', '2023', '2022'],
+        'vehicle/menu/make?year=2024': ['Ferrari', 'Toyota'],
+    }
+    monkeypatch.setattr(EPAFuelEconomyService, '_make_menu_request',
+                        lambda endpoint: {'menuItem': [{'value': value} for value in menus[endpoint]]}
+                        if endpoint in menus else None)
+
+    assert [year for year, _ in EPAFuelEconomyService.get_years()] == [2024, 2023, 2022]
+    assert [make for make, _ in EPAFuelEconomyService.get_makes(2024)] == ['Ferrari', 'Honda', 'Toyota']
+    assert [make for make, _ in EPAFuelEconomyService.get_makes(2023)] == ['Toyota', 'Škoda']
@@ -0,0 +1,71 @@
+import sys
+import os
+import json
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.database import db
+from app.models import Vehicle
+from app.models.catalog import CatalogEntry, CatalogSyncState
+from app.services.data.catalog_sync import CatalogSyncService
+from app.services.data.vehicle_api import EPAFuelEconomyService
+
+class FakeResponse:
+    def __init__(self, values):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps({'menuItem': [{'value': value} for value in values]}).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+def _app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+    return create_app(TestConfig)
+
+def _serve(monkeypatch, menus):
+    """Answer menu requests by the end of their URL"""
+    monkeypatch.setattr('app.services.data.catalog_sync.UpstreamClient.get', lambda url, headers=None: FakeResponse(
+        next(values for endpoint, values in menus.items() if url.endswith(endpoint))
+    ))
+
+def test_failed_or_empty_fetches_change_nothing(tmp_path, monkeypatch):
+    """Empty menus retire nothing, and models or option changes whose fetch failed are retried next run"""
+    app = _app(tmp_path)
+    sync = CatalogSyncService(classify=lambda model: 'SUV', deep=True)
+
+    with app.app_context():
+        db.session.add_all([
+            CatalogEntry(year=2024, make='Toyota', model='RAV4', epa_id='1', fuel_type='Regular'),
+            Vehicle(make='Toyota', model='RAV4', year=2024, type='SUV', fuel_type='Regular'),
+        ])
+        db.session.commit()
+
+        # A 200 with an empty models menu is not "every model was removed"
+        _serve(monkeypatch, {'make?year=2024': ['Toyota'], 'model?year=2024&make=Toyota': []})
+        sync.sync([2024])
+        assert Vehicle.query.one().retired_at is None
+        assert CatalogEntry.query.count() == 1
+
+        # Corolla is new and RAV4's options changed, but their vehicle detail calls fail
+        options_endpoint = 'options?year=2024&make=Toyota&model=RAV4'
+        _serve(monkeypatch, {'make?year=2024': ['Toyota'], 'model?year=2024&make=Toyota': ['Corolla', 'RAV4'],
+                             options_endpoint: ['1', '2']})
+        monkeypatch.setattr(EPAFuelEconomyService, 'fetch_catalog_options', lambda make, model, year: [
+            {'epa_id': '2', 'option_text': 'Auto', 'fuel_type': None}
+        ])
+        sync.sync([2024])
+        assert [entry.model for entry in CatalogEntry.query.all()] == ['RAV4']
+        assert CatalogSyncState.query.filter(CatalogSyncState.endpoint.endswith(options_endpoint)).count() == 0
+
+        monkeypatch.setattr(EPAFuelEconomyService, 'fetch_catalog_options', lambda make, model, year: [
+            {'epa_id': f'{model}-2', 'option_text': 'Auto', 'fuel_type': 'Regular'}
+        ])
+        sync.sync([2024])
+        assert sorted(entry.model for entry in CatalogEntry.query.all()) == ['Corolla', 'RAV4']
+        assert CatalogSyncState.query.filter(CatalogSyncState.endpoint.endswith(options_endpoint)).count() == 1
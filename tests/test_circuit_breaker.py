@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app.services.data.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.data.pricing_api import PricingService
+
+def test_failure_rate_opens_and_half_open_probe_closes(monkeypatch):
+    """The breaker opens at the failure threshold, rejects calls, then lets one probe through"""
+    now = [1000.0]
+    monkeypatch.setattr('app.services.data.circuit_breaker.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker('test_failures', failure_rate=0.5, window_size=4, min_calls=4, open_seconds=30)
+
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(0.1, failed=failed)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(0.1, failed=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    stats = breaker.stats()
+    assert (stats['opened'], stats['rejected'], stats['window_calls']) == (1, 2, 0)
+
+def test_slow_calls_open_and_a_failed_probe_reopens(monkeypatch):
+    """Slow successes count against the breaker; a slow or failed probe opens it again"""
+    now = [1000.0]
+    monkeypatch.setattr('app.services.data.circuit_breaker.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker('test_slow', slow_call_rate=0.5, slow_call_seconds=2.0, window_size=2,
+                             min_calls=2, open_seconds=10)
+
+    breaker.record(2.5)
+    breaker.record(3.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record(5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['opened'] == 2
+
+def test_open_breaker_skips_marketcheck(monkeypatch):
+    """While the MarketCheck breaker is open, pricing never calls the upstream"""
+    monkeypatch.setattr(PricingService, '_breaker', CircuitBreaker('test_marketcheck', min_calls=1, window_size=1))
+    PricingService._breaker.record(0.1, failed=True)
+    monkeypatch.setattr('app.services.data.pricing_api.UpstreamClient.get', lambda *args, **kwargs: 1 / 0)
+
+    with pytest.raises(CircuitOpenError):
+        PricingService._fetch_market_price('Toyota', 'RAV4', 2024)
@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app.services.data.circuit_breaker import CircuitBreaker
+from app.services.data.deadline import Deadline, DeadlineExceeded
+from app.services.data.http_client import UpstreamClient
+from app.services.data.pricing_api import PricingService
+from scripts.fake_upstream import FakeUpstream
+
+def test_nested_budgets_only_tighten():
+    """An inner budget cannot extend the outer one, and leaving it restores the outer one"""
+    assert Deadline.remaining() is None
+    with Deadline.budget(0.5):
+        with Deadline.budget(10):
+            assert Deadline.remaining() <= 0.5
+        with Deadline.budget(0.1):
+            assert Deadline.remaining() <= 0.1
+        assert 0.1 < Deadline.remaining() <= 0.5
+    assert Deadline.remaining() is None
+
+def test_propagate_carries_the_deadline_into_pool_threads():
+    """Thread pool tasks only see the caller's deadline when wrapped"""
+    with Deadline.budget(5):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(Deadline.remaining).result() is None
+            assert executor.submit(Deadline.propagate(Deadline.remaining)).result() <= 5
+
+def test_slow_upstream_is_cut_off_at_the_deadline(tmp_path):
+    """A call to a slow upstream gives up when the budget runs out, not at the read timeout"""
+    with FakeUpstream(fixtures_dir=str(tmp_path), latency=2.0) as fake:
+        started = time.perf_counter()
+        with Deadline.budget(0.3), pytest.raises(DeadlineExceeded):
+            UpstreamClient.get(f"{fake.url}/epa/vehicle/menu/year")
+        assert time.perf_counter() - started < 1.5
+
+        with Deadline.budget(0.3):
+            time.sleep(0.3)
+            with pytest.raises(DeadlineExceeded):
+                UpstreamClient.get(f"{fake.url}/epa/vehicle/menu/year")
+
+def test_pricing_falls_back_to_an_estimate_without_tripping_the_breaker(monkeypatch):
+    """A price lookup past the deadline is estimated and not held against MarketCheck"""
+    monkeypatch.setattr(PricingService, '_breaker', CircuitBreaker('test_deadline', min_calls=1, window_size=1))
+    PricingService._price_cache.memory.clear()
+    monkeypatch.setattr(PricingService._price_cache, 'lookup', lambda key: (False, None))
+
+    def slow_get(*args, **kwargs):
+        time.sleep(0.2)
+        raise DeadlineExceeded("Request deadline exceeded during GET test")
+    monkeypatch.setattr('app.services.data.pricing_api.UpstreamClient.get', slow_get)
+
+    with Deadline.budget(0.1):
+        price = PricingService.get_vehicle_price('Toyota', 'RAV4', 2024)
+
+    assert price == PricingService._estimate_price('Toyota', 'RAV4', 2024)
+    stats = PricingService._breaker.stats()
+    assert (stats['state'], stats['calls']) == (CircuitBreaker.CLOSED, 0)
+
+def test_deadline_running_out_before_the_call_is_a_timeout(monkeypatch):
+    """A budget spent between the check and the call raises DeadlineExceeded, not ValueError"""
+    remaining = iter([0.2, 0.0])
+    monkeypatch.setattr(Deadline, 'remaining', staticmethod(lambda: next(remaining)))
+    assert UpstreamClient._within_deadline((3.05, 10)) == (0.2, 0.2)
+    with pytest.raises(DeadlineExceeded):
+        UpstreamClient._within_deadline((3.05, 10))
+
+    monkeypatch.setattr(Deadline, 'remaining', staticmethod(lambda: 0.0001))
+    assert UpstreamClient._within_deadline((3.05, 10)) == (UpstreamClient.MIN_TIMEOUT,) * 2
+
+def test_batch_decode_slower_than_the_page_budget_succeeds(tmp_path, monkeypatch):
+    """POST /api/decode-vins gets API_REQUEST_DEADLINE_MS, not the 800 ms page budget"""
+    from config import Config
+    from app import create_app
+    from app.services.data.vehicle_api import NHTSAService
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+        REQUEST_DEADLINE_MS = 800
+        API_REQUEST_DEADLINE_MS = 5000
+    client = create_app(TestConfig).test_client()
+
+    with FakeUpstream(fixtures_dir=str(tmp_path / 'fixtures'), latency=1.0) as fake:
+        monkeypatch.setattr(NHTSAService, 'BASE_URL', f"{fake.url}/nhtsa")
+        response = client.post('/api/decode-vins', json={'vins': ['5YJ3E1EA7KF317000']})
+
+    vehicle = response.get_json()['results']['5YJ3E1EA7KF317000']
+    assert response.status_code == 200
+    assert vehicle is not None and vehicle['make']
@@ -0,0 +1,48 @@
+import sys
+import os
+import io
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from app.services.data.epa_bulk_ingest import BULK_COLUMNS, EPABulkIngest
+
+BULK_CSV = """id,year,make,model,fuelType,VClass,trany,cylinders,displ,city08,highway08,comb08,combE,atvType
+1,2024,Toyota,RAV4,Regular,Small Sport Utility Vehicle 4WD,Automatic (S8),4,2.5,27,34,30,0,
+2,2024,Toyota,RAV4,Regular,Small Sport Utility Vehicle 4WD,Automatic (S8),4,2.5,25,32,28,0,
+3,2024,Tesla,Model 3,Electricity,Midsize Cars,Automatic (A1),,,138,126,132,25,EV
+4,2019,Toyota,RAV4,Regular,Small Sport Utility Vehicle 4WD,Automatic (S8),4,2.5,26,35,29,0,
+5,2024,Yugo,GV,Regular,Minicompact Cars,Manual 4-spd,4,1.1,24,30,26,0,
+"""
+
+def _chunks(ingest, chunksize):
+    reader = pd.read_csv(io.StringIO(BULK_CSV), usecols=list(BULK_COLUMNS), dtype=BULK_COLUMNS, chunksize=chunksize)
+    return [ingest._prepare(chunk) for chunk in reader]
+
+def test_prepare_filters_and_builds_option_text():
+    """Rows outside the year/make filter are dropped and option text matches the REST menus"""
+    ingest = EPABulkIngest(classify=lambda model: 'SUV', makes_filter={'TOYOTA', 'TESLA'}, min_year=2020)
+    chunk = _chunks(ingest, 10)[0]
+    
+    assert chunk['epa_id'].tolist() == ['1', '2', '3']
+    assert chunk['option_text'].tolist()[0] == 'Automatic (S8), 4 cyl, 2.5 L'
+    assert chunk['option_text'].tolist()[2] == 'Automatic (A1)'
+    # 0 means "not applicable" in the bulk file
+    assert pd.isna(chunk['kwh_per_100mi'].tolist()[0])
+
+def test_averages_do_not_depend_on_chunk_boundaries():
+    """Running sums across chunks give the same per-vehicle averages as one pass"""
+    ingest = EPABulkIngest(classify=lambda model: 'SUV', min_year=2020)
+    
+    sums = None
+    for chunk in _chunks(ingest, 1):
+        if len(chunk):
+            sums = EPABulkIngest._accumulate(sums, chunk)
+    vehicles = EPABulkIngest._averages(sums).set_index(['year', 'make', 'model', 'fuel_type'])
+    
+    rav4 = vehicles.loc[(2024, 'Toyota', 'RAV4', 'Regular')]
+    assert rav4['mpg_combined'] == 29.0
+    assert rav4['vehicle_class'] == 'Small Sport Utility Vehicle 4WD'
+    assert vehicles.loc[(2024, 'Tesla', 'Model 3', 'Electricity')]['kwh_per_100mi'] == 25.0
+    assert len(vehicles) == 3
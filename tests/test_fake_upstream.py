@@ -0,0 +1,74 @@
+import sys
+import os
+import json
+import time
+import urllib.error
+import urllib.request
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.fake_upstream import FakeUpstream
+
+def _get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+def test_synthetic_responses_are_deterministic(tmp_path):
+    """Requests without a fixture get the same synthetic body every time"""
+    with FakeUpstream(fixtures_dir=str(tmp_path)) as fake:
+        url = f"{fake.url}/epa/vehicle/menu/model?year=2024&make=Toyota"
+        first = _get(url)
+        second = _get(url)
+    
+    assert first[0] == 200
+    assert first[2] == second[2]
+    assert json.loads(first[2])['menuItem']
+    assert fake.stats['epa']['synthetic'] == 2
+
+def test_fixtures_are_served_and_ignore_api_key(tmp_path):
+    """A recorded fixture answers the request regardless of the api_key value"""
+    fake = FakeUpstream(fixtures_dir=str(tmp_path), mode='strict')
+    fixture_file = fake.fixture_path('marketcheck', 'search', 'make=Honda&model=Civic&year=2022')
+    os.makedirs(os.path.dirname(fixture_file))
+    with open(fixture_file, 'w') as f:
+        json.dump({'status': 200, 'body': {'stats': {'price': {'mean': 21500}}}}, f)
+    
+    with fake:
+        status, _, body = _get(f"{fake.url}/marketcheck/search?year=2022&api_key=secret&model=Civic&make=Honda")
+        missing_status, _, _ = _get(f"{fake.url}/marketcheck/search?year=2023&make=Honda&model=Civic")
+    
+    assert status == 200
+    assert json.loads(body)['stats']['price']['mean'] == 21500
+    assert missing_status == 404
+
+def test_conditional_requests_get_304(tmp_path):
+    """If-None-Match with the current ETag is answered with 304"""
+    with FakeUpstream(fixtures_dir=str(tmp_path)) as fake:
+        url = f"{fake.url}/epa/vehicle/menu/make?year=2024"
+        _, headers, _ = _get(url)
+        status, _, body = _get(url, {'If-None-Match': headers['ETag']})
+    
+    assert status == 304
+    assert body == b''
+
+def test_latency_errors_and_payload_size(tmp_path):
+    """Configured latency, error rate and payload size are applied"""
+    with FakeUpstream(fixtures_dir=str(tmp_path), latency=0.05, payload_bytes=4096) as fake:
+        started = time.perf_counter()
+        status, _, body = _get(f"{fake.url}/nhtsa/vehicles/GetAllMakes?format=json")
+        elapsed = time.perf_counter() - started
+        
+        fake.error_rate = 1.0
+        error_status, _, _ = _get(f"{fake.url}/nhtsa/vehicles/GetAllMakes?format=json")
+    
+    assert status == 200
+    assert elapsed >= 0.05
+    assert len(body) >= 4096
+    assert json.loads(body)['Results']
+    assert error_status == 503
+    assert fake.stats['nhtsa']['errors_injected'] == 1
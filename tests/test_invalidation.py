@@ -0,0 +1,66 @@
+import sys
+import os
+import subprocess
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.services.business_logic.cache_warmup_service import CacheWarmupService
+from app.services.data.cache import TTLCache
+from app.services.data.invalidation import InvalidationBus
+
+def test_publish_from_another_process_clears_subscribed_caches(tmp_path, monkeypatch):
+    """A generation bumped by another process clears the cache on the next poll"""
+    monkeypatch.setattr(InvalidationBus, 'DIRECTORY', str(tmp_path))
+    cache = TTLCache('test_invalidation_remote', maxsize=10, ttl=60, invalidate_on='test-remote')
+    cache.set('key', 'value')
+
+    InvalidationBus.poll(force=True)
+    assert cache.get('key') == 'value'
+
+    subprocess.run([sys.executable, '-c', (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from app.services.data.invalidation import InvalidationBus as Bus;"
+        "Bus.DIRECTORY = sys.argv[2]; Bus.publish('test-remote')"
+    ), os.path.dirname(os.path.dirname(os.path.abspath(__file__))), str(tmp_path)], check=True)
+
+    assert InvalidationBus.generation('test-remote') == 1
+    InvalidationBus.poll(force=True)
+    assert cache.get('key') is None
+
+def test_local_publish_runs_callbacks_once(tmp_path, monkeypatch):
+    """Publishing runs this process's callbacks right away and the next poll does not repeat them"""
+    monkeypatch.setattr(InvalidationBus, 'DIRECTORY', str(tmp_path))
+    calls = []
+    InvalidationBus.subscribe('test-local', lambda: calls.append('local'))
+    InvalidationBus.subscribe('test-local', lambda: 1 / 0)
+
+    InvalidationBus.publish('test-local')
+    InvalidationBus.publish('test-local')
+    InvalidationBus.poll(force=True)
+
+    # The failing callback is reported, not raised
+    assert calls == ['local', 'local']
+    assert InvalidationBus.generation('test-local') == 2
+
+def test_warmup_signal_starts_a_warmup_in_running_workers(tmp_path, monkeypatch):
+    """scripts/warm_caches.py's signal makes every app warm its own caches on the next poll"""
+    monkeypatch.setattr(InvalidationBus, 'DIRECTORY', str(tmp_path))
+    started = []
+    monkeypatch.setattr(CacheWarmupService, 'start_background_warmup', started.append)
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+    app = create_app(TestConfig)
+
+    subprocess.run([sys.executable, '-c', (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from app.services.data.invalidation import InvalidationBus as Bus, WARMUP;"
+        "Bus.DIRECTORY = sys.argv[2]; Bus.publish(WARMUP, local=False)"
+    ), os.path.dirname(os.path.dirname(os.path.abspath(__file__))), str(tmp_path)], check=True)
+
+    InvalidationBus.poll(force=True)
+    assert app in started
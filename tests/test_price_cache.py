@@ -0,0 +1,108 @@
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.database import db
+from app.models.price_cache import PriceCache
+from app.services.data.pricing_api import PricingService
+from app.services.data.shared_store import FileStore
+
+def _app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'prices.db'}"
+        SECRET_KEY = 'test'
+        PRICE_CACHE_SWEEP_SECONDS = 0
+    return create_app(TestConfig)
+
+def test_price_key_is_normalized():
+    """Case, whitespace and a missing trim do not fragment the cache"""
+    assert PricingService.price_key(' Toyota', 'RAV4 ', '2024') == ('toyota', 'rav4', 2024, '')
+    assert PricingService.price_key('TOYOTA', 'rav4', 2024, None) == PricingService.price_key('toyota', 'RAV4', 2024, '')
+
+def test_reads_skip_expired_rows_and_the_sweeper_deletes_them(tmp_path):
+    """Expired prices are invisible to reads, which never delete, and are swept in batches"""
+    app = _app(tmp_path)
+    with app.app_context():
+        expired = datetime.now() - timedelta(days=PricingService.CACHE_EXPIRY_DAYS + PricingService.STALE_GRACE_DAYS + 1)
+        db.session.add_all([PriceCache(make='toyota', model=f'model {i}', year=2024, trim='', price=1000.0 + i,
+                                       fetched_at=expired) for i in range(5)])
+        db.session.commit()
+        PricingService._cache_price(PricingService.price_key('Toyota', 'RAV4', 2024), 31000.0)
+
+        assert PricingService._get_cached_price(PricingService.price_key('Toyota', 'RAV4', 2024)) == 31000.0
+        assert PricingService._get_cached_price(('toyota', 'model 0', 2024, '')) is None
+        assert PriceCache.query.count() == 6
+
+        assert PricingService.sweep_expired_prices(batch_size=2) == 5
+        assert [row.model for row in PriceCache.query.all()] == ['rav4']
+
+def test_bulk_prices_query_once_and_fetch_misses(tmp_path, monkeypatch):
+    """Cached prices come from one query, misses are fetched and stored, missing prices are estimated"""
+    app = _app(tmp_path)
+    monkeypatch.setattr(PricingService._price_cache, '_shared_store', FileStore(str(tmp_path / 'shared')))
+    PricingService._price_cache.memory.clear()
+
+    fetched = []
+    def fetch(make, model, year, trim=None):
+        fetched.append(model)
+        return None if model == 'GV' else 40000.0
+    monkeypatch.setattr(PricingService, '_fetch_market_price', fetch)
+
+    with app.app_context():
+        PricingService._cache_price(PricingService.price_key('Toyota', 'RAV4', 2024), 31000.0)
+        prices = PricingService.get_vehicle_prices([
+            ('Toyota', 'RAV4', 2024), ('Tesla', 'Model 3', 2024), ('Yugo', 'GV', 2024), ('toyota', 'rav4 ', 2024)
+        ])
+
+        assert prices[0] == prices[3] == 31000.0
+        assert prices[1] == 40000.0
+        assert prices[2] == PricingService._estimate_price('Yugo', 'GV', 2024)
+        assert sorted(fetched) == ['GV', 'Model 3']
+        assert PricingService._get_cached_prices([PricingService.price_key('Tesla', 'Model 3', 2024)]) == {
+            ('tesla', 'model 3', 2024, ''): 40000.0
+        }
+
+        # Everything is answered from the in-process tier now
+        PricingService.get_vehicle_prices([('Tesla', 'Model 3', 2024), ('Yugo', 'GV', 2024)])
+        assert len(fetched) == 2
+
+def test_stale_prices_are_served_and_refreshed_once(tmp_path, monkeypatch):
+    """A price past CACHE_EXPIRY_DAYS is returned at once and refetched in the background, once"""
+    app = _app(tmp_path)
+    monkeypatch.setattr(PricingService._price_cache, '_shared_store', FileStore(str(tmp_path / 'shared')))
+    PricingService._price_cache.memory.clear()
+
+    release = threading.Event()
+    fetched = []
+    def fetch(make, model, year, trim=None):
+        fetched.append(model)
+        release.wait(5)
+        return 33000.0
+    monkeypatch.setattr(PricingService, '_fetch_market_price', fetch)
+
+    with app.app_context():
+        key = PricingService.price_key('Toyota', 'RAV4', 2024)
+        stale = datetime.now() - timedelta(days=PricingService.CACHE_EXPIRY_DAYS + 1)
+        db.session.add(PriceCache(make='toyota', model='rav4', year=2024, trim='', price=31000.0, fetched_at=stale))
+        db.session.commit()
+
+        assert PricingService._get_cached_price(key) == 31000.0
+        assert PricingService._get_cached_price(key) == 31000.0
+        release.set()
+        PricingService._refresh_executor.submit(lambda: None).result()
+        for _ in range(50):
+            if key not in PricingService._refreshing:
+                break
+            time.sleep(0.05)
+
+        assert fetched == ['rav4']
+        assert PricingService.get_vehicle_price('Toyota', 'RAV4', 2024) == 33000.0
+        db.session.expire_all()
+        assert PricingService._get_cached_price(key) == 33000.0
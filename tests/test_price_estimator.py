@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data.pricing_api import PricingService
+
+def test_batch_estimates_match_the_scalar_rules():
+    """Make prices, keyword factors and the age curve are applied per row"""
+    prices = PricingService.estimate_prices(
+        ['Toyota', 'toyota', 'Yugo', 'BMW', 'Honda'],
+        ['RAV4', 'RAV4 Limited', 'GV', 'M3 Sport Base', 'Civic'],
+        [2025, 2025, 1990, 2020, 2030],
+        current_year=2026
+    )
+
+    assert prices.tolist() == [
+        27000.0,                       # 30000, 1 year: 10%
+        32400.0,                       # luxury keyword: x1.2
+        3500.0,                        # unknown make 35000, 36 years: capped at 90%
+        25200.0,                       # economy keyword wins over sport (x0.9), 6 years: 44%
+        25200.0                        # future model years count as new
+    ]
+
+def test_scalar_wrappers():
+    """The scalar API returns plain floats from the same tables"""
+    assert PricingService.model_price_factor('Camry Platinum') == 1.2
+    assert PricingService.model_price_factor('Camry') == 1.0
+    assert PricingService.base_prices(['tesla', 'Unknown']).tolist() == [60000.0, 35000.0]
+    assert isinstance(PricingService._estimate_price('Toyota', 'RAV4', 2020), float)
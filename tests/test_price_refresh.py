@@ -0,0 +1,87 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from app.database import db
+from app.models import Vehicle, TCOComparison
+from app.services.business_logic.depreciation_service import DepreciationService
+from app.services.business_logic.price_refresh_service import PriceRefreshService
+from app.services.data.invalidation import PRICES, InvalidationBus
+from app.services.data.pricing_api import PricingService
+from app.services.data.shared_store import FileStore
+
+def _app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'vehicles.db'}"
+        SECRET_KEY = 'test'
+        PRICE_CACHE_SWEEP_SECONDS = 0
+    return create_app(TestConfig)
+
+def _vehicle(model, price_as_of=None):
+    return Vehicle(make='Toyota', model=model, year=2024, type='Sedan', fuel_type='Gasoline',
+                   price=1.0 if price_as_of else None, price_as_of=price_as_of)
+
+def _comparison(vehicle, created_at):
+    return TCOComparison(vehicle1_id=vehicle.id, vehicle1_make=vehicle.make, vehicle1_model=vehicle.model,
+                         vehicle1_year=vehicle.year, vehicle1_fuel_type=vehicle.fuel_type,
+                         vehicle1_type=vehicle.type, comparison_data='{}', created_at=created_at)
+
+def test_recently_analyzed_vehicles_are_refreshed_first(tmp_path, monkeypatch):
+    """Due vehicles are ordered by their latest comparison, fresh prices are skipped"""
+    app = _app(tmp_path)
+    monkeypatch.setattr(InvalidationBus, 'DIRECTORY', str(tmp_path / 'invalidation'))
+    monkeypatch.setattr(PricingService._price_cache, '_shared_store', FileStore(str(tmp_path / 'shared')))
+    PricingService._price_cache.memory.clear()
+    monkeypatch.setattr(PricingService, '_fetch_market_price',
+                        lambda make, model, year, trim=None: None if model == 'Corolla' else 31000.0)
+
+    with app.app_context():
+        now = datetime.now()
+        never, old, recent, fresh = (_vehicle('Corolla'), _vehicle('Camry'), _vehicle('RAV4'),
+                                     _vehicle('Prius', price_as_of=now))
+        db.session.add_all([never, old, recent, fresh])
+        db.session.commit()
+        db.session.add_all([_comparison(old, now - timedelta(days=30)), _comparison(recent, now),
+                            _comparison(fresh, now)])
+        db.session.commit()
+
+        due = PriceRefreshService.due_vehicles()
+        assert [vehicle.model for vehicle in due] == ['RAV4', 'Camry', 'Corolla']
+
+        summary = PriceRefreshService.refresh(due, batch_size=2)
+        assert (summary['market'], summary['estimate']) == (2, 1)
+        # The run tells the other workers to drop their in-memory prices
+        assert InvalidationBus.generation(PRICES) == 1
+        assert PriceRefreshService.due_vehicles() == []
+
+        db.session.expire_all()
+        corolla = Vehicle.query.filter_by(model='Corolla').first()
+        assert corolla.price_source == 'estimate'
+        assert corolla.price == PricingService._estimate_price('Toyota', 'Corolla', 2024)
+
+        # The hot path reads the row and never calls MarketCheck
+        monkeypatch.setattr(PricingService, 'get_vehicle_price', lambda *args: 1 / 0)
+        rav4 = Vehicle.query.filter_by(model='RAV4').first()
+        assert DepreciationService.calculate_depreciation(rav4)['initial_price'] == 31000.0
+
+def test_expired_materialized_prices_are_looked_up_again(tmp_path, monkeypatch):
+    """Without the refresh job a price older than CACHE_EXPIRY_DAYS is not served forever"""
+    app = _app(tmp_path)
+    monkeypatch.setattr(PricingService, 'get_vehicle_price', lambda make, model, year: 27000.0)
+
+    with app.app_context():
+        now = datetime.now()
+        fresh = _vehicle('Prius', price_as_of=now - timedelta(days=PricingService.CACHE_EXPIRY_DAYS - 1))
+        expired = _vehicle('Camry', price_as_of=now - timedelta(days=PricingService.CACHE_EXPIRY_DAYS + 1))
+        db.session.add_all([fresh, expired])
+        db.session.commit()
+
+        assert PriceRefreshService.current_price(fresh) == 1.0
+        assert PriceRefreshService.current_price(expired) is None
+        assert DepreciationService.calculate_depreciation(fresh)['initial_price'] == 1.0
+        assert DepreciationService.calculate_depreciation(expired)['initial_price'] == 27000.0
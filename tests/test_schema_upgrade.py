@@ -0,0 +1,42 @@
+import sys
+import os
+import sqlite3
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from config import Config
+from app import create_app
+from app.database import db, upgrade_schema
+from app.models import Vehicle
+
+def test_upgrade_adds_columns_and_rebuilds_the_price_cache(tmp_path):
+    """A database from before the new columns is upgraded in place on start-up, keeping its vehicles"""
+    path = tmp_path / 'vehicles.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            CREATE TABLE vehicles (id INTEGER PRIMARY KEY, make VARCHAR(100) NOT NULL, model VARCHAR(100) NOT NULL,
+                                   year INTEGER NOT NULL, type VARCHAR(50) NOT NULL, fuel_type VARCHAR(50),
+                                   created_at DATETIME);
+            CREATE TABLE price_cache (id INTEGER PRIMARY KEY, cache_key VARCHAR(255) UNIQUE NOT NULL,
+                                      price FLOAT NOT NULL, created_at DATETIME);
+            INSERT INTO vehicles (make, model, year, type, fuel_type) VALUES ('Toyota', 'RAV4', 2024, 'SUV', 'Regular');
+            INSERT INTO price_cache (cache_key, price) VALUES ('Toyota_RAV4_2024_SUV', 31000);
+        """)
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SECRET_KEY = 'test'
+    # create_app upgrades the schema, so a web deploy works without running populate_database.py
+    app = create_app(TestConfig)
+
+    with app.app_context():
+        columns = {column['name'] for column in inspect(db.engine).get_columns('vehicles')}
+        assert {'price', 'retired_at', 'mpg_combined'} <= columns
+        assert 'make' in {column['name'] for column in inspect(db.engine).get_columns('price_cache')}
+
+        vehicle = Vehicle.query.one()
+        assert (vehicle.model, vehicle.price) == ('RAV4', None)
+
+        assert upgrade_schema() == []
@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data.cache import TTLCache
+from app.services.data.shared_store import FileStore, TieredCache
+
+def _tiered(tmp_path, database):
+    return TieredCache(
+        'test',
+        memory=TTLCache('test_tiered', maxsize=10, ttl=60),
+        shared_ttl=60,
+        negative_ttl=60,
+        db_get=database.get,
+        db_set=database.__setitem__,
+        shared_store=FileStore(str(tmp_path))
+    )
+
+def test_lookups_fill_the_faster_tiers(tmp_path):
+    """A database hit is copied to the shared and memory tiers"""
+    cache = _tiered(tmp_path, {'rav4': 31000.0})
+
+    assert cache.lookup('rav4') == (True, 31000.0)
+    cache.memory.clear()
+    assert cache.lookup('rav4') == (True, 31000.0)
+    assert cache.lookup('rav4') == (True, 31000.0)
+
+    stats = cache.stats()
+    assert stats['database']['hits'] == 1
+    assert stats['shared']['hits'] == 1
+    assert stats['memory']['hits'] == 1
+
+def test_negative_entries_skip_the_database(tmp_path):
+    """A missing value is remembered in the memory and shared tiers only"""
+    database = {}
+    cache = _tiered(tmp_path, database)
+
+    assert cache.lookup('yugo') == (False, None)
+    cache.store('yugo', None)
+    assert database == {}
+
+    # Another process sees the negative entry through the shared store
+    other = _tiered(tmp_path, database)
+    assert other.lookup('yugo') == (True, None)
+    assert other.stats()['shared']['negative_hits'] == 1
+
+    cache.store('yugo', 9000.0)
+    assert database == {'yugo': 9000.0}
+    assert cache.lookup('yugo') == (True, 9000.0)
+
+def test_file_store_expiry(tmp_path):
+    """Expired shared entries read as missing"""
+    store = FileStore(str(tmp_path))
+    store.set('key', {'a': 1}, ttl=60)
+    store.set('old', 1, ttl=-1)
+
+    assert store.get('key') == {'a': 1}
+    assert store.get('old', 'missing') == 'missing'
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.business_logic.vehicle_search_index import VehicleSearchIndex
+
+ENTRIES = [
+    (2024, 'Toyota', 'RAV4 Hybrid AWD', 'Regular Gasoline'),
+    (2023, 'Toyota', 'RAV4 Hybrid AWD', 'Regular Gasoline'),
+    (2024, 'Toyota', 'RAV4 AWD', 'Regular Gasoline'),
+    (2024, 'Toyota', 'RAV4 Prime AWD', 'Regular Gasoline and Electricity'),
+    (2024, 'Hyundai', 'Tucson Hybrid AWD', 'Regular Gasoline'),
+    (2024, 'Tesla', 'Model 3 Long Range AWD', 'Electricity'),
+]
+
+def test_every_query_word_must_match_as_a_prefix():
+    """"rav4 hy" matches RAV4 Hybrids but not other RAV4s or other hybrids"""
+    index = VehicleSearchIndex(ENTRIES)
+    results = index.search('rav4 hy')
+    
+    assert results == [
+        (2024, 'Toyota', 'RAV4 Hybrid AWD', 'Regular Gasoline'),
+        (2023, 'Toyota', 'RAV4 Hybrid AWD', 'Regular Gasoline'),
+    ]
+
+def test_results_are_newest_first_and_limited():
+    """Results come back in display order and respect the limit"""
+    index = VehicleSearchIndex(ENTRIES)
+    results = index.search('toyota', limit=2)
+    
+    assert [result[0] for result in results] == [2024, 2024]
+    assert len(results) == 2
+
+def test_query_is_case_and_punctuation_insensitive():
+    """Upper case and punctuation in the query are ignored"""
+    index = VehicleSearchIndex(ENTRIES)
+    assert index.search('TESLA, model-3') == [(2024, 'Tesla', 'Model 3 Long Range AWD', 'Electricity')]
+
+def test_no_match_returns_empty_list():
+    """Unknown words and empty queries match nothing"""
+    index = VehicleSearchIndex(ENTRIES)
+    assert index.search('corolla') == []
+    assert index.search('  ') == []
+
+def test_duplicate_entries_are_collapsed():
+    """The same (year, make, model, fuel type) is indexed once"""
+    index = VehicleSearchIndex(ENTRIES + ENTRIES[:2])
+    assert len(index) == len(ENTRIES)
+
+def test_entries_without_fuel_type_are_not_offered():
+    """A catalog row whose fuel type is unknown cannot be added, so it is not a result"""
+    index = VehicleSearchIndex(ENTRIES + [(2024, 'Škoda', 'Octavia', None), (2024, 'Škoda', 'Kodiaq', '')])
+    assert len(index) == len(ENTRIES)
+    assert index.search('octavia') == [] and index.search('kodiaq') == []
@@ -0,0 +1,53 @@
+import sys
+import os
+import json
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.business_logic.vehicle_type_classifier import VehicleTypeClassifier
+
+def test_default_rules():
+    """Model names map to the catalog vehicle types, Sedan when nothing matches"""
+    classifier = VehicleTypeClassifier()
+
+    assert classifier.classify('F-150 Pickup 4WD') == 'Truck'
+    assert classifier.classify('Explorer AWD') == 'SUV'
+    assert classifier.classify('Grand Caravan') == 'Van'
+    assert classifier.classify('Mustang Convertible') == 'Coupe'
+    assert classifier.classify('MX-5 Miata Roadster') == 'Convertible'
+    assert classifier.classify('Golf GTI') == 'Hatchback'
+    assert classifier.classify('Outback Wagon') == 'Wagon'
+    assert classifier.classify('Camry') == 'Sedan'
+    assert classifier.classify('') == 'Sedan'
+
+def test_drivetrain_does_not_make_an_suv():
+    """AWD/4WD in EPA model names says nothing about the body type"""
+    classifier = VehicleTypeClassifier()
+
+    assert classifier.classify('Camry AWD') == 'Sedan'
+    assert classifier.classify('Model 3 Long Range AWD') == 'Sedan'
+    assert classifier.classify('Mazda3 5-Door AWD') == 'Sedan'
+    assert classifier.classify('Outback AWD') == 'Wagon'
+    assert classifier.classify('Equinox AWD') == 'SUV'
+
+def test_rule_priority_does_not_depend_on_position():
+    """The highest-priority rule wins even when a lower one matches earlier in the name"""
+    classifier = VehicleTypeClassifier([('Truck', ['truck']), ('SUV', ['awd', 'sport'])], default='Car')
+
+    assert classifier.classify('Sport AWD Truck') == 'Truck'
+    assert classifier.classify('Sport AWD') == 'SUV'
+    assert classifier.classify('Sedan') == 'Car'
+    assert classifier.classify_many(['Sport Truck', 'Coupe']) == {'Sport Truck': 'Truck', 'Coupe': 'Car'}
+
+def test_rules_file(tmp_path):
+    """A rules file replaces the default table, a broken one falls back to it"""
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'default': 'Other', 'rules': [['Electric', ['ev', 'electric']]]}))
+    classifier = VehicleTypeClassifier.from_file(str(path))
+
+    assert classifier.classify('Bolt EV') == 'Electric'
+    assert classifier.classify('F-150') == 'Other'
+
+    path.write_text('not json')
+    assert VehicleTypeClassifier.from_file(str(path)).classify('F-150') == 'Truck'
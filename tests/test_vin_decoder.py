@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add the application root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data.vin_decoder import VinDecoderService
+
+def test_vins_differing_only_in_check_digit_and_serial_share_a_pattern():
+    """The check digit (9) and serial number (12-17) do not change the pattern"""
+    first = VinDecoderService.pattern_for("1HGCM82633A123456")
+    second = VinDecoderService.pattern_for(" 1hgcm82653b654321 ")
+    
+    assert first == "1HGCM8263"
+    assert first == second
+
+def test_model_year_is_part_of_the_pattern():
+    """Position 10 (model year) separates otherwise identical VINs"""
+    assert VinDecoderService.pattern_for("1HGCM82633A123456") != VinDecoderService.pattern_for("1HGCM82634A123456")
+
+def test_small_manufacturer_pattern_includes_positions_12_to_14():
+    """WMIs ending in 9 continue the manufacturer code after the model year and plant"""
+    assert VinDecoderService.pattern_for("1G9AB12C5PA123456") == "1G9AB12CP123"
+
+def test_invalid_vins_have_no_pattern():
+    """Wrong length or the letters I, O and Q are rejected"""
+    assert VinDecoderService.pattern_for("1HGCM82633A12345") is None
+    assert VinDecoderService.pattern_for("1HGCM8263IA123456") is None
+    assert VinDecoderService.pattern_for("") is None